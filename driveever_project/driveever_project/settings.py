@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -73,6 +74,11 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'driveever_project.wsgi.application'
 
+# Serve postcode lookup, nearest postcodes, vehicle check and search with async views.
+# Enable when running under an ASGI server (e.g. uvicorn driveever_project.asgi:application);
+# install httpx so outbound calls don't need a thread each.
+ASYNC_INTEGRATION_VIEWS = False
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
@@ -147,5 +153,99 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 20
+    'PAGE_SIZE': 20,
+    # Reverse proxies in front of the app. Throttles identify clients by REMOTE_ADDR when
+    # this is 0; set it to the proxy depth so the address the proxies append to
+    # X-Forwarded-For is used instead (the header is otherwise client supplied)
+    'NUM_PROXIES': 0,
+    'DEFAULT_THROTTLE_RATES': {
+        'anon': None,
+        'user': None,
+        'vehicle_check': '10/min',
+        'distance_matrix': '10/min',
+    },
 }
+
+# Postcode lookup backend
+# 'remote' calls Postcodes.io for every lookup; 'local' answers from the snapshot
+# built by `manage.py import_postcodes` and only calls Postcodes.io for unknown postcodes
+POSTCODE_BACKEND = 'remote'
+POSTCODE_DATA_FILE = BASE_DIR / 'data' / 'postcodes.bin'
+
+# Outbound HTTP (Postcodes.io, DVLA): one keep-alive pool per host. Size POOL_MAXSIZE to the
+# number of threads per worker so requests don't queue for a connection. Idempotent calls
+# are retried RETRIES times with jittered exponential backoff (BACKOFF doubling up to BACKOFF_MAX).
+# Each host's circuit opens when BREAKER_FAILURE_RATE of its last BREAKER_WINDOW calls failed
+# (errors, 429/5xx or slower than BREAKER_SLOW_CALL_SECONDS) and stays open for BREAKER_OPEN_SECONDS.
+# At most MAX_CONCURRENT requests per host are in flight; others wait BULKHEAD_WAIT seconds, then fail.
+# HOSTS overrides any of these per host.
+OUTBOUND_HTTP = {
+    'POOL_CONNECTIONS': 10,
+    'POOL_MAXSIZE': 20,
+    'CONNECT_TIMEOUT': 3.05,
+    'READ_TIMEOUT': 10,
+    'RETRIES': 2,
+    'BACKOFF': 0.2,
+    'BACKOFF_MAX': 2.0,
+    'BREAKER_WINDOW': 20,
+    'BREAKER_MIN_CALLS': 5,
+    'BREAKER_FAILURE_RATE': 0.5,
+    'BREAKER_SLOW_CALL_SECONDS': 5.0,
+    'BREAKER_OPEN_SECONDS': 30,
+    'MAX_CONCURRENT': 10,
+    'BULKHEAD_WAIT': 0.0,
+    'HOSTS': {
+        # DVLA lookups are slow and rate limited; keep fewer workers waiting on them
+        'driver-vehicle-licensing.api.gov.uk': {
+            'MAX_CONCURRENT': 5,
+            'BREAKER_SLOW_CALL_SECONDS': 10.0,
+        },
+    },
+}
+
+# Postcode response cache: in-process LRU, optionally backed by a shared Django cache
+# (set CACHE_ALIAS to a configured cache such as Redis to share results between workers)
+POSTCODE_CACHE = {
+    'MAX_ENTRIES': 20000,
+    'TTL': 60 * 60 * 24 * 7,
+    'NEGATIVE_TTL': 60 * 60,
+    'CACHE_ALIAS': None,
+}
+
+# Instructor search
+SEARCH_NEARBY_RADIUS_KM = 25  # Radius used when no instructor covers the searched outcode
+SEARCH_MAX_RADIUS_KM = 100  # Upper bound for ?radius_km=
+SEARCH_PAGE_SIZE = 20  # Results per page when ?page_size= is not given
+SEARCH_MAX_PAGE_SIZE = 100  # Upper bound for ?page_size=
+
+# Search result cache: responses are cached per outcode and invalidated per outcode
+# when instructors, their availability or academies change. The per-outcode
+# generation counters live in GENERATION_CACHE_ALIAS, which must be shared by all workers
+# (`manage.py check` warns while it is a per-process cache such as the default LocMemCache).
+SEARCH_CACHE = {
+    'MAX_ENTRIES': 5000,
+    'TTL': 60 * 5,
+    'CACHE_ALIAS': None,
+    'GENERATION_CACHE_ALIAS': 'default',
+}
+
+# Slot holds: minutes a learner can hold a slot before confirming it into a booking.
+# Expired holds stop blocking immediately; `manage.py expire_slot_holds` deletes them.
+SLOT_HOLD_MINUTES = 10
+
+# DVLA vehicle enquiry API, keyed from the environment
+DVLA_API_KEY = os.environ.get('DVLA_API_KEY', '')
+
+# Vehicle lookup cache, keyed on the cleaned registration. Entries younger than FRESH_TTL
+# are served as they are; older ones are served for up to STALE_TTL more while being
+# refreshed in the background. "Vehicle not found" results are kept for NEGATIVE_TTL.
+VEHICLE_CACHE = {
+    'MAX_ENTRIES': 10000,
+    'FRESH_TTL': 60 * 60 * 6,
+    'STALE_TTL': 60 * 60 * 24 * 7,
+    'NEGATIVE_TTL': 60 * 60,
+    'CACHE_ALIAS': None,
+}
+
+# Waitlist: minutes a learner has to confirm a slot offered to them after a cancellation
+WAITLIST_OFFER_MINUTES = 30
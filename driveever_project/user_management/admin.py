@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import User, InstructorProfile, AcademyProfile, InstructorAvailability, Payment, Booking
+from .models import (
+    User, InstructorProfile, InstructorCoverage, AcademyProfile, InstructorAvailability, AvailabilityException,
+    Payment, Booking, SlotHold, WaitlistEntry
+)
 
 # Register your models here.
 
@@ -17,6 +20,13 @@ class InstructorProfileAdmin(admin.ModelAdmin):
     search_fields = ['user__username', 'user__full_name', 'adi_number', 'postcodes']
     ordering = ['-created_at']
 
+@admin.register(InstructorCoverage)
+class InstructorCoverageAdmin(admin.ModelAdmin):
+    list_display = ['instructor_profile', 'outcode', 'district', 'latitude', 'longitude']
+    list_filter = ['district']
+    search_fields = ['outcode', 'instructor_profile__user__username']
+    ordering = ['outcode']
+
 @admin.register(AcademyProfile)
 class AcademyProfileAdmin(admin.ModelAdmin):
     list_display = ['user', 'academy_name', 'owner_name', 'main_postcode', 'is_active', 'created_at']
@@ -31,6 +41,13 @@ class InstructorAvailabilityAdmin(admin.ModelAdmin):
     search_fields = ['instructor_profile__user__username', 'instructor_profile__user__full_name']
     ordering = ['instructor_profile', 'day_of_week', 'start_time']
 
+@admin.register(AvailabilityException)
+class AvailabilityExceptionAdmin(admin.ModelAdmin):
+    list_display = ['instructor_profile', 'date', 'start_time', 'end_time', 'is_available', 'reason']
+    list_filter = ['is_available', 'date']
+    search_fields = ['instructor_profile__user__username', 'instructor_profile__user__full_name', 'reason']
+    ordering = ['-date', 'start_time']
+
 @admin.register(Payment)
 class PaymentAdmin(admin.ModelAdmin):
     list_display = ['id', 'amount', 'currency', 'payment_method', 'status', 'created_at', 'completed_at']
@@ -93,3 +110,17 @@ class BookingAdmin(admin.ModelAdmin):
         return super().get_queryset(request).select_related(
             'learner', 'instructor', 'payment'
         )
+
+@admin.register(SlotHold)
+class SlotHoldAdmin(admin.ModelAdmin):
+    list_display = ['id', 'learner', 'instructor', 'lesson_date', 'start_time', 'end_time', 'expires_at']
+    list_filter = ['lesson_date', 'expires_at']
+    search_fields = ['learner__username', 'instructor__username']
+    ordering = ['expires_at']
+
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(admin.ModelAdmin):
+    list_display = ['id', 'learner', 'instructor', 'earliest_date', 'latest_date', 'status', 'offered_at']
+    list_filter = ['status', 'earliest_date']
+    search_fields = ['learner__username', 'instructor__username']
+    ordering = ['-created_at']
@@ -0,0 +1,157 @@
+"""
+Async API Views for DriveEver
+Async counterparts of the views that wait on Postcodes.io or DVLA, for
+serving under ASGI: while a lookup is in flight the event loop serves other
+requests instead of a worker thread sitting idle. Responses are identical
+to the sync views they extend.
+"""
+
+import asyncio
+import logging
+
+from asgiref.sync import sync_to_async
+from rest_framework import exceptions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .postcode_service import postcode_service
+from .postcode_views import NearestPostcodesView, PostcodeLookupView
+from .vehicle_service import vehicle_service
+from .vehicle_views import VehicleCheckView
+from .views import UserSearchView
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncAPIView(APIView):
+    """
+    APIView with coroutine handlers
+
+    Authentication, permission and throttle checks may query the database,
+    so they run in a worker thread; the handler itself runs on the event loop.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+class AsyncPostcodeLookupView(AsyncAPIView, PostcodeLookupView):
+    """
+    Get detailed information about a UK postcode
+    """
+
+    async def get(self, request):
+        """Get postcode information"""
+        postcode = request.query_params.get('postcode', '').strip()
+
+        if not postcode:
+            return Response(
+                {'error': 'Postcode parameter is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            result = await postcode_service.aget_postcode_info(postcode)
+            return Response(result, status=status.HTTP_200_OK)
+        except Exception as e:
+            logger.error(f"Postcode lookup error: {e}")
+            return Response(
+                {'error': 'Postcode lookup failed'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class AsyncNearestPostcodesView(AsyncAPIView, NearestPostcodesView):
+    """
+    Find nearest postcodes to a given postcode
+    """
+
+    async def get(self, request):
+        """Find nearest postcodes"""
+        postcode = request.query_params.get('postcode', '').strip()
+
+        if not postcode:
+            return Response(
+                {'error': 'Postcode parameter is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        limit = self.parse_limit(request)
+        if isinstance(limit, Response):
+            return limit
+
+        try:
+            result = await postcode_service.afind_nearest_postcodes(postcode, limit)
+            return Response(result, status=status.HTTP_200_OK)
+        except Exception as e:
+            logger.error(f"Nearest postcodes lookup error: {e}")
+            return Response(
+                {'error': 'Nearest postcodes lookup failed'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class AsyncVehicleCheckView(AsyncAPIView, VehicleCheckView):
+    """
+    DVLA Vehicle Check API Proxy
+    """
+
+    async def post(self, request):
+        """Check vehicle using DVLA API"""
+        clean_registration = None
+        try:
+            clean_registration, error = self.clean_registration(request)
+            if error is not None:
+                return error
+            await sync_to_async(self.check_valid_request_throttles)(request)
+
+            status_code, vehicle_data = await vehicle_service.alookup(clean_registration)
+            return self.lookup_response(clean_registration, status_code, vehicle_data)
+
+        except exceptions.APIException:
+            raise
+        except Exception as e:
+            return self.lookup_failed(clean_registration, e)
+
+    async def get(self, request):
+        """Health check for vehicle check service"""
+        return super().get(request)
+
+
+class AsyncUserSearchView(AsyncAPIView, UserSearchView):
+    """
+    Search for instructors and academies by postcode and other criteria
+
+    The postcode is resolved on the event loop; parsing (which checks the
+    search cache) and the database queries run in a worker thread, as
+    Django's async ORM does.
+    """
+
+    async def get(self, request):
+        search = await sync_to_async(self.parse_search)(request)
+        if isinstance(search, Response):
+            return search
+
+        postcode_info = await postcode_service.aresolve_postcode(search['criteria']['postcode'])
+        return await sync_to_async(self.search)(search, postcode_info)
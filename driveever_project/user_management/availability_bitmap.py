@@ -0,0 +1,149 @@
+"""
+Availability bitmaps for DriveEver instructors
+A week is 672 bits, one per 15 minutes from Monday 00:00, so "is the
+instructor free for X-Y on date D" is a couple of bitwise operations
+
+The weekly bitmap is stored on InstructorProfile as 168 hex digits, one per
+hour of the week (lowest bit = first quarter hour). Whole-hour ranges are
+then fixed-position substrings, which any database can filter on.
+"""
+
+from typing import Iterable, List, Tuple
+
+SLOT_MINUTES = 15
+SLOTS_PER_HOUR = 60 // SLOT_MINUTES
+SLOTS_PER_DAY = 24 * SLOTS_PER_HOUR
+SLOTS_PER_WEEK = 7 * SLOTS_PER_DAY
+HOURS_PER_WEEK = 7 * 24
+
+DAY_MASK = (1 << SLOTS_PER_DAY) - 1
+EMPTY_WEEK = '0' * HOURS_PER_WEEK
+
+DAY_NAMES = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+# Named parts of the day for search filters, as (start hour, end hour)
+DAY_PERIODS = {
+    'morning': (8, 12),
+    'afternoon': (12, 17),
+    'evening': (17, 21),
+}
+
+
+def interval_mask(start: int, end: int, inner: bool = False) -> int:
+    """
+    Bits for the quarter hours touched by start-end (minutes since midnight)
+
+    With inner=True only quarter hours completely inside the interval are
+    set, which is what an availability window guarantees; otherwise any
+    quarter hour it overlaps is set, which is what a booking blocks.
+    """
+    if inner:
+        first = -(-start // SLOT_MINUTES)
+        last = end // SLOT_MINUTES
+    else:
+        first = start // SLOT_MINUTES
+        last = -(-end // SLOT_MINUTES)
+    if last <= first:
+        return 0
+    return ((1 << (last - first)) - 1) << first
+
+
+def day_bitmap(intervals: Iterable[Tuple[int, int]], inner: bool = False) -> int:
+    """One day's bitmap for a set of (start, end) intervals in minutes"""
+    bitmap = 0
+    for start, end in intervals:
+        bitmap |= interval_mask(start, end, inner)
+    return bitmap
+
+
+def weekly_bitmap(windows: Iterable[Tuple[int, int, int]]) -> int:
+    """Weekly bitmap for (day_of_week, start, end) availability windows"""
+    bitmap = 0
+    for day_of_week, start, end in windows:
+        bitmap |= interval_mask(start, end, inner=True) << (day_of_week * SLOTS_PER_DAY)
+    return bitmap
+
+
+def day_of_week_bitmap(week: int, day_of_week: int) -> int:
+    """The part of a weekly bitmap for one day (0=Monday)"""
+    return (week >> (day_of_week * SLOTS_PER_DAY)) & DAY_MASK
+
+
+def apply_exceptions(available: int, exceptions: Iterable[Tuple[int, int, bool]]) -> int:
+    """
+    A day's availability bitmap after date-specific exceptions
+
+    Args:
+        available (int): The day's bitmap from the weekly template
+        exceptions: (start, end, is_available) in minutes; open windows are
+            added first, then closed ones removed, so closures win
+
+    Returns:
+        int: The day's bitmap
+    """
+    closed = 0
+    for start, end, is_available in exceptions:
+        if is_available:
+            available |= interval_mask(start, end, inner=True)
+        else:
+            closed |= interval_mask(start, end)
+    return available & ~closed
+
+
+def is_free(available: int, booked: int, start: int, end: int) -> bool:
+    """
+    Whether start-end fits a day's availability without touching a booking
+
+    Args:
+        available (int): The day's availability bitmap
+        booked (int): The day's booking bitmap
+        start (int): Minutes since midnight
+        end (int): Minutes since midnight
+    """
+    needed = interval_mask(start, end)
+    return needed != 0 and needed & available == needed and not needed & booked
+
+
+def bitmap_intervals(bitmap: int) -> List[Tuple[int, int]]:
+    """Runs of set bits in a day's bitmap as (start, end) minutes"""
+    intervals = []
+    slot = 0
+    while bitmap:
+        if bitmap & 1:
+            run = (~bitmap & (bitmap + 1)).bit_length() - 1
+            intervals.append((slot * SLOT_MINUTES, (slot + run) * SLOT_MINUTES))
+            bitmap >>= run
+            slot += run
+        else:
+            gap = (bitmap & -bitmap).bit_length() - 1
+            bitmap >>= gap
+            slot += gap
+    return intervals
+
+
+def free_intervals(available: int, booked: int = 0) -> List[Tuple[int, int]]:
+    """The (start, end) minutes of a day that are available and not booked"""
+    return bitmap_intervals(available & ~booked & DAY_MASK)
+
+
+def encode_bitmap(week: int) -> str:
+    """Weekly bitmap as 168 hex digits, one per hour from Monday 00:00"""
+    return ''.join('%x' % ((week >> (hour * SLOTS_PER_HOUR)) & 0xF) for hour in range(HOURS_PER_WEEK))
+
+
+def decode_bitmap(value: str) -> int:
+    """Inverse of encode_bitmap"""
+    week = 0
+    for hour, digit in enumerate(value or ''):
+        week |= int(digit, 16) << (hour * SLOTS_PER_HOUR)
+    return week
+
+
+def free_hours_pattern(day_of_week: int, start_hour: int, end_hour: int) -> Tuple[int, str]:
+    """
+    Substring test for "free every quarter hour from start_hour to end_hour"
+
+    Returns:
+        Tuple[int, str]: (1-based position in the encoded bitmap, required substring)
+    """
+    return day_of_week * 24 + start_hour + 1, 'f' * (end_hour - start_hour)
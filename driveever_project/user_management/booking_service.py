@@ -0,0 +1,404 @@
+"""
+Booking service for DriveEver
+Creates bookings without double-booking an instructor, even when learners
+book the same slot at the same moment
+
+Two layers keep bookings apart:
+- An atomic transaction that locks the instructor's profile row
+  (SELECT ... FOR UPDATE) before re-checking the day's bookings, so
+  concurrent bookings for one instructor queue behind each other while
+  other instructors are unaffected.
+- On PostgreSQL, the booking_no_overlap exclusion constraint over the
+  booking's lesson_period (tsrange) column, which rejects any overlap the
+  application misses (see migration 0009).
+
+Learners can also hold a slot for a few minutes (SlotHold) while they finish
+booking. Held slots are blocked for everyone else, so when many learners go
+for the same slot only the first gets past a cheap hold check and the rest
+fail fast instead of after full booking validation.
+"""
+
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .availability_bitmap import apply_exceptions, day_bitmap, day_of_week_bitmap, decode_bitmap, interval_mask
+from .models import AvailabilityException, Booking, InstructorProfile, SlotHold
+from .slot_engine import to_minutes
+
+ACTIVE_STATUSES = ['pending', 'confirmed']
+
+# Error code on serializer conflicts, and the exclusion constraint's name
+BOOKING_CONFLICT = 'booking_conflict'
+OVERLAP_CONSTRAINT = 'booking_no_overlap'
+
+# Bookings and holds are serialised on the instructor's profile row, so need one
+NO_PROFILE = 'Instructor profile not found.'
+
+HOLD_MINUTES = getattr(settings, 'SLOT_HOLD_MINUTES', 10)
+
+
+class BookingConflict(Exception):
+    """Raised when a booking overlaps an existing pending or confirmed booking"""
+
+    def __init__(self, message: str = 'This time slot conflicts with an existing booking.'):
+        super().__init__(message)
+        self.message = message
+
+
+class HoldExpired(Exception):
+    """Raised when confirming a hold that has expired or been released"""
+
+    def __init__(self, message: str = 'This hold has expired. Please hold the slot again.'):
+        super().__init__(message)
+        self.message = message
+
+
+def booked_bitmap(instructor_id: int, lesson_date: date, exclude_id: Optional[int] = None) -> int:
+    """
+    Bitmap of the quarter hours an instructor is booked for on a date
+    """
+    bookings = Booking.objects.filter(
+        instructor_id=instructor_id,
+        lesson_date=lesson_date,
+        status__in=ACTIVE_STATUSES
+    )
+    if exclude_id is not None:
+        bookings = bookings.exclude(pk=exclude_id)
+    return day_bitmap(
+        (to_minutes(start), to_minutes(end)) for start, end in bookings.values_list('start_time', 'end_time')
+    )
+
+
+def availability_exceptions(
+    instructor_profile_ids: Iterable[int],
+    start_date: date,
+    end_date: date
+) -> Dict[Tuple[int, date], List[Tuple[int, int, bool]]]:
+    """
+    Availability exceptions for several instructors over a date range
+
+    One range scan on the (instructor_profile, date) index.
+
+    Returns:
+        Dict: (start, end, is_available) in minutes, keyed by (instructor profile id, date)
+    """
+    exceptions = defaultdict(list)
+    for profile_id, day, start, end, is_available in AvailabilityException.objects.filter(
+        instructor_profile_id__in=instructor_profile_ids,
+        date__range=[start_date, end_date]
+    ).values_list('instructor_profile_id', 'date', 'start_time', 'end_time', 'is_available'):
+        exceptions[profile_id, day].append((
+            to_minutes(start) if start is not None else 0,
+            to_minutes(end) if end is not None else 24 * 60,
+            is_available
+        ))
+    return exceptions
+
+
+def day_availability(instructor_profile_id: int, week: int, lesson_date: date) -> int:
+    """
+    An instructor's availability bitmap for one date: the weekly template plus that date's exceptions
+    """
+    exceptions = availability_exceptions([instructor_profile_id], lesson_date, lesson_date)
+    return apply_exceptions(
+        day_of_week_bitmap(week, lesson_date.weekday()),
+        exceptions.get((instructor_profile_id, lesson_date), ())
+    )
+
+
+def active_holds():
+    """Holds that haven't expired yet"""
+    return SlotHold.objects.filter(expires_at__gt=timezone.now())
+
+
+def held_bitmap(instructor_id: int, lesson_date: date, learner_id: Optional[int] = None) -> int:
+    """
+    Bitmap of the quarter hours held for an instructor on a date
+
+    Holds belonging to learner_id are left out, since they don't block that learner.
+    """
+    holds = active_holds().filter(instructor_id=instructor_id, lesson_date=lesson_date)
+    if learner_id is not None:
+        holds = holds.exclude(learner_id=learner_id)
+    return day_bitmap(
+        (to_minutes(start), to_minutes(end)) for start, end in holds.values_list('start_time', 'end_time')
+    )
+
+
+def blocked_bitmap(
+    instructor_id: int,
+    lesson_date: date,
+    learner_id: Optional[int] = None,
+    exclude_id: Optional[int] = None
+) -> int:
+    """
+    Bitmap of the quarter hours a learner can't book: other bookings and other learners' holds
+    """
+    return booked_bitmap(instructor_id, lesson_date, exclude_id) | held_bitmap(instructor_id, lesson_date, learner_id)
+
+
+def lock_instructor(instructor_id: int, *fields: str) -> Optional[tuple]:
+    """
+    Lock an instructor's profile row until the current transaction ends
+
+    Must be called inside transaction.atomic().
+
+    Args:
+        instructor_id (int): The instructor's user id
+        *fields: Profile fields to read while taking the lock
+
+    Returns:
+        Optional[tuple]: The requested fields, or None if the instructor has no profile
+    """
+    return InstructorProfile.objects.select_for_update().filter(
+        user_id=instructor_id
+    ).values_list('pk', *fields).first()
+
+
+def is_overlap_violation(error: IntegrityError) -> bool:
+    """Whether an IntegrityError came from the booking_no_overlap constraint"""
+    diag = getattr(error.__cause__, 'diag', None)
+    if diag is not None and getattr(diag, 'constraint_name', None):
+        return diag.constraint_name == OVERLAP_CONSTRAINT
+    return OVERLAP_CONSTRAINT in str(error)
+
+
+def overlapping_bookings(bookings: Iterable) -> List[Tuple]:
+    """
+    Pairs of active bookings for the same instructor whose times overlap
+
+    The bookings can be any objects with Booking's fields, including
+    historical models in migrations.
+
+    Returns:
+        List[Tuple]: (booking, an earlier-starting booking it overlaps) pairs
+    """
+    days = {}
+    for booking in bookings:
+        if booking.status in ACTIVE_STATUSES:
+            days.setdefault((booking.instructor_id, booking.lesson_date), []).append(booking)
+
+    pairs = []
+    for day in days.values():
+        day.sort(key=lambda b: (b.start_time, b.pk))
+        for index, booking in enumerate(day):
+            pairs.extend(
+                (booking, earlier) for earlier in day[:index] if earlier.end_time > booking.start_time
+            )
+    return pairs
+
+
+def lesson_pricing(price_per_hour: Decimal, start_time: time, end_time: time) -> Dict[str, Decimal]:
+    """
+    Duration and price fields for a lesson, for bookings made from holds or series
+    """
+    start = datetime.combine(date.min, start_time)
+    end = datetime.combine(date.min, end_time)
+    hours = Decimal((end - start).seconds) / 3600
+    return {
+        'duration_hours': hours.quantize(Decimal('0.1')),
+        'price_per_hour': price_per_hour,
+        'total_price': (price_per_hour * hours).quantize(Decimal('0.01')),
+    }
+
+
+def create_booking(**fields) -> Booking:
+    """
+    Create a booking, re-checking for conflicts under the instructor's row lock
+
+    Args:
+        **fields: Booking model fields; instructor and learner may be Users or given as *_id
+
+    Raises:
+        BookingConflict: If the slot overlaps another booking or another learner's hold,
+            or the instructor has no profile (and so no row to lock)
+    """
+    instructor_id = fields['instructor'].pk if 'instructor' in fields else fields['instructor_id']
+    learner_id = fields['learner'].pk if 'learner' in fields else fields.get('learner_id')
+    needed = interval_mask(to_minutes(fields['start_time']), to_minutes(fields['end_time']))
+
+    try:
+        with transaction.atomic():
+            if lock_instructor(instructor_id) is None:
+                raise BookingConflict(NO_PROFILE)
+            if needed & blocked_bitmap(instructor_id, fields['lesson_date'], learner_id):
+                raise BookingConflict()
+            return Booking.objects.create(**fields)
+    except IntegrityError as e:
+        if is_overlap_violation(e):
+            raise BookingConflict()
+        raise
+
+
+def hold_slot(
+    instructor_id: int,
+    learner_id: int,
+    lesson_date: date,
+    start_time: time,
+    end_time: time,
+    minutes: int = HOLD_MINUTES,
+    replace: bool = True
+) -> SlotHold:
+    """
+    Hold a slot for a learner, or fail straight away if it's taken
+
+    A learner holds at most one slot per instructor; a new hold replaces the
+    old one. With replace=False (holds the learner didn't ask for, such as
+    waitlist offers) a learner's active hold is kept and the new one refused.
+
+    Raises:
+        BookingConflict: If the slot overlaps a booking or another learner's hold,
+            or the learner already holds a slot and replace is False,
+            or the instructor has no profile
+    """
+    needed = interval_mask(to_minutes(start_time), to_minutes(end_time))
+
+    with transaction.atomic():
+        if lock_instructor(instructor_id) is None:
+            raise BookingConflict(NO_PROFILE)
+        if needed & blocked_bitmap(instructor_id, lesson_date, learner_id):
+            raise BookingConflict('This time slot is already booked or being booked.')
+        holds = SlotHold.objects.filter(instructor_id=instructor_id, learner_id=learner_id)
+        if not replace and holds.filter(expires_at__gt=timezone.now()).exists():
+            raise BookingConflict('The learner is already holding a slot with this instructor.')
+        holds.delete()
+        return SlotHold.objects.create(
+            instructor_id=instructor_id,
+            learner_id=learner_id,
+            lesson_date=lesson_date,
+            start_time=start_time,
+            end_time=end_time,
+            expires_at=timezone.now() + timedelta(minutes=minutes)
+        )
+
+
+def confirm_hold(hold: SlotHold, **fields) -> Booking:
+    """
+    Turn a hold into a booking
+
+    Args:
+        hold (SlotHold): The learner's hold
+        **fields: Other Booking fields (pricing, lesson_type, pickup_location, ...)
+
+    Raises:
+        HoldExpired: If the hold has expired or was released
+        BookingConflict: If the slot was booked regardless (e.g. by an admin)
+    """
+    with transaction.atomic():
+        lock_instructor(hold.instructor_id)
+        if not active_holds().filter(pk=hold.pk).delete()[0]:
+            raise HoldExpired()
+        return create_booking(
+            instructor_id=hold.instructor_id,
+            learner_id=hold.learner_id,
+            lesson_date=hold.lesson_date,
+            start_time=hold.start_time,
+            end_time=hold.end_time,
+            **fields
+        )
+
+
+def expire_holds() -> int:
+    """Delete expired holds, returning how many were removed"""
+    deleted, _ = SlotHold.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
+
+
+def create_booking_series(
+    instructor,
+    learner,
+    dates: Iterable[date],
+    start_time: time,
+    end_time: time,
+    allow_partial: bool = False,
+    **fields
+) -> Tuple[List[Booking], List[Dict]]:
+    """
+    Book the same lesson time on several dates in one transaction
+
+    Availability, exceptions, bookings and holds for every date are loaded up
+    front (one query each, under the instructor's row lock) and each occurrence is
+    checked in memory before a single bulk insert. Booking has no save
+    signals, so bulk_create doesn't skip anything.
+
+    Args:
+        instructor (User): The instructor
+        learner (User): The learner booking
+        dates: Lesson dates
+        start_time (time): Lesson start on every date
+        end_time (time): Lesson end on every date
+        allow_partial (bool): Book the free dates even if others conflict
+        **fields: Other Booking fields (lesson_type, pickup_location, ...)
+
+    Returns:
+        Tuple[List[Booking], List[Dict]]: The bookings created, and a
+        {'date', 'reason'} entry for every date that couldn't be booked.
+        Nothing is booked if there are conflicts and allow_partial is False.
+    """
+    dates = sorted(set(dates))
+    start = to_minutes(start_time)
+    end = to_minutes(end_time)
+    needed = interval_mask(start, end)
+
+    try:
+        with transaction.atomic():
+            profile = lock_instructor(instructor.pk, 'availability_bitmap', 'price_per_hour')
+            if profile is None:
+                return [], [{'date': day, 'reason': NO_PROFILE} for day in dates]
+            profile_id, bitmap, price_per_hour = profile
+            week = decode_bitmap(bitmap)
+            exceptions = availability_exceptions([profile_id], dates[0], dates[-1]) if dates else {}
+
+            blocked = defaultdict(int)
+            for lesson_date, booked_start, booked_end in Booking.objects.filter(
+                instructor=instructor,
+                lesson_date__in=dates,
+                status__in=ACTIVE_STATUSES
+            ).values_list('lesson_date', 'start_time', 'end_time'):
+                blocked[lesson_date] |= interval_mask(to_minutes(booked_start), to_minutes(booked_end))
+            for lesson_date, held_start, held_end in active_holds().filter(
+                instructor=instructor,
+                lesson_date__in=dates
+            ).exclude(learner=learner).values_list('lesson_date', 'start_time', 'end_time'):
+                blocked[lesson_date] |= interval_mask(to_minutes(held_start), to_minutes(held_end))
+
+            free_dates = []
+            conflicts = []
+            for day in dates:
+                available = apply_exceptions(
+                    day_of_week_bitmap(week, day.weekday()), exceptions.get((profile_id, day), ())
+                )
+                if needed & available != needed:
+                    conflicts.append({'date': day, 'reason': 'Instructor is not available at the selected time.'})
+                elif needed & blocked[day]:
+                    conflicts.append({'date': day, 'reason': 'This time slot conflicts with an existing booking.'})
+                else:
+                    free_dates.append(day)
+
+            if conflicts and not allow_partial:
+                return [], conflicts
+
+            pricing = lesson_pricing(price_per_hour, start_time, end_time)
+            bookings = Booking.objects.bulk_create([
+                Booking(
+                    instructor=instructor,
+                    learner=learner,
+                    lesson_date=day,
+                    start_time=start_time,
+                    end_time=end_time,
+                    **pricing,
+                    **fields
+                )
+                for day in free_dates
+            ])
+            return bookings, conflicts
+    except IntegrityError as e:
+        if is_overlap_violation(e):
+            raise BookingConflict()
+        raise
@@ -3,24 +3,74 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from django.db import transaction
 from django.db.models import Q
+from collections import defaultdict
 from datetime import datetime, timedelta
 import calendar
+import json
+import logging
 
-from .models import User, InstructorProfile, InstructorAvailability, Booking, Payment
+from .models import (
+    User, InstructorProfile, InstructorAvailability, AvailabilityException, Booking, Payment, SlotHold,
+    WaitlistEntry
+)
 from .serializers import (
     BookingSerializer, 
     BookingCreateSerializer, 
     PaymentSerializer,
-    AvailabilityCheckSerializer
+    AvailabilityCheckSerializer,
+    AvailabilityRangeSerializer,
+    SlotHoldSerializer,
+    HoldConfirmSerializer,
+    BookingSeriesSerializer,
+    WaitlistEntrySerializer
+)
+from .availability_bitmap import (
+    apply_exceptions, bitmap_intervals, day_of_week_bitmap, decode_bitmap, free_intervals, interval_mask
+)
+from .booking_service import (
+    BOOKING_CONFLICT, BookingConflict, HoldExpired, active_holds, availability_exceptions, blocked_bitmap,
+    confirm_hold, create_booking_series, day_availability, lesson_pricing
 )
+from .slot_engine import daily_free_slots, date_range, format_slots, free_slots, to_minutes
+from .waitlist import offer_cancelled_booking, offer_taken
+
+logger = logging.getLogger(__name__)
+
+
+def is_conflict(errors):
+    """
+    Whether serializer errors report a clash with an existing booking
+    """
+    return any(
+        getattr(error, 'code', None) == BOOKING_CONFLICT
+        for error in errors.get('non_field_errors', [])
+    )
+
+
+def offer_freed_slot(booking):
+    """
+    Offer a cancelled booking's slot to the waitlist, logging rather than raising errors
+    """
+    try:
+        offer_cancelled_booking(booking)
+    except Exception:
+        logger.exception(f"Couldn't offer the slot from cancelled booking {booking.pk} to the waitlist")
 
 
 class CheckAvailabilityView(APIView):
     """
     Check instructor availability for a specific date
+    
+    Returns every free lesson of `lesson_minutes` (60, 90 or 120) with start
+    times `granularity` (15, 30 or 60) minutes apart, using one query for the
+    instructor (with their weekly availability bitmap) and one each for the
+    day's availability exceptions, bookings and slot holds. Slots held by
+    other learners are hidden.
     """
     permission_classes = [IsAuthenticated]
     
@@ -31,27 +81,22 @@ class CheckAvailabilityView(APIView):
         
         instructor_id = serializer.validated_data['instructor_id']
         date = serializer.validated_data['date']
+        lesson_minutes = serializer.validated_data['lesson_minutes']
+        granularity = serializer.validated_data['granularity']
         
         try:
-            instructor = User.objects.get(id=instructor_id, user_type='instructor')
-            instructor_profile = InstructorProfile.objects.get(user=instructor, is_active=True)
-        except (User.DoesNotExist, InstructorProfile.DoesNotExist):
+            instructor_profile = InstructorProfile.objects.select_related('user').get(
+                user_id=instructor_id, user__user_type='instructor', is_active=True
+            )
+        except InstructorProfile.DoesNotExist:
             return Response(
                 {"error": "Instructor not found or not active"}, 
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        # Get the day of week (0=Monday, 6=Sunday)
-        day_of_week = date.weekday()
-        
-        # Get instructor's availability for this day
-        availability_slots = InstructorAvailability.objects.filter(
-            instructor_profile=instructor_profile,
-            day_of_week=day_of_week,
-            is_available=True
-        ).order_by('start_time')
-        
-        if not availability_slots.exists():
+        # Get instructor's availability for this date from the weekly bitmap and any exceptions
+        available = day_availability(instructor_profile.pk, instructor_profile.weekly_availability(), date)
+        if not available:
             return Response({
                 "instructor_id": instructor_id,
                 "date": date,
@@ -59,51 +104,132 @@ class CheckAvailabilityView(APIView):
                 "message": "No availability for this date"
             })
         
-        # Get existing bookings for this date
-        existing_bookings = Booking.objects.filter(
-            instructor=instructor,
-            lesson_date=date,
-            status__in=['pending', 'confirmed']
-        )
+        # Get existing bookings and other learners' holds for this date
+        booked = blocked_bitmap(instructor_id, date, learner_id=request.user.pk)
         
-        # Generate available time slots
-        available_slots = []
-        for slot in availability_slots:
-            current_time = slot.start_time
-            while current_time < slot.end_time:
-                # Check if this time slot conflicts with existing bookings
-                end_time = (datetime.combine(datetime.min, current_time) + 
-                           timedelta(hours=1)).time()
-                
-                # Ensure we don't exceed the availability slot
-                if end_time > slot.end_time:
-                    end_time = slot.end_time
-                
-                # Check for conflicts
-                conflict = existing_bookings.filter(
-                    Q(start_time__lt=end_time) & Q(end_time__gt=current_time)
-                ).exists()
-                
-                if not conflict:
-                    available_slots.append({
-                        "start_time": current_time.strftime("%H:%M"),
-                        "end_time": end_time.strftime("%H:%M"),
-                        "duration": "1 hour"
-                    })
-                
-                # Move to next hour
-                current_time = (datetime.combine(datetime.min, current_time) + 
-                              timedelta(hours=1)).time()
+        # Generate available time slots in memory
+        slots = free_slots(
+            free_intervals(available, booked),
+            (),
+            lesson_minutes=lesson_minutes,
+            granularity=granularity
+        )
+        available_slots = format_slots(slots, lesson_minutes)
         
         return Response({
             "instructor_id": instructor_id,
-            "instructor_name": instructor.full_name,
+            "instructor_name": instructor_profile.user.full_name,
             "date": date,
+            "lesson_minutes": lesson_minutes,
+            "granularity": granularity,
             "available_slots": available_slots,
             "total_slots": len(available_slots)
         })
 
 
+class AvailabilityRangeView(APIView):
+    """
+    Check availability for several instructors over a date range
+    
+    Loads the instructors with their weekly availability bitmaps, their
+    availability exceptions and bookings in the range and other learners'
+    slot holds with one query each, then computes every day's free slots in
+    memory.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        serializer = AvailabilityRangeSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        instructor_ids = serializer.validated_data['instructor_ids']
+        start_date = serializer.validated_data['start_date']
+        end_date = serializer.validated_data['end_date']
+        lesson_minutes = serializer.validated_data['lesson_minutes']
+        granularity = serializer.validated_data['granularity']
+        
+        names = {}
+        profile_ids = {}
+        weeks = {}
+        windows = {}
+        for instructor_id, profile_id, full_name, bitmap in InstructorProfile.objects.filter(
+            user_id__in=instructor_ids,
+            user__user_type='instructor',
+            is_active=True
+        ).values_list('user_id', 'pk', 'user__full_name', 'availability_bitmap'):
+            week = decode_bitmap(bitmap)
+            names[instructor_id] = full_name
+            profile_ids[instructor_id] = profile_id
+            weeks[instructor_id] = week
+            windows[instructor_id] = {
+                day_of_week: free_intervals(day_of_week_bitmap(week, day_of_week)) for day_of_week in range(7)
+            }
+        
+        # Dates with exceptions get their own windows
+        exception_windows = defaultdict(dict)
+        instructor_by_profile = {profile_id: instructor_id for instructor_id, profile_id in profile_ids.items()}
+        for (profile_id, day), exceptions in availability_exceptions(
+            instructor_by_profile, start_date, end_date
+        ).items():
+            instructor_id = instructor_by_profile[profile_id]
+            available = apply_exceptions(day_of_week_bitmap(weeks[instructor_id], day.weekday()), exceptions)
+            exception_windows[instructor_id][day] = free_intervals(available)
+        
+        booked = defaultdict(lambda: defaultdict(int))
+        for instructor_id, lesson_date, start, end in Booking.objects.filter(
+            instructor_id__in=names,
+            lesson_date__range=[start_date, end_date],
+            status__in=['pending', 'confirmed']
+        ).values_list('instructor_id', 'lesson_date', 'start_time', 'end_time'):
+            booked[instructor_id][lesson_date] |= interval_mask(to_minutes(start), to_minutes(end))
+        
+        for instructor_id, lesson_date, start, end in active_holds().filter(
+            instructor_id__in=names,
+            lesson_date__range=[start_date, end_date]
+        ).exclude(learner=request.user).values_list('instructor_id', 'lesson_date', 'start_time', 'end_time'):
+            booked[instructor_id][lesson_date] |= interval_mask(to_minutes(start), to_minutes(end))
+        
+        dates = date_range(start_date, end_date)
+        instructors = []
+        for instructor_id in instructor_ids:
+            if instructor_id not in names:
+                continue
+            
+            # Unbooked days share one slot list per weekday, so format each list once
+            formatted = {}
+            days = []
+            total_slots = 0
+            busy = {day: bitmap_intervals(bitmap) for day, bitmap in booked[instructor_id].items()}
+            for day, slots in daily_free_slots(
+                windows[instructor_id], busy, dates, lesson_minutes, granularity, exception_windows[instructor_id]
+            ).items():
+                if id(slots) not in formatted:
+                    formatted[id(slots)] = format_slots(slots, lesson_minutes)
+                days.append({
+                    "date": day.strftime('%Y-%m-%d'),
+                    "available_slots": formatted[id(slots)],
+                    "total_slots": len(slots)
+                })
+                total_slots += len(slots)
+            
+            instructors.append({
+                "instructor_id": instructor_id,
+                "instructor_name": names[instructor_id],
+                "days": days,
+                "total_slots": total_slots
+            })
+        
+        return Response({
+            "start_date": start_date.strftime('%Y-%m-%d'),
+            "end_date": end_date.strftime('%Y-%m-%d'),
+            "lesson_minutes": lesson_minutes,
+            "granularity": granularity,
+            "instructors": instructors,
+            "not_found": [instructor_id for instructor_id in instructor_ids if instructor_id not in names]
+        })
+
+
 class CreateBookingView(APIView):
     """
     Create a new booking
@@ -124,6 +250,8 @@ class CreateBookingView(APIView):
         )
         
         if not serializer.is_valid():
+            if is_conflict(serializer.errors):
+                return Response(serializer.errors, status=status.HTTP_409_CONFLICT)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
         try:
@@ -134,6 +262,11 @@ class CreateBookingView(APIView):
                 response_serializer.data, 
                 status=status.HTTP_201_CREATED
             )
+        except BookingConflict as e:
+            return Response(
+                {"error": e.message}, 
+                status=status.HTTP_409_CONFLICT
+            )
         except Exception as e:
             return Response(
                 {"error": str(e)}, 
@@ -141,6 +274,180 @@ class CreateBookingView(APIView):
             )
 
 
+class CreateBookingSeriesView(APIView):
+    """
+    Book the same lesson time every week (or every few weeks) in one request
+    
+    The whole series is checked against availability, bookings and holds
+    loaded in one query each and inserted with a single bulk insert. Dates
+    that can't be booked are reported individually; unless allow_partial is
+    set, any conflict books nothing and returns 409.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        if request.user.user_type != 'learner':
+            return Response(
+                {"error": "Only learners can create bookings"}, 
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        serializer = BookingSeriesSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        data = dict(serializer.validated_data)
+        dates = serializer.lesson_dates()
+        for name in ('start_date', 'occurrences', 'interval_weeks'):
+            data.pop(name)
+        
+        try:
+            bookings, conflicts = create_booking_series(data.pop('instructor'), request.user, dates, **data)
+        except BookingConflict as e:
+            return Response({"error": e.message}, status=status.HTTP_409_CONFLICT)
+        
+        conflicts = [
+            {"date": conflict['date'].strftime('%Y-%m-%d'), "reason": conflict['reason']}
+            for conflict in conflicts
+        ]
+        if not bookings:
+            return Response({
+                "error": "None of the lessons in this series could be booked",
+                "conflicts": conflicts
+            }, status=status.HTTP_409_CONFLICT)
+        
+        return Response({
+            "message": f"{len(bookings)} of {len(dates)} lessons booked",
+            "bookings": BookingSerializer(bookings, many=True).data,
+            "conflicts": conflicts
+        }, status=status.HTTP_201_CREATED)
+
+
+class SlotHoldView(APIView):
+    """
+    Hold a slot for a few minutes while the learner completes their booking
+    
+    Only one learner can hold a slot, so when many learners go for the same
+    slot the rest get a 409 straight away. Holds expire after
+    SLOT_HOLD_MINUTES unless confirmed.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        if request.user.user_type != 'learner':
+            return Response(
+                {"error": "Only learners can hold slots"}, 
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        serializer = SlotHoldSerializer(data=request.data, context={'request': request})
+        if not serializer.is_valid():
+            if is_conflict(serializer.errors):
+                return Response(serializer.errors, status=status.HTTP_409_CONFLICT)
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            serializer.save()
+        except BookingConflict as e:
+            return Response({"error": e.message}, status=status.HTTP_409_CONFLICT)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class SlotHoldDetailView(APIView):
+    """
+    Release a slot hold
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def delete(self, request, hold_id):
+        hold = get_object_or_404(SlotHold, id=hold_id, learner=request.user)
+        hold.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class ConfirmHoldView(APIView):
+    """
+    Confirm a slot hold into a booking
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request, hold_id):
+        hold = get_object_or_404(SlotHold, id=hold_id, learner=request.user)
+        
+        serializer = HoldConfirmSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        instructor_profile = get_object_or_404(InstructorProfile, user_id=hold.instructor_id)
+        
+        try:
+            with transaction.atomic():
+                booking = confirm_hold(
+                    hold,
+                    **lesson_pricing(instructor_profile.price_per_hour, hold.start_time, hold.end_time),
+                    **serializer.validated_data
+                )
+                offer_taken(booking)
+        except HoldExpired as e:
+            return Response({"error": e.message}, status=status.HTTP_410_GONE)
+        except BookingConflict as e:
+            return Response({"error": e.message}, status=status.HTTP_409_CONFLICT)
+        
+        return Response(BookingSerializer(booking).data, status=status.HTTP_201_CREATED)
+
+
+class WaitlistView(APIView):
+    """
+    Join an instructor's waitlist, or list the learner's waitlist entries
+    
+    When a booking with the instructor is cancelled, the slot is offered to
+    the first waiting learner it suits as a slot hold (see waitlist.py), which
+    shows up here with its hold id and expiry. Confirm it through
+    booking/hold/<hold>/confirm/.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        entries = WaitlistEntry.objects.filter(
+            learner=request.user,
+            status__in=['waiting', 'offered']
+        ).select_related('instructor', 'hold')
+        return Response(WaitlistEntrySerializer(entries, many=True).data)
+    
+    def post(self, request):
+        if request.user.user_type != 'learner':
+            return Response(
+                {"error": "Only learners can join a waitlist"}, 
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        serializer = WaitlistEntrySerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        serializer.save(learner=request.user)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class WaitlistDetailView(APIView):
+    """
+    Leave a waitlist, releasing any slot on offer
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def delete(self, request, entry_id):
+        entry = get_object_or_404(
+            WaitlistEntry, id=entry_id, learner=request.user, status__in=['waiting', 'offered']
+        )
+        hold = entry.hold
+        entry.status = 'cancelled'
+        entry.hold = None
+        entry.save()
+        if hold is not None:
+            hold.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
 class MyBookingsView(APIView):
     """
     Get user's bookings (both as learner and instructor)
@@ -237,22 +544,32 @@ class CancelBookingView(APIView):
             )
         
         # Check if it's too close to the lesson time (e.g., within 24 hours)
-        lesson_datetime = datetime.combine(booking.lesson_date, booking.start_time)
+        lesson_datetime = timezone.make_aware(datetime.combine(booking.lesson_date, booking.start_time))
         if lesson_datetime - timezone.now() < timedelta(hours=24):
             return Response(
                 {"error": "Bookings cannot be cancelled within 24 hours of the lesson"}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Cancel the booking
-        booking.status = 'cancelled'
-        booking.cancelled_at = timezone.now()
-        booking.save()
-        
-        # If there's a payment, mark it as refunded
-        if booking.payment and booking.payment.status == 'completed':
-            booking.payment.status = 'refunded'
-            booking.payment.save()
+        with transaction.atomic():
+            # Cancel the booking, unless another request got there first
+            booking = Booking.objects.select_for_update().get(pk=booking.pk)
+            if booking.status not in ['pending', 'confirmed']:
+                return Response(
+                    {"error": f"Booking with status '{booking.status}' cannot be cancelled"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            booking.status = 'cancelled'
+            booking.cancelled_at = timezone.now()
+            booking.save()
+            
+            # If there's a payment, mark it as refunded
+            if booking.payment and booking.payment.status == 'completed':
+                booking.payment.status = 'refunded'
+                booking.payment.save()
+            
+            # Offer the freed slot to the next learner on the waitlist once the cancellation is saved
+            transaction.on_commit(lambda: offer_freed_slot(booking))
         
         serializer = BookingSerializer(booking)
         return Response({
@@ -264,88 +581,140 @@ class CancelBookingView(APIView):
 class InstructorBookingsView(APIView):
     """
     Get all bookings for a specific instructor (for calendar view)
+    
+    The calendar is built from one query each for availability, availability
+    exceptions and bookings.
+    Ranges are limited to MAX_DAYS, and ranges longer than STREAM_AFTER_DAYS
+    are streamed one day at a time instead of being built up in memory.
     """
     permission_classes = [IsAuthenticated]
     
+    MAX_DAYS = 366
+    STREAM_AFTER_DAYS = 62
+    
     def get(self, request, instructor_id):
         # Verify the instructor exists and is active
         try:
-            instructor = User.objects.get(id=instructor_id, user_type='instructor')
-            instructor_profile = InstructorProfile.objects.get(user=instructor, is_active=True)
-        except (User.DoesNotExist, InstructorProfile.DoesNotExist):
+            instructor_profile = InstructorProfile.objects.select_related('user').get(
+                user_id=instructor_id, user__user_type='instructor', is_active=True
+            )
+        except InstructorProfile.DoesNotExist:
             return Response(
                 {"error": "Instructor not found or not active"}, 
                 status=status.HTTP_404_NOT_FOUND
             )
+        instructor = instructor_profile.user
         
         # Get date range from query parameters
         start_date = request.query_params.get('start_date')
         end_date = request.query_params.get('end_date')
         
-        # Default to next 30 days if no dates specified
-        if not start_date:
-            start_date = timezone.now().date()
-        else:
-            start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
+        try:
+            # Default to next 30 days if no dates specified
+            if not start_date:
+                start_date = timezone.now().date()
+            else:
+                start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
+            
+            if not end_date:
+                end_date = start_date + timedelta(days=30)
+            else:
+                end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
+        except ValueError:
+            return Response(
+                {"error": "Dates must be in YYYY-MM-DD format"}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        days = (end_date - start_date).days + 1
+        if days < 1:
+            return Response(
+                {"error": "end_date must not be before start_date"}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if days > self.MAX_DAYS:
+            return Response(
+                {"error": f"Date range cannot be longer than {self.MAX_DAYS} days"}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Get instructor availability, grouped by weekday
+        availability = defaultdict(list)
+        for slot in InstructorAvailability.objects.filter(
+            instructor_profile=instructor_profile
+        ).order_by('day_of_week', 'start_time'):
+            availability[slot.day_of_week].append({
+                "start_time": slot.start_time.strftime('%H:%M'),
+                "end_time": slot.end_time.strftime('%H:%M'),
+                "is_available": slot.is_available
+            })
         
-        if not end_date:
-            end_date = start_date + timedelta(days=30)
-        else:
-            end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
+        # Get availability exceptions in the date range, grouped by date
+        exceptions = defaultdict(list)
+        for exception in AvailabilityException.objects.filter(
+            instructor_profile=instructor_profile,
+            date__range=[start_date, end_date]
+        ).order_by('date', 'start_time'):
+            exceptions[exception.date].append({
+                "id": exception.id,
+                "start_time": exception.start_time.strftime('%H:%M') if exception.start_time else None,
+                "end_time": exception.end_time.strftime('%H:%M') if exception.end_time else None,
+                "is_available": exception.is_available,
+                "reason": exception.reason
+            })
         
-        # Get bookings in the date range
-        bookings = Booking.objects.filter(
+        # Get bookings in the date range, grouped by date
+        bookings = defaultdict(list)
+        for booking in Booking.objects.filter(
             instructor=instructor,
             lesson_date__range=[start_date, end_date],
             status__in=['pending', 'confirmed']
-        ).select_related('learner', 'payment').order_by('lesson_date', 'start_time')
-        
-        # Get instructor availability for the date range
-        availability = InstructorAvailability.objects.filter(
-            instructor_profile=instructor_profile
-        ).order_by('day_of_week', 'start_time')
+        ).select_related('learner').order_by('lesson_date', 'start_time'):
+            bookings[booking.lesson_date].append({
+                "id": booking.id,
+                "start_time": booking.start_time.strftime('%H:%M'),
+                "end_time": booking.end_time.strftime('%H:%M'),
+                "learner_name": booking.learner.full_name,
+                "status": booking.status,
+                "lesson_type": booking.lesson_type
+            })
         
         # Format response for calendar
-        calendar_data = []
-        current_date = start_date
-        
-        while current_date <= end_date:
-            day_of_week = current_date.weekday()
-            day_availability = availability.filter(day_of_week=day_of_week)
-            
-            day_bookings = bookings.filter(lesson_date=current_date)
-            
-            calendar_data.append({
+        calendar_data = (
+            {
                 "date": current_date.strftime('%Y-%m-%d'),
-                "day_name": calendar.day_name[day_of_week],
-                "availability": [
-                    {
-                        "start_time": slot.start_time.strftime('%H:%M'),
-                        "end_time": slot.end_time.strftime('%H:%M'),
-                        "is_available": slot.is_available
-                    } for slot in day_availability
-                ],
-                "bookings": [
-                    {
-                        "id": booking.id,
-                        "start_time": booking.start_time.strftime('%H:%M'),
-                        "end_time": booking.end_time.strftime('%H:%M'),
-                        "learner_name": booking.learner.full_name,
-                        "status": booking.status,
-                        "lesson_type": booking.lesson_type
-                    } for booking in day_bookings
-                ]
-            })
-            
-            current_date += timedelta(days=1)
+                "day_name": calendar.day_name[current_date.weekday()],
+                "availability": availability[current_date.weekday()],
+                "exceptions": exceptions[current_date],
+                "bookings": bookings[current_date]
+            }
+            for current_date in date_range(start_date, end_date)
+        )
         
-        return Response({
+        result = {
             "instructor_id": instructor_id,
             "instructor_name": instructor.full_name,
             "start_date": start_date.strftime('%Y-%m-%d'),
-            "end_date": end_date.strftime('%Y-%m-%d'),
-            "calendar_data": calendar_data
-        })
+            "end_date": end_date.strftime('%Y-%m-%d')
+        }
+        
+        if days > self.STREAM_AFTER_DAYS:
+            return StreamingHttpResponse(
+                self._stream_calendar(result, calendar_data),
+                content_type='application/json'
+            )
+        
+        result["calendar_data"] = list(calendar_data)
+        return Response(result)
+    
+    def _stream_calendar(self, result, calendar_data):
+        """
+        Yield the calendar response as JSON, one day at a time
+        """
+        yield json.dumps(result)[:-1] + ', "calendar_data": ['
+        for index, day in enumerate(calendar_data):
+            yield (', ' if index else '') + json.dumps(day)
+        yield ']}'
 
 
 @api_view(['POST'])
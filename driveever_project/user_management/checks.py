@@ -0,0 +1,42 @@
+"""
+System checks for DriveEver
+Run by manage.py check, runserver and migrate, and at deploy with --deploy
+"""
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+# Backends whose contents other worker processes can't see
+PROCESS_LOCAL_CACHES = (LocMemCache, DummyCache)
+
+
+@checks.register(checks.Tags.caches)
+def check_search_generation_cache(app_configs, **kwargs):
+    """
+    The search cache's per-outcode generations must be shared by every worker
+
+    Otherwise an invalidation only reaches the process that made it, and the
+    other workers keep serving stale results until they expire.
+    """
+    from django.core.cache import caches
+    from django.core.cache.backends.base import InvalidCacheBackendError
+
+    alias = getattr(settings, 'SEARCH_CACHE', {}).get('GENERATION_CACHE_ALIAS', 'default')
+    try:
+        cache = caches[alias]
+    except InvalidCacheBackendError:
+        return [checks.Error(
+            f"SEARCH_CACHE['GENERATION_CACHE_ALIAS'] refers to '{alias}', which isn't in CACHES.",
+            id='user_management.E001',
+        )]
+    if isinstance(cache, PROCESS_LOCAL_CACHES):
+        return [checks.Warning(
+            f"Search cache generations are stored in the '{alias}' cache, "
+            f"which is local to each process ({type(cache).__name__}).",
+            hint="Point SEARCH_CACHE['GENERATION_CACHE_ALIAS'] at a cache all workers share, "
+                 "such as Redis, or search results will go stale in other workers.",
+            id='user_management.W001',
+        )]
+    return []
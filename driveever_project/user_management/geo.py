@@ -0,0 +1,189 @@
+"""
+Geospatial helpers for DriveEver
+Geohash encoding, neighbour cells, bounding boxes and great-circle distances
+used for radius search without PostGIS
+"""
+
+import math
+from typing import List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy is optional, the pure Python path is slower
+    np = None
+
+EARTH_RADIUS_KM = 6371
+KM_PER_DEGREE = 111.32
+
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 9
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    Great-circle distance between two points in kilometres
+    """
+    lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = math.sin(dlat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def haversine_matrix(
+    lats1: Sequence[float],
+    lons1: Sequence[float],
+    lats2: Sequence[float],
+    lons2: Sequence[float]
+):
+    """
+    Great-circle distances in kilometres between every pair of two point sets
+
+    Uses NumPy broadcasting when available, so thousands of points are
+    handled in a few array operations rather than a Python loop per pair.
+
+    Returns:
+        An (len(lats1), len(lats2)) array (a list of lists without NumPy)
+    """
+    if np is None:
+        return [
+            [haversine_km(lat1, lon1, lat2, lon2) for lat2, lon2 in zip(lats2, lons2)]
+            for lat1, lon1 in zip(lats1, lons1)
+        ]
+
+    lat1 = np.radians(np.asarray(lats1, dtype=float))[:, np.newaxis]
+    lon1 = np.radians(np.asarray(lons1, dtype=float))[:, np.newaxis]
+    lat2 = np.radians(np.asarray(lats2, dtype=float))[np.newaxis, :]
+    lon2 = np.radians(np.asarray(lons2, dtype=float))[np.newaxis, :]
+
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def place_matrix(
+    distances,
+    rows: Sequence[int],
+    columns: Sequence[int],
+    shape: Tuple[int, int],
+    scale: float = 1.0,
+    digits: int = 2
+) -> List[List[Optional[float]]]:
+    """
+    Scale and round a haversine_matrix result into a larger matrix as lists
+
+    Row i of `distances` goes to row rows[i] and column j to column
+    columns[j]; every other cell is None. With NumPy this is a handful of
+    array operations whatever the size.
+    """
+    if np is None:
+        matrix = [[None] * shape[1] for _ in range(shape[0])]
+        for row, i in enumerate(rows):
+            for column, j in enumerate(columns):
+                matrix[i][j] = round(distances[row][column] * scale, digits)
+        return matrix
+
+    rounded = np.round(np.asarray(distances, dtype=float) * scale, digits)
+    if (len(rows), len(columns)) == shape:
+        return rounded.tolist()
+    matrix = np.full(shape, None, dtype=object)
+    matrix[np.ix_(rows, columns)] = rounded
+    return matrix.tolist()
+
+
+def haversine_distances(latitude: float, longitude: float, lats: Sequence[float], lons: Sequence[float]) -> List[float]:
+    """
+    Great-circle distances in kilometres from one point to many
+    """
+    if not len(lats):
+        return []
+    distances = haversine_matrix([latitude], [longitude], lats, lons)[0]
+    return [float(d) for d in distances]
+
+
+def geohash_encode(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> str:
+    """
+    Encode a position as a geohash string of the given length
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(chars) < precision:
+        if even:
+            mid = (lon_range[0] + lon_range[1]) / 2
+            if longitude >= mid:
+                bits = (bits << 1) | 1
+                lon_range[0] = mid
+            else:
+                bits <<= 1
+                lon_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if latitude >= mid:
+                bits = (bits << 1) | 1
+                lat_range[0] = mid
+            else:
+                bits <<= 1
+                lat_range[1] = mid
+        even = not even
+        bit_count += 1
+
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+
+    return ''.join(chars)
+
+
+def geohash_cell_size(precision: int) -> Tuple[float, float]:
+    """
+    Return the (height, width) of a geohash cell in degrees
+    """
+    total_bits = precision * 5
+    lon_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (2 ** lat_bits), 360.0 / (2 ** lon_bits)
+
+
+def geohash_precision_for_radius(radius_km: float, latitude: float) -> int:
+    """
+    Longest geohash prefix whose cells are at least radius_km across
+
+    A circle of that radius then always fits inside the 3x3 block of cells
+    around its centre, so the block can be used as a prefix filter.
+    """
+    cos_lat = max(math.cos(math.radians(latitude)), 0.01)
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = geohash_cell_size(precision)
+        if min(height * KM_PER_DEGREE, width * KM_PER_DEGREE * cos_lat) >= radius_km:
+            return precision
+    return 1
+
+
+def geohash_neighbours(latitude: float, longitude: float, precision: int) -> List[str]:
+    """
+    Return the geohash of the cell containing a point plus its eight neighbours
+    """
+    height, width = geohash_cell_size(precision)
+    cells = []
+    for dlat in (-height, 0, height):
+        for dlon in (-width, 0, width):
+            lat = min(max(latitude + dlat, -90.0), 90.0)
+            lon = (longitude + dlon + 180.0) % 360.0 - 180.0
+            cell = geohash_encode(lat, lon, precision)
+            if cell not in cells:
+                cells.append(cell)
+    return cells
+
+
+def bounding_box(latitude: float, longitude: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """
+    Return (min_lat, max_lat, min_lon, max_lon) enclosing a circle
+    """
+    dlat = radius_km / KM_PER_DEGREE
+    dlon = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01))
+    return latitude - dlat, latitude + dlat, longitude - dlon, longitude + dlon
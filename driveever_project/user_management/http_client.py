@@ -0,0 +1,575 @@
+"""
+Outbound HTTP client for DriveEver integrations
+One pooled, keep-alive session shared by every integration (Postcodes.io,
+DVLA), with separate connect and read timeouts, jittered retries for
+idempotent calls and per-host latency and error metrics
+
+Each upstream host also gets a circuit breaker and a bulkhead (a cap on
+concurrent requests), so a slow or failing upstream costs callers a fast
+UpstreamUnavailable instead of tying up every worker for a full timeout.
+
+AsyncHTTPClient offers the same for async views under ASGI.
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Dict, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - httpx is optional, requests are then sent from worker threads
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+Timeout = Union[float, Tuple[float, float]]
+
+# Methods that can safely be sent twice
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+
+# Responses worth retrying: the upstream is overloaded or briefly unavailable
+RETRY_STATUSES = frozenset([429, 502, 503, 504])
+
+
+class UpstreamUnavailable(requests.RequestException):
+    """Raised without calling the upstream when its circuit is open or its bulkhead is full"""
+
+    def __init__(self, host: str, reason: str, retry_after: Optional[float] = None):
+        super().__init__(f'{host} unavailable: {reason}')
+        self.host = host
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Closed/open/half-open circuit breaker for one upstream
+
+    While closed, the outcome of the last `window` calls is kept; once at
+    least `min_calls` have been seen and `failure_rate` of them failed, the
+    circuit opens. A call fails if it raises, returns 429 or 5xx, or takes
+    longer than `slow_call_seconds`. After `open_seconds` one trial call is
+    let through (half-open): success closes the circuit, failure reopens it.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(
+        self,
+        window: int = 20,
+        min_calls: int = 5,
+        failure_rate: float = 0.5,
+        slow_call_seconds: float = 5.0,
+        open_seconds: float = 30.0
+    ):
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._outcomes = deque(maxlen=window)
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead; a True in half-open state claims the trial call"""
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.open_seconds:
+                    return False
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN:
+                if self._trial_in_flight:
+                    return False
+                self._trial_in_flight = True
+            return True
+
+    def is_failure(self, status: Optional[int], latency: float) -> bool:
+        return status is None or status == 429 or status >= 500 or latency >= self.slow_call_seconds
+
+    def record(self, failed: bool) -> None:
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._trial_in_flight = False
+                if failed:
+                    self._open()
+                else:
+                    self.state = self.CLOSED
+                    self._outcomes.clear()
+            elif self.state == self.CLOSED:
+                self._outcomes.append(failed)
+                if (
+                    len(self._outcomes) >= self.min_calls
+                    and sum(self._outcomes) >= self.failure_rate * len(self._outcomes)
+                ):
+                    self._open()
+
+    def release(self) -> None:
+        """
+        Give back a half-open trial call that ended without record() being called
+
+        Callers release in a finally after every allowed call. Once record()
+        has run the circuit is open or closed, so this is a no-op then.
+        """
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._trial_in_flight = False
+
+    def _open(self) -> None:
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self.times_opened += 1
+        self._outcomes.clear()
+
+    def retry_after(self) -> float:
+        """Seconds until the next trial call is allowed"""
+        with self._lock:
+            if self.state != self.OPEN:
+                return 0.0
+            return max(0.0, self.open_seconds - (time.monotonic() - self.opened_at))
+
+    def as_dict(self) -> Dict:
+        with self._lock:
+            failures = sum(self._outcomes)
+            return {
+                'state': self.state,
+                'recent_calls': len(self._outcomes),
+                'recent_failures': failures,
+                'times_opened': self.times_opened,
+            }
+
+
+class Bulkhead:
+    """
+    At most `max_concurrent` requests in flight to one upstream
+
+    A caller waits up to `wait` seconds for a free slot, then gives up, so
+    a slow upstream can't hold every worker thread.
+    """
+
+    def __init__(self, max_concurrent: int = 10, wait: float = 0.0):
+        self.max_concurrent = max_concurrent
+        self.wait = wait
+        self.in_flight = 0
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+
+    def acquire(self, wait: Optional[float] = None) -> bool:
+        """Take a slot, waiting up to `wait` (default: the configured wait) seconds"""
+        if not self._slots.acquire(timeout=self.wait if wait is None else wait):
+            return False
+        with self._lock:
+            self.in_flight += 1
+        return True
+
+    def release(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+
+class Upstream:
+    """The circuit breaker and bulkhead guarding one upstream host"""
+
+    def __init__(self, config: Dict):
+        self.breaker = CircuitBreaker(
+            window=config['BREAKER_WINDOW'],
+            min_calls=config['BREAKER_MIN_CALLS'],
+            failure_rate=config['BREAKER_FAILURE_RATE'],
+            slow_call_seconds=config['BREAKER_SLOW_CALL_SECONDS'],
+            open_seconds=config['BREAKER_OPEN_SECONDS']
+        )
+        self.bulkhead = Bulkhead(config['MAX_CONCURRENT'], config['BULKHEAD_WAIT'])
+
+
+class HostMetrics:
+    """Request, retry and error counts and latency for one upstream host"""
+
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.errors = 0
+        self.rejected = 0
+        self.statuses = {}
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def as_dict(self) -> Dict:
+        return {
+            'requests': self.requests,
+            'retries': self.retries,
+            'errors': self.errors,
+            'rejected': self.rejected,
+            'error_rate': round(self.errors / self.requests, 4) if self.requests else None,
+            'statuses': dict(self.statuses),
+            'avg_latency_ms': round(self.total_latency / self.requests * 1000, 1) if self.requests else None,
+            'max_latency_ms': round(self.max_latency * 1000, 1),
+        }
+
+
+class HTTPClient:
+    """
+    Pooled HTTP client shared by all outbound integrations
+
+    A single requests.Session whose adapter keeps one keep-alive connection
+    pool per host (up to POOL_CONNECTIONS hosts, POOL_MAXSIZE connections
+    each), so repeat calls to an upstream reuse TCP and TLS connections.
+
+    Idempotent requests are retried on connection errors, timeouts and
+    429/502/503/504 responses with full-jitter exponential backoff. Other
+    requests are sent once, unless the caller marks them idempotent (e.g. a
+    lookup sent as POST).
+
+    Every host has its own CircuitBreaker and Bulkhead, configured by the
+    BREAKER_* and MAX_CONCURRENT/BULKHEAD_WAIT settings and overridable per
+    host under HOSTS. When either refuses a call, UpstreamUnavailable is
+    raised straight away and callers fall back to cached or local data.
+    """
+
+    DEFAULTS = {
+        'POOL_CONNECTIONS': 10,
+        'POOL_MAXSIZE': 20,
+        'CONNECT_TIMEOUT': 3.05,
+        'READ_TIMEOUT': 10,
+        'RETRIES': 2,
+        'BACKOFF': 0.2,
+        'BACKOFF_MAX': 2.0,
+        'BREAKER_WINDOW': 20,
+        'BREAKER_MIN_CALLS': 5,
+        'BREAKER_FAILURE_RATE': 0.5,
+        'BREAKER_SLOW_CALL_SECONDS': 5.0,
+        'BREAKER_OPEN_SECONDS': 30,
+        'MAX_CONCURRENT': 10,
+        'BULKHEAD_WAIT': 0.0,
+        'HOSTS': {},
+    }
+
+    def __init__(self, config: Optional[Dict] = None):
+        config = {**self.DEFAULTS, **(config or {})}
+        self.config = config
+        self.connect_timeout = config['CONNECT_TIMEOUT']
+        self.read_timeout = config['READ_TIMEOUT']
+        self.retries = config['RETRIES']
+        self.backoff = config['BACKOFF']
+        self.backoff_max = config['BACKOFF_MAX']
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=config['POOL_CONNECTIONS'],
+            pool_maxsize=config['POOL_MAXSIZE'],
+            max_retries=0
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self._metrics = {}
+        self._upstreams = {}
+        self._lock = threading.Lock()
+
+    def upstream(self, host: str) -> Upstream:
+        """The breaker and bulkhead for a host, created on first use"""
+        with self._lock:
+            if host not in self._upstreams:
+                self._upstreams[host] = Upstream({**self.config, **self.config['HOSTS'].get(host, {})})
+            return self._upstreams[host]
+
+    def _timeout(self, timeout: Optional[Timeout]) -> Tuple[float, float]:
+        """(connect, read) timeouts; a single number only sets the read timeout"""
+        if timeout is None:
+            return self.connect_timeout, self.read_timeout
+        if isinstance(timeout, tuple):
+            return timeout
+        return self.connect_timeout, timeout
+
+    def max_call_seconds(self, timeout: Optional[Timeout] = None, retries: Optional[int] = None) -> float:
+        """
+        Longest an idempotent request() can take: every attempt connecting and
+        reading up to its timeouts, plus the longest backoff before each retry
+
+        Useful for sizing anything that must outlive a call, such as a lock
+        held while it runs.
+        """
+        connect, read = self._timeout(timeout)
+        retries = self.retries if retries is None else retries
+        return (connect + read) * (retries + 1) + self.backoff_max * retries
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff before retry number `attempt` (1-based)"""
+        return random.uniform(0, min(self.backoff_max, self.backoff * 2 ** (attempt - 1)))
+
+    def _record(self, host: str, latency: float, status: Optional[int] = None, retry: bool = False) -> None:
+        with self._lock:
+            metrics = self._metrics.setdefault(host, HostMetrics())
+            metrics.requests += 1
+            metrics.total_latency += latency
+            metrics.max_latency = max(metrics.max_latency, latency)
+            if status is None or status >= 500:
+                metrics.errors += 1
+            if status is not None:
+                metrics.statuses[status] = metrics.statuses.get(status, 0) + 1
+            if retry:
+                metrics.retries += 1
+
+    def _reject(self, host: str, reason: str, retry_after: Optional[float] = None) -> UpstreamUnavailable:
+        with self._lock:
+            self._metrics.setdefault(host, HostMetrics()).rejected += 1
+        logger.warning(f"Not calling {host}: {reason}")
+        return UpstreamUnavailable(host, reason, retry_after)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        timeout: Optional[Timeout] = None,
+        idempotent: Optional[bool] = None,
+        retries: Optional[int] = None,
+        **kwargs
+    ) -> requests.Response:
+        """
+        Send a request through the shared pools
+
+        Args:
+            method (str): HTTP method
+            url (str): Full URL
+            timeout: (connect, read) seconds, or just the read timeout
+            idempotent (bool): Whether the call is safe to retry; defaults to
+                True for GET, HEAD, OPTIONS, PUT and DELETE
+            retries (int): Override the configured number of retries
+            **kwargs: Passed on to requests (params, json, headers, ...)
+
+        Raises:
+            UpstreamUnavailable: When the host's circuit is open or its bulkhead is full
+            requests.RequestException: When the last attempt fails to connect or times out
+        """
+        method = method.upper()
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        attempts = 1 + ((self.retries if retries is None else retries) if idempotent else 0)
+        host = urlsplit(url).netloc
+        timeout = self._timeout(timeout)
+
+        upstream = self.upstream(host)
+        if not upstream.bulkhead.acquire():
+            raise self._reject(host, f'{upstream.bulkhead.max_concurrent} requests already in flight')
+        try:
+            for attempt in range(1, attempts + 1):
+                if attempt > 1:
+                    time.sleep(self._backoff(attempt - 1))
+                if not upstream.breaker.allow():
+                    raise self._reject(host, 'circuit open', upstream.breaker.retry_after())
+                retry = attempt > 1
+                started = time.monotonic()
+                try:
+                    try:
+                        response = self.session.request(method, url, timeout=timeout, **kwargs)
+                    except requests.RequestException as e:
+                        self._record(host, time.monotonic() - started, retry=retry)
+                        upstream.breaker.record(failed=True)
+                        if attempt == attempts or not isinstance(e, (requests.ConnectionError, requests.Timeout)):
+                            raise
+                        logger.info(f"Retrying {method} {host} after a connection error (attempt {attempt})")
+                        continue
+
+                    latency = time.monotonic() - started
+                    self._record(host, latency, response.status_code, retry=retry)
+                    upstream.breaker.record(upstream.breaker.is_failure(response.status_code, latency))
+                    if response.status_code in RETRY_STATUSES and attempt < attempts:
+                        logger.info(f"Retrying {method} {host} after HTTP {response.status_code} (attempt {attempt})")
+                        continue
+                    return response
+                finally:
+                    # Frees the trial call if this one raised something unexpected (a bug, a cancellation)
+                    upstream.breaker.release()
+        finally:
+            upstream.bulkhead.release()
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def bind(self, headers: Optional[Dict] = None, timeout: Optional[Timeout] = None) -> 'BoundClient':
+        """A view of this client with default headers and timeout for one integration"""
+        return BoundClient(self, headers or {}, timeout)
+
+    def stats(self) -> Dict:
+        """Per-host request, error and latency metrics, circuit state and requests in flight"""
+        with self._lock:
+            metrics = {host: host_metrics.as_dict() for host, host_metrics in self._metrics.items()}
+            upstreams = dict(self._upstreams)
+        for host, upstream in upstreams.items():
+            metrics.setdefault(host, HostMetrics().as_dict()).update({
+                'circuit': upstream.breaker.as_dict(),
+                'in_flight': upstream.bulkhead.in_flight,
+                'max_concurrent': upstream.bulkhead.max_concurrent,
+            })
+        return metrics
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._metrics.clear()
+
+    def reset_upstreams(self) -> None:
+        """Close every circuit and forget recent failures"""
+        with self._lock:
+            self._upstreams.clear()
+
+
+class BoundClient:
+    """
+    An integration's handle on the shared HTTPClient (or AsyncHTTPClient)
+
+    Adds the integration's headers (API keys, User-Agent) and default
+    timeout to every request while sharing the client's pools and metrics.
+    Bound to an AsyncHTTPClient, the methods return coroutines.
+    """
+
+    def __init__(self, client: HTTPClient, headers: Dict, timeout: Optional[Timeout] = None):
+        self.client = client
+        self.headers = headers
+        self.timeout = timeout
+
+    def request(self, method: str, url: str, **kwargs):
+        kwargs['headers'] = {**self.headers, **kwargs.get('headers', {})}
+        kwargs.setdefault('timeout', self.timeout)
+        return self.client.request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+
+class AsyncHTTPClient:
+    """
+    Async counterpart of HTTPClient for views served under ASGI
+
+    Shares the sync client's timeouts, retry policy, circuit breakers and
+    metrics. With httpx installed, requests are sent on the event loop from
+    one pooled httpx.AsyncClient per loop, and callers never wait for a
+    bulkhead slot. Without it, the sync client is run in a worker thread.
+
+    Transport errors are raised as requests exceptions, so callers handle
+    failures the same way for both clients.
+    """
+
+    def __init__(self, client: HTTPClient):
+        self.client = client
+        self._sessions = weakref.WeakKeyDictionary()
+
+    def _session(self):
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None:
+            config = self.client.config
+            session = httpx.AsyncClient(limits=httpx.Limits(
+                max_connections=config['POOL_CONNECTIONS'] * config['POOL_MAXSIZE'],
+                max_keepalive_connections=config['POOL_MAXSIZE']
+            ))
+            self._sessions[loop] = session
+        return session
+
+    async def _send(self, method: str, url: str, timeout: Tuple[float, float], **kwargs):
+        connect, read = timeout
+        try:
+            return await self._session().request(method, url, timeout=httpx.Timeout(read, connect=connect), **kwargs)
+        except httpx.TimeoutException as e:
+            raise requests.Timeout(str(e)) from e
+        except httpx.TransportError as e:
+            raise requests.ConnectionError(str(e)) from e
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        timeout: Optional[Timeout] = None,
+        idempotent: Optional[bool] = None,
+        retries: Optional[int] = None,
+        **kwargs
+    ):
+        """
+        Send a request through the shared pools; see HTTPClient.request
+
+        Returns:
+            httpx.Response, or requests.Response when httpx isn't installed
+        """
+        client = self.client
+        if httpx is None:
+            return await sync_to_async(client.request, thread_sensitive=False)(
+                method, url, timeout=timeout, idempotent=idempotent, retries=retries, **kwargs
+            )
+
+        method = method.upper()
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        attempts = 1 + ((client.retries if retries is None else retries) if idempotent else 0)
+        host = urlsplit(url).netloc
+        timeout = client._timeout(timeout)
+
+        upstream = client.upstream(host)
+        if not upstream.bulkhead.acquire(wait=0):
+            raise client._reject(host, f'{upstream.bulkhead.max_concurrent} requests already in flight')
+        try:
+            for attempt in range(1, attempts + 1):
+                if attempt > 1:
+                    await asyncio.sleep(client._backoff(attempt - 1))
+                if not upstream.breaker.allow():
+                    raise client._reject(host, 'circuit open', upstream.breaker.retry_after())
+                retry = attempt > 1
+                started = time.monotonic()
+                try:
+                    try:
+                        response = await self._send(method, url, timeout, **kwargs)
+                    except requests.RequestException as e:
+                        client._record(host, time.monotonic() - started, retry=retry)
+                        upstream.breaker.record(failed=True)
+                        if attempt == attempts or not isinstance(e, (requests.ConnectionError, requests.Timeout)):
+                            raise
+                        logger.info(f"Retrying {method} {host} after a connection error (attempt {attempt})")
+                        continue
+
+                    latency = time.monotonic() - started
+                    client._record(host, latency, response.status_code, retry=retry)
+                    upstream.breaker.record(upstream.breaker.is_failure(response.status_code, latency))
+                    if response.status_code in RETRY_STATUSES and attempt < attempts:
+                        logger.info(f"Retrying {method} {host} after HTTP {response.status_code} (attempt {attempt})")
+                        continue
+                    return response
+                finally:
+                    # Frees the trial call if this one raised something unexpected (a bug, a cancellation)
+                    upstream.breaker.release()
+        finally:
+            upstream.bulkhead.release()
+
+    async def get(self, url: str, **kwargs):
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url: str, **kwargs):
+        return await self.request('POST', url, **kwargs)
+
+    def bind(self, headers: Optional[Dict] = None, timeout: Optional[Timeout] = None) -> BoundClient:
+        """A view of this client with default headers and timeout for one integration"""
+        return BoundClient(self, headers or {}, timeout)
+
+
+http_client = HTTPClient(getattr(settings, 'OUTBOUND_HTTP', None))
+async_http_client = AsyncHTTPClient(http_client)
@@ -0,0 +1,113 @@
+"""
+Instructor search helpers for DriveEver
+Radius search over instructor service areas using a geohash prefix index,
+plus the opaque cursors used to page through search results
+"""
+
+import base64
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.db.models import Q, QuerySet
+
+from .geo import bounding_box, geohash_neighbours, geohash_precision_for_radius, haversine_distances
+
+
+class InvalidCursor(ValueError):
+    """Raised when a search cursor cannot be decoded"""
+
+
+def encode_cursor(position: Dict[str, Any]) -> str:
+    """Encode a search position as an opaque URL-safe cursor"""
+    payload = json.dumps(position, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str]) -> Dict[str, Any]:
+    """
+    Decode a cursor produced by encode_cursor
+
+    Returns an empty position for a missing cursor (the first page).
+    """
+    if not cursor:
+        return {}
+    try:
+        payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        position = json.loads(payload)
+    except (ValueError, TypeError):
+        raise InvalidCursor('Invalid cursor')
+    if not isinstance(position, dict):
+        raise InvalidCursor('Invalid cursor')
+    return position
+
+
+def cursor_key(position: Any, *types) -> Optional[tuple]:
+    """
+    Convert a stored sort key back to typed values, e.g. cursor_key(key, float, int)
+
+    Returns None if there is no stored key.
+    """
+    if position is None:
+        return None
+    if not isinstance(position, list) or len(position) != len(types):
+        raise InvalidCursor('Invalid cursor')
+    try:
+        return tuple(convert(value) for convert, value in zip(types, position))
+    except (TypeError, ValueError, ArithmeticError):
+        raise InvalidCursor('Invalid cursor')
+
+
+def instructor_distances(
+    queryset: QuerySet,
+    latitude: float,
+    longitude: float,
+    radius_km: float,
+    *fields: str
+) -> List[Tuple[float, Dict]]:
+    """
+    Distances to instructors whose service centroid is within radius_km of a point
+
+    Candidates are selected with an indexed geohash prefix filter over the
+    3x3 block of cells around the point plus a bounding box, then refined
+    with exact haversine distances computed in one vectorised pass. An
+    instructor only matches if the point is also inside their own service
+    radius. Only the primary key, the service area and any extra fields are
+    loaded, so the full rows can be fetched for just the page being shown.
+
+    Args:
+        queryset (QuerySet): InstructorProfile queryset with any other filters applied
+        latitude (float): Search centre latitude
+        longitude (float): Search centre longitude
+        radius_km (float): Search radius in kilometres
+        *fields (str): Extra fields to include in each row
+
+    Returns:
+        List[Tuple[float, Dict]]: (distance_km, row), ordered by distance then primary key
+    """
+    precision = geohash_precision_for_radius(radius_km, latitude)
+    cell_query = Q()
+    for cell in geohash_neighbours(latitude, longitude, precision):
+        cell_query |= Q(service_geohash__startswith=cell)
+
+    min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, radius_km)
+    candidates = list(queryset.filter(
+        cell_query,
+        service_latitude__range=(min_lat, max_lat),
+        service_longitude__range=(min_lon, max_lon)
+    ).values('pk', 'service_latitude', 'service_longitude', 'service_radius_km', *fields))
+
+    distances = haversine_distances(
+        latitude,
+        longitude,
+        [row['service_latitude'] for row in candidates],
+        [row['service_longitude'] for row in candidates]
+    )
+
+    matches = [
+        (distance, row)
+        for row, distance in zip(candidates, distances)
+        if distance <= radius_km and distance <= row['service_radius_km']
+    ]
+
+    matches.sort(key=lambda match: (match[0], match[1]['pk']))
+    return matches
@@ -0,0 +1,457 @@
+"""
+Local Postcode Directory Service for DriveEver
+Answers postcode validation, lookup, nearest and autocomplete requests from a
+memory-mapped snapshot of the ONS Postcode Directory, falling back to
+Postcodes.io only for postcodes that are not in the snapshot
+"""
+
+import bisect
+import heapq
+import json
+import logging
+import math
+import mmap
+import os
+import struct
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+
+from .geo import KM_PER_DEGREE
+from .postcode_service import PostcodesIOService
+from .postcode_utils import clean_postcode, format_postcode
+
+logger = logging.getLogger(__name__)
+
+# File layout (all columns in native byte order; apart from the grid, one
+# entry per postcode, sorted by the space-padded compact postcode):
+#   header   magic, version, key width, record count, string table length, grid cell count
+#   int32    grid cell keys (see cell_key), ascending, one per non-empty cell
+#   uint32   offset of each cell's first entry in the grid rows, plus the end offset
+#   uint32   record indices ordered by grid cell
+#   float32  latitude
+#   float32  longitude
+#   int32    eastings
+#   int32    northings
+#   uint16   region index into the string table
+#   uint16   admin district index into the string table
+#   bytes    compact postcode keys ("SW1A1AA"), KEY_WIDTH bytes each
+#   json     {"regions": [...], "admin_districts": [...]}
+MAGIC = b'DEPC'
+VERSION = 2
+KEY_WIDTH = 7
+HEADER = struct.Struct('=4sHHIII')
+
+GRID_DEGREES = 0.01  # about 1.1km north-south, 0.7km east-west in the UK
+CELL_ROW_STRIDE = 1 << 16  # wider than the 36,000 cells of longitude
+
+
+def grid_cell(latitude: float, longitude: float) -> Tuple[int, int]:
+    """The (row, column) of the GRID_DEGREES cell a point falls in"""
+    return math.floor(latitude / GRID_DEGREES), math.floor(longitude / GRID_DEGREES)
+
+
+def cell_key(row: int, col: int) -> int:
+    """A grid cell as one integer, ordered by row then column"""
+    return row * CELL_ROW_STRIDE + col
+
+
+def write_postcode_snapshot(path: str, records: Iterable[Tuple]) -> int:
+    """
+    Write postcode records to a columnar snapshot file
+
+    Args:
+        path (str): Destination file
+        records (Iterable[Tuple]): (postcode, latitude, longitude, eastings,
+            northings, region, admin_district) tuples
+
+    Returns:
+        int: Number of postcodes written
+    """
+    rows = {}
+    for postcode, lat, lon, eastings, northings, region, district in records:
+        key = clean_postcode(postcode)
+        if not key or len(key) > KEY_WIDTH:
+            continue
+        rows[key.encode('ascii').ljust(KEY_WIDTH)] = (
+            lat, lon, eastings, northings, region or '', district or ''
+        )
+
+    regions, districts = {}, {}
+    lat_col, lon_col = array('f'), array('f')
+    east_col, north_col = array('i'), array('i')
+    region_col, district_col = array('H'), array('H')
+    keys = bytearray()
+
+    for key in sorted(rows):
+        lat, lon, eastings, northings, region, district = rows[key]
+        lat_col.append(lat)
+        lon_col.append(lon)
+        east_col.append(int(eastings or 0))
+        north_col.append(int(northings or 0))
+        region_col.append(regions.setdefault(region, len(regions)))
+        district_col.append(districts.setdefault(district, len(districts)))
+        keys += key
+
+    strings = json.dumps({
+        'regions': list(regions),
+        'admin_districts': list(districts),
+    }).encode('utf-8')
+
+    # Cells come from the stored float32 coordinates, the same values the store reads back
+    cells = [cell_key(*grid_cell(lat, lon)) for lat, lon in zip(lat_col, lon_col)]
+    grid_rows = array('I', sorted(range(len(cells)), key=cells.__getitem__))
+    cell_keys, cell_starts = array('i'), array('I')
+    for position, index in enumerate(grid_rows):
+        if not cell_keys or cell_keys[-1] != cells[index]:
+            cell_keys.append(cells[index])
+            cell_starts.append(position)
+    cell_starts.append(len(grid_rows))
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as fh:
+        fh.write(HEADER.pack(MAGIC, VERSION, KEY_WIDTH, len(rows), len(strings), len(cell_keys)))
+        for column in (
+            cell_keys, cell_starts, grid_rows, lat_col, lon_col, east_col, north_col, region_col, district_col
+        ):
+            column.tofile(fh)
+        fh.write(keys)
+        fh.write(strings)
+    os.replace(tmp_path, path)
+
+    return len(rows)
+
+
+class _KeyColumn:
+    """Sequence view over the fixed-width key column, usable with bisect"""
+
+    def __init__(self, buf: memoryview, width: int, count: int):
+        self._buf = buf
+        self._width = width
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> bytes:
+        start = index * self._width
+        return bytes(self._buf[start:start + self._width])
+
+
+class LocalPostcodeStore:
+    """
+    Read-only, memory-mapped view of a postcode snapshot file
+
+    Lookups are a binary search over the sorted key column, so the file is
+    never loaded into memory and the OS page cache is shared between workers.
+    Nearest-postcode searches use the grid of GRID_DEGREES cells written into
+    the snapshot, so there is nothing to build when it's loaded.
+    """
+
+    def __init__(self, path: str):
+        self.path = str(path)
+        with open(self.path, 'rb') as fh:
+            self._mmap = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, key_width, count, strings_length, cell_count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{self.path} is not a postcode snapshot (version {VERSION})')
+
+        buf = memoryview(self._mmap)
+        offset = HEADER.size
+
+        def column(fmt: str, size: int, length: int = count) -> memoryview:
+            nonlocal offset
+            view = buf[offset:offset + size * length].cast(fmt)
+            offset += size * length
+            return view
+
+        self._cell_keys = column('i', 4, cell_count)
+        self._cell_starts = column('I', 4, cell_count + 1)
+        self._grid_rows = column('I', 4)
+        self._lat = column('f', 4)
+        self._lon = column('f', 4)
+        self._eastings = column('i', 4)
+        self._northings = column('i', 4)
+        self._region = column('H', 2)
+        self._district = column('H', 2)
+        self._keys = _KeyColumn(buf[offset:offset + key_width * count], key_width, count)
+        offset += key_width * count
+
+        strings = json.loads(bytes(buf[offset:offset + strings_length]).decode('utf-8'))
+        self._regions = strings['regions']
+        self._districts = strings['admin_districts']
+        self.key_width = key_width
+        self.count = count
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _encode(self, compact: str) -> bytes:
+        return compact.encode('ascii', 'ignore')
+
+    def find(self, postcode: str) -> Optional[int]:
+        """Return the record index for a postcode, or None if unknown"""
+        compact = clean_postcode(postcode)
+        if not compact or len(compact) > self.key_width:
+            return None
+        key = self._encode(compact).ljust(self.key_width)
+        index = bisect.bisect_left(self._keys, key)
+        if index < self.count and self._keys[index] == key:
+            return index
+        return None
+
+    def prefix_range(self, prefix: str) -> Tuple[int, int]:
+        """Return the [start, end) index range of postcodes starting with prefix"""
+        encoded = self._encode(clean_postcode(prefix))
+        start = bisect.bisect_left(self._keys, encoded)
+        end = bisect.bisect_left(self._keys, encoded + b'\xff', lo=start)
+        return start, end
+
+    def postcode(self, index: int) -> str:
+        return self._keys[index].decode('ascii').rstrip()
+
+    def coordinates(self, index: int) -> Tuple[float, float]:
+        return round(self._lat[index], 6), round(self._lon[index], 6)
+
+    def cells(self, row: int, first_col: int, last_col: int) -> memoryview:
+        """Indices of the postcodes in one row of grid cells, from first_col to last_col inclusive"""
+        start = bisect.bisect_left(self._cell_keys, cell_key(row, first_col))
+        end = bisect.bisect_right(self._cell_keys, cell_key(row, last_col), lo=start)
+        return self._grid_rows[self._cell_starts[start]:self._cell_starts[end]]
+
+    def ring(self, latitude: float, longitude: float, distance: int) -> Iterator[int]:
+        """
+        Indices of the postcodes in the grid cells `distance` cells away from a point's cell
+
+        Rings 0 to n together cover every postcode within ring_radius_km(latitude, n).
+        """
+        row, col = grid_cell(latitude, longitude)
+        for r in range(row - distance, row + distance + 1):
+            if abs(r - row) == distance:
+                yield from self.cells(r, col - distance, col + distance)
+            else:
+                yield from self.cells(r, col - distance, col - distance)
+                yield from self.cells(r, col + distance, col + distance)
+
+    def ring_radius_km(self, latitude: float, distance: int) -> float:
+        """How far from a point rings 0 to `distance` are sure to reach, in kilometres"""
+        # Cells are narrowest at the edge of the searched square furthest from the equator
+        # (capped short of the pole, where they'd have no width and a search would never end)
+        furthest_latitude = min(abs(latitude) + (distance + 1) * GRID_DEGREES, 89.0)
+        cell_km = GRID_DEGREES * KM_PER_DEGREE * math.cos(math.radians(furthest_latitude))
+        return distance * cell_km
+
+    def record(self, index: int) -> Dict:
+        """Return a record in the same shape as a Postcodes.io lookup result"""
+        compact = self.postcode(index)
+        latitude, longitude = self.coordinates(index)
+        return {
+            'postcode': format_postcode(compact),
+            'eastings': self._eastings[index] or None,
+            'northings': self._northings[index] or None,
+            'latitude': latitude,
+            'longitude': longitude,
+            'region': self._regions[self._region[index]] or None,
+            'admin_district': self._districts[self._district[index]] or None,
+            'incode': compact[-3:],
+            'outcode': compact[:-3],
+        }
+
+
+class LocalPostcodeService(PostcodesIOService):
+    """
+    Postcode service backed by a local snapshot file
+
+    Method signatures and response shapes match PostcodesIOService. Postcodes
+    missing from the snapshot (or every postcode, if no snapshot is configured)
+    are looked up through the Postcodes.io API.
+    """
+
+    NEAREST_MAX_KM = 10  # nearest postcode searches stop this far out
+
+    def __init__(self, data_file: Optional[str] = None):
+        super().__init__()
+        self.data_file = data_file or getattr(settings, 'POSTCODE_DATA_FILE', None)
+        self.store = None
+
+        if self.data_file and os.path.exists(self.data_file):
+            try:
+                self.store = LocalPostcodeStore(self.data_file)
+                logger.info(f"Loaded {len(self.store)} postcodes from {self.data_file}")
+            except (OSError, ValueError) as e:
+                logger.error(f"Could not load postcode snapshot {self.data_file}: {e}")
+        else:
+            logger.warning(
+                f"Postcode snapshot {self.data_file} not found, using Postcodes.io for all lookups"
+            )
+
+    def _find(self, postcode: str) -> Optional[int]:
+        if self.store is None:
+            return None
+        return self.store.find(postcode)
+
+    def validate_postcode(self, postcode: str) -> Dict:
+        if self._find(postcode) is None:
+            return super().validate_postcode(postcode)
+
+        return {
+            'valid': True,
+            'postcode': clean_postcode(postcode),
+            'status': 'success'
+        }
+
+    def resolve_postcode(self, postcode: str) -> Dict:
+        index = self._find(postcode)
+        if index is None:
+            return super().resolve_postcode(postcode)
+
+        return {
+            'valid': True,
+            'status': 'success',
+            'postcode': clean_postcode(postcode),
+            'data': self.format_postcode_data(self.store.record(index))
+        }
+
+    async def aresolve_postcode(self, postcode: str) -> Dict:
+        if self._find(postcode) is None:
+            return await super().aresolve_postcode(postcode)
+        return self.resolve_postcode(postcode)
+
+    def get_outcode_info(self, outcode: str) -> Dict:
+        """
+        Compute the outcode centroid as the mean position of its postcodes
+        """
+        clean_outcode = clean_postcode(outcode)
+        if self.store is None:
+            return super().get_outcode_info(outcode)
+
+        start, end = self.store.prefix_range(clean_outcode)
+        members = [i for i in range(start, end) if self.store.postcode(i)[:-3] == clean_outcode]
+        if not members:
+            return super().get_outcode_info(outcode)
+
+        records = [self.store.record(i) for i in members]
+        return {
+            'status': 'success',
+            'outcode': clean_outcode,
+            'data': {
+                'outcode': clean_outcode,
+                'longitude': round(sum(r['longitude'] for r in records) / len(records), 6),
+                'latitude': round(sum(r['latitude'] for r in records) / len(records), 6),
+                'eastings': round(sum(r['eastings'] or 0 for r in records) / len(records)),
+                'northings': round(sum(r['northings'] or 0 for r in records) / len(records)),
+                'admin_district': sorted({r['admin_district'] for r in records if r['admin_district']}),
+                'region': sorted({r['region'] for r in records if r['region']}),
+                'country': []
+            }
+        }
+
+    def find_nearest_postcodes(self, postcode: str, limit: int = 10) -> Dict:
+        """
+        Find the postcodes nearest the reference postcode, in any outcode
+
+        Searches outwards one ring of grid cells at a time until `limit`
+        postcodes are found no further away than the rings are sure to
+        reach, or the search passes NEAREST_MAX_KM.
+        """
+        index = self._find(postcode)
+        if index is None:
+            return super().find_nearest_postcodes(postcode, limit)
+
+        compact = self.store.postcode(index)
+        lat, lon = self.store.coordinates(index)
+
+        max_metres = self.NEAREST_MAX_KM * 1000
+        candidates = []
+        rings = 0
+        while True:
+            for candidate in self.store.ring(lat, lon, rings):
+                c_lat, c_lon = self.store.coordinates(candidate)
+                metres = self._haversine_distance(lat, lon, c_lat, c_lon) * 1000
+                if metres <= max_metres:
+                    candidates.append((metres, self.store.postcode(candidate), c_lat, c_lon))
+
+            reach_km = self.store.ring_radius_km(lat, rings)
+            nearest = heapq.nsmallest(limit, candidates)
+            if len(nearest) == limit and nearest[-1][0] <= reach_km * 1000:
+                break
+            if reach_km >= self.NEAREST_MAX_KM:
+                break
+            rings += 1
+
+        return {
+            'status': 'success',
+            'reference_postcode': compact,
+            'nearest_postcodes': [
+                {
+                    'postcode': format_postcode(p),
+                    'distance': round(distance, 2),
+                    'longitude': c_lon,
+                    'latitude': c_lat
+                }
+                for distance, p, c_lat, c_lon in nearest
+            ]
+        }
+
+    async def afind_nearest_postcodes(self, postcode: str, limit: int = 10) -> Dict:
+        if self._find(postcode) is None:
+            return await super().afind_nearest_postcodes(postcode, limit)
+        return self.find_nearest_postcodes(postcode, limit)
+
+    def bulk_postcode_lookup(self, postcodes: List[str]) -> Dict:
+        clean_postcodes = [clean_postcode(p) for p in postcodes if p.strip()]
+
+        if not clean_postcodes:
+            return {
+                'status': 'error',
+                'message': 'No valid postcodes provided'
+            }
+
+        results = {}
+        unknown = []
+        for postcode in clean_postcodes:
+            index = self._find(postcode)
+            if index is None:
+                unknown.append(postcode)
+            else:
+                results[postcode] = {
+                    'query': postcode,
+                    'result': self.format_postcode_data(self.store.record(index)),
+                    'valid': True
+                }
+
+        if unknown:
+            remote = super().bulk_postcode_lookup(unknown)
+            if remote['status'] != 'success':
+                return remote
+            for item in remote['results']:
+                results[clean_postcode(item['query'] or '')] = item
+
+        return {
+            'status': 'success',
+            'results': [
+                results.get(p, {'query': p, 'result': None, 'valid': False})
+                for p in clean_postcodes
+            ]
+        }
+
+    def autocomplete_postcode(self, partial_postcode: str, limit: int = 10) -> Dict:
+        clean_partial = clean_postcode(partial_postcode)
+        if self.store is None or not clean_partial:
+            return super().autocomplete_postcode(partial_postcode, limit)
+
+        start, end = self.store.prefix_range(clean_partial)
+        if start == end:
+            return super().autocomplete_postcode(partial_postcode, limit)
+
+        return {
+            'status': 'success',
+            'partial': clean_partial,
+            'suggestions': [
+                format_postcode(self.store.postcode(i))
+                for i in range(start, min(end, start + limit))
+            ]
+        }
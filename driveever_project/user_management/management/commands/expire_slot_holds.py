@@ -0,0 +1,24 @@
+"""
+Delete slot holds that expired without being confirmed, and pass lapsed
+waitlist offers on to the next learner
+
+Expired holds already stop blocking their slots, so this keeps the
+slot_hold table small and keeps waitlist offers moving. Run it every few
+minutes from cron or a scheduler.
+"""
+
+from django.core.management.base import BaseCommand
+
+from user_management.booking_service import expire_holds
+from user_management.waitlist import expire_offers
+
+
+class Command(BaseCommand):
+    help = 'Delete expired slot holds and re-offer lapsed waitlist offers'
+
+    def handle(self, *args, **options):
+        deleted = expire_holds()
+        reoffered = expire_offers()
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {deleted} expired slot holds, passed on {reoffered} waitlist offers'
+        ))
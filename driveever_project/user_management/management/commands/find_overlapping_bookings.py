@@ -0,0 +1,35 @@
+"""
+List pending and confirmed bookings that overlap another booking with the
+same instructor
+
+Migration 0009 refuses to add the booking_no_overlap constraint while any
+exist. Resolve each pair through the normal cancellation flow, so the
+learner is told and any payment refunded, then run the migration again.
+"""
+
+from django.core.management.base import BaseCommand
+
+from user_management.booking_service import ACTIVE_STATUSES, overlapping_bookings
+from user_management.models import Booking
+
+
+class Command(BaseCommand):
+    help = 'List pending and confirmed bookings that overlap another booking with the same instructor'
+
+    def handle(self, *args, **options):
+        bookings = Booking.objects.filter(status__in=ACTIVE_STATUSES).select_related('learner', 'instructor')
+        pairs = overlapping_bookings(bookings)
+
+        for booking, other in pairs:
+            self.stdout.write(
+                f'{booking.instructor.username} on {booking.lesson_date}: '
+                f'booking {booking.pk} ({booking.status}, {booking.learner.username}, '
+                f'{booking.start_time:%H:%M}-{booking.end_time:%H:%M}) overlaps '
+                f'booking {other.pk} ({other.status}, {other.learner.username}, '
+                f'{other.start_time:%H:%M}-{other.end_time:%H:%M})'
+            )
+
+        if pairs:
+            self.stdout.write(self.style.WARNING(f'{len(pairs)} overlapping pair(s)'))
+        else:
+            self.stdout.write(self.style.SUCCESS('No overlapping bookings'))
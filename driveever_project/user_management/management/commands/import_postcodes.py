@@ -0,0 +1,110 @@
+"""
+Import an ONS Postcode Directory (ONSPD) or Code-Point style CSV into the
+columnar snapshot file read by LocalPostcodeService
+"""
+
+import csv
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from user_management.local_postcode_service import write_postcode_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Build the local postcode snapshot from an ONSPD/Code-Point CSV export'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file', help='Path to the ONSPD or Code-Point CSV file')
+        parser.add_argument(
+            '--output',
+            default=None,
+            help='Snapshot file to write (defaults to settings.POSTCODE_DATA_FILE)'
+        )
+        parser.add_argument(
+            '--names',
+            action='append',
+            default=[],
+            help='CSV of code,name pairs used to replace ONS region/district codes with names (repeatable)'
+        )
+        parser.add_argument(
+            '--include-terminated',
+            action='store_true',
+            help='Keep postcodes that have a termination date'
+        )
+        parser.add_argument('--postcode-column', default='pcds')
+        parser.add_argument('--latitude-column', default='lat')
+        parser.add_argument('--longitude-column', default='long')
+        parser.add_argument('--eastings-column', default='oseast1m')
+        parser.add_argument('--northings-column', default='osnrth1m')
+        parser.add_argument('--region-column', default='rgn')
+        parser.add_argument('--district-column', default='oslaua')
+        parser.add_argument('--terminated-column', default='doterm')
+
+    def handle(self, *args, **options):
+        output = options['output'] or getattr(settings, 'POSTCODE_DATA_FILE', None)
+        if not output:
+            raise CommandError('No --output given and settings.POSTCODE_DATA_FILE is not set')
+
+        names = {}
+        for names_file in options['names']:
+            with open(names_file, newline='', encoding='utf-8-sig') as fh:
+                for row in csv.reader(fh):
+                    if len(row) >= 2:
+                        names[row[0].strip()] = row[1].strip()
+
+        skipped = {'terminated': 0, 'no_location': 0}
+
+        def records(reader):
+            for row in reader:
+                if not options['include_terminated'] and row.get(options['terminated_column']):
+                    skipped['terminated'] += 1
+                    continue
+
+                try:
+                    lat = float(row[options['latitude_column']])
+                    lon = float(row[options['longitude_column']])
+                except (KeyError, TypeError, ValueError):
+                    skipped['no_location'] += 1
+                    continue
+
+                # ONSPD marks postcodes without a grid reference with 99.999999
+                if lat > 90:
+                    skipped['no_location'] += 1
+                    continue
+
+                region = row.get(options['region_column'], '').strip()
+                district = row.get(options['district_column'], '').strip()
+
+                yield (
+                    row[options['postcode_column']],
+                    lat,
+                    lon,
+                    _to_int(row.get(options['eastings_column'])),
+                    _to_int(row.get(options['northings_column'])),
+                    names.get(region, region),
+                    names.get(district, district),
+                )
+
+        try:
+            with open(options['csv_file'], newline='', encoding='utf-8-sig') as fh:
+                reader = csv.DictReader(fh)
+                if options['postcode_column'] not in (reader.fieldnames or []):
+                    raise CommandError(
+                        f"Column '{options['postcode_column']}' not found in {options['csv_file']}"
+                    )
+                count = write_postcode_snapshot(str(output), records(reader))
+        except OSError as e:
+            raise CommandError(f'Could not import postcodes: {e}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {count} postcodes into {output} "
+            f"(skipped {skipped['terminated']} terminated, {skipped['no_location']} without location)"
+        ))
+
+
+def _to_int(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return 0
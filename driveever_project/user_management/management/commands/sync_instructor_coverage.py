@@ -0,0 +1,48 @@
+"""
+Rebuild InstructorCoverage rows from InstructorProfile.postcodes, fill in
+missing outcode centroids from the postcode service and recompute each
+instructor's service area
+"""
+
+from django.core.management.base import BaseCommand
+
+from user_management.models import InstructorCoverage, InstructorProfile
+from user_management.postcode_service import postcode_service
+
+
+class Command(BaseCommand):
+    help = 'Sync instructor coverage outcodes and fill in missing centroids'
+
+    def handle(self, *args, **options):
+        profiles = InstructorProfile.objects.prefetch_related('coverage_areas')
+        for profile in profiles:
+            profile.sync_coverage()
+
+        missing = (
+            InstructorCoverage.objects.filter(latitude__isnull=True)
+            .values_list('outcode', flat=True)
+            .distinct()
+        )
+
+        filled, unknown = 0, []
+        for outcode in list(missing):
+            info = postcode_service.get_outcode_info(outcode)
+            if info['status'] != 'success':
+                unknown.append(outcode)
+                continue
+
+            districts = info['data']['admin_district']
+            filled += InstructorCoverage.objects.filter(outcode=outcode, latitude__isnull=True).update(
+                latitude=info['data']['latitude'],
+                longitude=info['data']['longitude'],
+                district=districts[0] if districts else None
+            )
+
+        for profile in InstructorProfile.objects.all():
+            profile.update_service_area()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Synced {profiles.count()} instructors, filled {filled} coverage centroids'
+        ))
+        if unknown:
+            self.stdout.write(self.style.WARNING(f"Unknown outcodes: {', '.join(unknown)}"))
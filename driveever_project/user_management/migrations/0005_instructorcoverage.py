@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-18 13:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_management', '0004_payment_booking'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InstructorCoverage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('outcode', models.CharField(help_text="Outward code (e.g., 'LN1')", max_length=4)),
+                ('district', models.CharField(blank=True, help_text='Admin district of the outcode', max_length=100, null=True)),
+                ('latitude', models.FloatField(blank=True, null=True)),
+                ('longitude', models.FloatField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('instructor_profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='coverage_areas', to='user_management.instructorprofile')),
+            ],
+            options={
+                'db_table': 'instructor_coverage',
+                'indexes': [models.Index(fields=['outcode', 'instructor_profile'], name='instructor__outcode_404871_idx')],
+                'unique_together': {('instructor_profile', 'outcode')},
+            },
+        ),
+    ]
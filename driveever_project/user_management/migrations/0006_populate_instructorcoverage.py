@@ -0,0 +1,34 @@
+# Populates InstructorCoverage from the existing free-text InstructorProfile.postcodes.
+# Centroids are left empty; run `manage.py sync_instructor_coverage` to fill them in.
+
+from django.db import migrations
+
+from user_management.postcode_utils import extract_outcodes
+
+
+def populate_coverage(apps, schema_editor):
+    InstructorProfile = apps.get_model('user_management', 'InstructorProfile')
+    InstructorCoverage = apps.get_model('user_management', 'InstructorCoverage')
+
+    areas = []
+    for profile in InstructorProfile.objects.exclude(postcodes__isnull=True).only('id', 'postcodes').iterator():
+        for outcode in extract_outcodes(profile.postcodes):
+            areas.append(InstructorCoverage(instructor_profile_id=profile.id, outcode=outcode))
+
+    InstructorCoverage.objects.bulk_create(areas, batch_size=1000, ignore_conflicts=True)
+
+
+def clear_coverage(apps, schema_editor):
+    InstructorCoverage = apps.get_model('user_management', 'InstructorCoverage')
+    InstructorCoverage.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_management', '0005_instructorcoverage'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_coverage, clear_coverage),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.5 on 2026-10-18 13:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_management', '0006_populate_instructorcoverage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='instructorprofile',
+            name='service_geohash',
+            field=models.CharField(blank=True, editable=False, max_length=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='instructorprofile',
+            name='service_latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='instructorprofile',
+            name='service_longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='instructorprofile',
+            name='service_radius_km',
+            field=models.FloatField(default=10.0, help_text='How far from the service centroid the instructor travels'),
+        ),
+        migrations.AddIndex(
+            model_name='instructorprofile',
+            index=models.Index(fields=['service_geohash'], name='instructor_geohash_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
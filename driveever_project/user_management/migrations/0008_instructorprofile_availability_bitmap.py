@@ -0,0 +1,40 @@
+# Adds InstructorProfile.availability_bitmap and builds it from the existing
+# availability slots. Afterwards it is rebuilt whenever a slot is saved or deleted.
+
+from django.db import migrations, models
+
+from user_management.availability_bitmap import encode_bitmap, weekly_bitmap
+from user_management.slot_engine import to_minutes
+
+
+def build_availability_bitmaps(apps, schema_editor):
+    InstructorProfile = apps.get_model('user_management', 'InstructorProfile')
+    InstructorAvailability = apps.get_model('user_management', 'InstructorAvailability')
+
+    windows = {}
+    for profile_id, day_of_week, start, end in InstructorAvailability.objects.filter(
+        is_available=True
+    ).values_list('instructor_profile_id', 'day_of_week', 'start_time', 'end_time'):
+        windows.setdefault(profile_id, []).append((day_of_week, to_minutes(start), to_minutes(end)))
+
+    profiles = []
+    for profile in InstructorProfile.objects.filter(pk__in=windows):
+        profile.availability_bitmap = encode_bitmap(weekly_bitmap(windows[profile.pk]))
+        profiles.append(profile)
+    InstructorProfile.objects.bulk_update(profiles, ['availability_bitmap'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_management', '0007_instructorprofile_service_area'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='instructorprofile',
+            name='availability_bitmap',
+            field=models.CharField(default='000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000', editable=False, help_text='One hex digit per hour of the week, one bit per 15 minutes', max_length=168),
+        ),
+        migrations.RunPython(build_availability_bitmaps, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,75 @@
+# Adds the booking.lesson_period tsrange column and an exclusion constraint that
+# stops two pending/confirmed bookings for the same instructor from overlapping.
+# Both are PostgreSQL features (the constraint needs btree_gist for the
+# instructor_id equality), so other databases skip this migration and rely on
+# the row lock in booking_service.create_booking.
+#
+# Adding the constraint fails if any active bookings already overlap. The
+# migration doesn't choose which to cancel (that means contacting learners
+# and refunding payments), so it stops first and lists them; resolve them,
+# e.g. from `manage.py find_overlapping_bookings`, then migrate again.
+
+from django.db import migrations
+
+from user_management.booking_service import overlapping_bookings
+
+FORWARDS = [
+    'CREATE EXTENSION IF NOT EXISTS btree_gist',
+    """
+    ALTER TABLE booking ADD COLUMN lesson_period tsrange
+        GENERATED ALWAYS AS (tsrange(lesson_date + start_time, lesson_date + end_time, '[)')) STORED
+    """,
+    """
+    ALTER TABLE booking ADD CONSTRAINT booking_no_overlap EXCLUDE USING gist (
+        instructor_id WITH =,
+        lesson_period WITH &&
+    ) WHERE (status IN ('pending', 'confirmed'))
+    """,
+]
+
+BACKWARDS = [
+    'ALTER TABLE booking DROP CONSTRAINT IF EXISTS booking_no_overlap',
+    'ALTER TABLE booking DROP COLUMN IF EXISTS lesson_period',
+]
+
+
+def check_no_overlapping_bookings(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Booking = apps.get_model('user_management', 'Booking')
+
+    pairs = overlapping_bookings(Booking.objects.filter(status__in=['pending', 'confirmed']).only(
+        'pk', 'instructor_id', 'lesson_date', 'start_time', 'end_time', 'status'
+    ))
+    if pairs:
+        raise RuntimeError(
+            'Active bookings overlap, so booking_no_overlap can\'t be added: '
+            + ', '.join(f'{booking.pk} and {other.pk}' for booking, other in pairs)
+            + '. Cancel or move one of each pair (see `manage.py find_overlapping_bookings`) and migrate again.'
+        )
+
+
+def add_lesson_period(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for statement in FORWARDS:
+        schema_editor.execute(statement)
+
+
+def remove_lesson_period(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for statement in BACKWARDS:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_management', '0008_instructorprofile_availability_bitmap'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_no_overlapping_bookings, migrations.RunPython.noop),
+        migrations.RunPython(add_lesson_period, remove_lesson_period),
+    ]
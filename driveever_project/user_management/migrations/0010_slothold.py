@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:57
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_management', '0009_booking_lesson_period'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlotHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lesson_date', models.DateField()),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+                ('expires_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('instructor', models.ForeignKey(limit_choices_to={'user_type': 'instructor'}, on_delete=django.db.models.deletion.CASCADE, related_name='slot_holds_as_instructor', to=settings.AUTH_USER_MODEL)),
+                ('learner', models.ForeignKey(limit_choices_to={'user_type': 'learner'}, on_delete=django.db.models.deletion.CASCADE, related_name='slot_holds_as_learner', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'slot_hold',
+                'ordering': ['lesson_date', 'start_time'],
+                'indexes': [models.Index(fields=['instructor', 'lesson_date'], name='slot_hold_instruc_fd1dba_idx'), models.Index(fields=['expires_at'], name='slot_hold_expires_cf6b57_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_management', '0010_slothold'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AvailabilityException',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('start_time', models.TimeField(blank=True, help_text='Empty for the whole day', null=True)),
+                ('end_time', models.TimeField(blank=True, help_text='Empty for the whole day', null=True)),
+                ('is_available', models.BooleanField(default=False, help_text='True adds an extra window, False blocks the time (e.g. a holiday)')),
+                ('reason', models.CharField(blank=True, max_length=255, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('instructor_profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='availability_exceptions', to='user_management.instructorprofile')),
+            ],
+            options={
+                'db_table': 'availability_exception',
+                'ordering': ['date', 'start_time'],
+                'indexes': [models.Index(fields=['instructor_profile', 'date'], name='availabilit_instruc_8835f0_idx')],
+            },
+        ),
+    ]
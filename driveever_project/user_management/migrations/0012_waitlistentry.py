@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_management', '0011_availabilityexception'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WaitlistEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('earliest_date', models.DateField()),
+                ('latest_date', models.DateField()),
+                ('preferred_start_time', models.TimeField(blank=True, null=True)),
+                ('preferred_end_time', models.TimeField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('waiting', 'Waiting'), ('offered', 'Offered'), ('booked', 'Booked'), ('expired', 'Expired'), ('cancelled', 'Cancelled')], default='waiting', max_length=20)),
+                ('offered_date', models.DateField(blank=True, null=True)),
+                ('offered_start_time', models.TimeField(blank=True, null=True)),
+                ('offered_end_time', models.TimeField(blank=True, null=True)),
+                ('offered_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('hold', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='waitlist_entries', to='user_management.slothold')),
+                ('instructor', models.ForeignKey(limit_choices_to={'user_type': 'instructor'}, on_delete=django.db.models.deletion.CASCADE, related_name='waitlist_entries_as_instructor', to=settings.AUTH_USER_MODEL)),
+                ('learner', models.ForeignKey(limit_choices_to={'user_type': 'learner'}, on_delete=django.db.models.deletion.CASCADE, related_name='waitlist_entries_as_learner', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'waitlist_entry',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['instructor', 'earliest_date'], name='waitlist_en_instruc_6a0c5c_idx'), models.Index(fields=['learner', 'status'], name='waitlist_en_learner_05099e_idx')],
+            },
+        ),
+    ]
@@ -45,6 +45,20 @@ class InstructorProfile(models.Model):
     )
     postcodes = models.TextField(blank=True, null=True, help_text="Postcodes covered (e.g., 'LN1, LN2, LN5')")
     
+    # Service area used for radius search (centroid derived from the covered outcodes)
+    service_latitude = models.FloatField(blank=True, null=True)
+    service_longitude = models.FloatField(blank=True, null=True)
+    service_radius_km = models.FloatField(default=10.0, help_text="How far from the service centroid the instructor travels")
+    service_geohash = models.CharField(max_length=12, blank=True, null=True, editable=False)
+    
+    # Weekly availability bitmap derived from the availability slots (see availability_bitmap)
+    availability_bitmap = models.CharField(
+        max_length=168,
+        default='0' * 168,
+        editable=False,
+        help_text="One hex digit per hour of the week, one bit per 15 minutes"
+    )
+    
     # Status fields
     is_active = models.BooleanField(default=True)
     is_verified = models.BooleanField(default=False, help_text="ADI number verification status")
@@ -55,9 +69,195 @@ class InstructorProfile(models.Model):
     
     class Meta:
         db_table = 'instructor_profile'
+        indexes = [
+            # Prefix (LIKE 'abc%') lookups for radius search
+            models.Index(fields=['service_geohash'], name='instructor_geohash_idx', opclasses=['varchar_pattern_ops']),
+        ]
     
     def __str__(self):
         return f'{self.user.full_name or self.user.username} - Instructor Profile'
+    
+    def save(self, *args, **kwargs):
+        from .geo import geohash_encode
+        
+        if self.service_latitude is not None and self.service_longitude is not None:
+            self.service_geohash = geohash_encode(self.service_latitude, self.service_longitude)
+        else:
+            self.service_geohash = None
+        
+        super().save(*args, **kwargs)
+        
+        # Keep the normalised coverage table in step with the free-text postcodes
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'postcodes' in update_fields:
+            self.sync_coverage()
+    
+    def sync_coverage(self, centroids=None):
+        """
+        Bring InstructorCoverage rows in line with the postcodes field
+        
+        Args:
+            centroids (dict): Optional {outcode: {'latitude', 'longitude', 'district'}}
+                used to fill in new rows and rows that have no centroid yet
+        """
+        from .postcode_utils import extract_outcodes
+        
+        centroids = centroids or {}
+        outcodes = extract_outcodes(self.postcodes)
+        existing = {area.outcode: area for area in self.coverage_areas.all()}
+        
+        removed = [outcode for outcode in existing if outcode not in outcodes]
+        if removed:
+            self.coverage_areas.filter(outcode__in=removed).delete()
+        
+        new_areas = []
+        updated_areas = []
+        for outcode in outcodes:
+            centroid = centroids.get(outcode, {})
+            area = existing.get(outcode)
+            if area is None:
+                new_areas.append(InstructorCoverage(
+                    instructor_profile=self,
+                    outcode=outcode,
+                    district=centroid.get('district'),
+                    latitude=centroid.get('latitude'),
+                    longitude=centroid.get('longitude')
+                ))
+            elif area.latitude is None and centroid.get('latitude') is not None:
+                area.district = area.district or centroid.get('district')
+                area.latitude = centroid['latitude']
+                area.longitude = centroid['longitude']
+                updated_areas.append(area)
+        
+        if new_areas:
+            InstructorCoverage.objects.bulk_create(new_areas, ignore_conflicts=True)
+        if updated_areas:
+            InstructorCoverage.objects.bulk_update(updated_areas, ['district', 'latitude', 'longitude'])
+        
+        if removed or new_areas or updated_areas:
+            self.update_service_area()
+    
+    def update_service_area(self):
+        """
+        Recompute the service centroid from the centroids of the covered outcodes
+        """
+        from django.db.models import Avg
+        
+        centroid = self.coverage_areas.filter(latitude__isnull=False).aggregate(
+            latitude=Avg('latitude'),
+            longitude=Avg('longitude')
+        )
+        if (centroid['latitude'], centroid['longitude']) == (self.service_latitude, self.service_longitude):
+            return
+        
+        self.service_latitude = centroid['latitude']
+        self.service_longitude = centroid['longitude']
+        self.save(update_fields=['service_latitude', 'service_longitude', 'service_geohash', 'updated_at'])
+    
+    def replace_availability(self, slots):
+        """
+        Make the availability slots match `slots`, touching only the rows that differ
+        
+        Slots are matched on (day_of_week, start_time); matching rows with a
+        different end time or is_available are updated, the rest are inserted
+        or deleted, with one bulk statement each. Run it in a transaction.
+        
+        Args:
+            slots (list): Validated dicts with day_of_week, start_time, end_time
+                and optionally is_available
+        
+        Returns:
+            tuple: (created, updated, deleted) counts
+        """
+        from django.utils import timezone
+        
+        existing = {(slot.day_of_week, slot.start_time): slot for slot in self.availability_slots.all()}
+        
+        now = timezone.now()
+        new_slots = []
+        updated_slots = []
+        for data in slots:
+            slot = existing.pop((data['day_of_week'], data['start_time']), None)
+            is_available = data.get('is_available', True)
+            if slot is None:
+                new_slots.append(InstructorAvailability(
+                    instructor_profile=self,
+                    day_of_week=data['day_of_week'],
+                    start_time=data['start_time'],
+                    end_time=data['end_time'],
+                    is_available=is_available
+                ))
+            elif (slot.end_time, slot.is_available) != (data['end_time'], is_available):
+                slot.end_time = data['end_time']
+                slot.is_available = is_available
+                slot.updated_at = now
+                updated_slots.append(slot)
+        
+        deleted = 0
+        if existing:
+            deleted, _ = InstructorAvailability.objects.filter(
+                pk__in=[slot.pk for slot in existing.values()]
+            ).delete()
+        if new_slots:
+            InstructorAvailability.objects.bulk_create(new_slots)
+        if updated_slots:
+            InstructorAvailability.objects.bulk_update(updated_slots, ['end_time', 'is_available', 'updated_at'])
+        
+        return len(new_slots), len(updated_slots), deleted
+    
+    def update_availability_bitmap(self):
+        """
+        Rebuild the weekly availability bitmap from the available slots
+        
+        Returns:
+            bool: Whether the bitmap changed (and the profile was saved)
+        """
+        from .availability_bitmap import encode_bitmap, weekly_bitmap
+        from .slot_engine import to_minutes
+        
+        windows = self.availability_slots.filter(is_available=True).values_list('day_of_week', 'start_time', 'end_time')
+        bitmap = encode_bitmap(weekly_bitmap(
+            (day_of_week, to_minutes(start), to_minutes(end)) for day_of_week, start, end in windows
+        ))
+        if bitmap == self.availability_bitmap:
+            return False
+        
+        self.availability_bitmap = bitmap
+        self.save(update_fields=['availability_bitmap', 'updated_at'])
+        return True
+    
+    def weekly_availability(self):
+        """The availability bitmap as an integer"""
+        from .availability_bitmap import decode_bitmap
+        return decode_bitmap(self.availability_bitmap)
+
+class InstructorCoverage(models.Model):
+    """
+    One row per outward code an instructor covers, derived from InstructorProfile.postcodes
+    """
+    instructor_profile = models.ForeignKey(
+        InstructorProfile,
+        on_delete=models.CASCADE,
+        related_name='coverage_areas'
+    )
+    outcode = models.CharField(max_length=4, help_text="Outward code (e.g., 'LN1')")
+    district = models.CharField(max_length=100, blank=True, null=True, help_text="Admin district of the outcode")
+    
+    # Outcode centroid
+    latitude = models.FloatField(blank=True, null=True)
+    longitude = models.FloatField(blank=True, null=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'instructor_coverage'
+        unique_together = ['instructor_profile', 'outcode']
+        indexes = [
+            models.Index(fields=['outcode', 'instructor_profile']),
+        ]
+    
+    def __str__(self):
+        return f'{self.instructor_profile.user.username} - {self.outcode}'
 
 class AcademyProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='academy_profile')
@@ -122,6 +322,50 @@ class InstructorAvailability(models.Model):
         if self.start_time >= self.end_time:
             raise ValidationError('End time must be after start time.')
 
+class AvailabilityException(models.Model):
+    """
+    A date-specific change to an instructor's weekly availability
+    
+    Open exceptions add an extra window on that date; closed ones block time
+    (a whole day when start_time and end_time are empty). Closures win where
+    the two overlap.
+    """
+    instructor_profile = models.ForeignKey(
+        InstructorProfile,
+        on_delete=models.CASCADE,
+        related_name='availability_exceptions'
+    )
+    date = models.DateField()
+    start_time = models.TimeField(blank=True, null=True, help_text="Empty for the whole day")
+    end_time = models.TimeField(blank=True, null=True, help_text="Empty for the whole day")
+    is_available = models.BooleanField(
+        default=False,
+        help_text="True adds an extra window, False blocks the time (e.g. a holiday)"
+    )
+    reason = models.CharField(max_length=255, blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'availability_exception'
+        ordering = ['date', 'start_time']
+        indexes = [
+            models.Index(fields=['instructor_profile', 'date']),
+        ]
+    
+    def __str__(self):
+        state = 'open' if self.is_available else 'closed'
+        return f'{self.instructor_profile.user.username} - {self.date} {state}'
+    
+    def clean(self):
+        from django.core.exceptions import ValidationError
+        if (self.start_time is None) != (self.end_time is None):
+            raise ValidationError('Give both start and end time, or neither for the whole day.')
+        if self.start_time is not None and self.start_time >= self.end_time:
+            raise ValidationError('End time must be after start time.')
+        if self.is_available and self.start_time is None:
+            raise ValidationError('Extra availability needs a start and end time.')
+
+    
 class Payment(models.Model):
     PAYMENT_STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -220,6 +464,9 @@ class Booking(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     cancelled_at = models.DateTimeField(blank=True, null=True)
     
+    # On PostgreSQL the table also has a generated lesson_period tsrange column and the
+    # booking_no_overlap exclusion constraint (migration 0009); see booking_service
+    
     class Meta:
         db_table = 'booking'
         ordering = ['lesson_date', 'start_time']
@@ -266,3 +513,109 @@ class Booking(models.Model):
             self.duration_hours = (end_dt - start_dt).total_seconds() / 3600
         
         super().save(*args, **kwargs)
+
+
+class SlotHold(models.Model):
+    """
+    A learner's short-lived claim on a lesson slot while they complete a booking
+    
+    Holds block the slot for everyone else until they are confirmed into a
+    Booking, released, or reach expires_at. Expired holds are ignored by every
+    check and deleted by the expire_slot_holds command.
+    """
+    instructor = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='slot_holds_as_instructor',
+        limit_choices_to={'user_type': 'instructor'}
+    )
+    learner = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='slot_holds_as_learner',
+        limit_choices_to={'user_type': 'learner'}
+    )
+    
+    lesson_date = models.DateField()
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'slot_hold'
+        ordering = ['lesson_date', 'start_time']
+        indexes = [
+            models.Index(fields=['instructor', 'lesson_date']),
+            models.Index(fields=['expires_at']),
+        ]
+    
+    def __str__(self):
+        return f'Hold {self.id}: {self.learner.username} with {self.instructor.username} on {self.lesson_date}'
+
+
+class WaitlistEntry(models.Model):
+    """
+    A learner waiting for a slot with an instructor to come free
+    
+    When a booking is cancelled, the first waiting learner whose date window
+    and preferred times fit the freed slot is offered it as a SlotHold.
+    """
+    STATUS_CHOICES = [
+        ('waiting', 'Waiting'),
+        ('offered', 'Offered'),
+        ('booked', 'Booked'),
+        ('expired', 'Expired'),
+        ('cancelled', 'Cancelled'),
+    ]
+    
+    learner = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='waitlist_entries_as_learner',
+        limit_choices_to={'user_type': 'learner'}
+    )
+    instructor = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='waitlist_entries_as_instructor',
+        limit_choices_to={'user_type': 'instructor'}
+    )
+    
+    # Dates the learner could take a lesson on
+    earliest_date = models.DateField()
+    latest_date = models.DateField()
+    
+    # The lesson must fit between these times; empty means any time
+    preferred_start_time = models.TimeField(blank=True, null=True)
+    preferred_end_time = models.TimeField(blank=True, null=True)
+    
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='waiting')
+    
+    # The slot on offer, held for the learner until they confirm it or the hold expires
+    hold = models.ForeignKey(
+        SlotHold,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='waitlist_entries'
+    )
+    offered_date = models.DateField(blank=True, null=True)
+    offered_start_time = models.TimeField(blank=True, null=True)
+    offered_end_time = models.TimeField(blank=True, null=True)
+    offered_at = models.DateTimeField(blank=True, null=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'waitlist_entry'
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['instructor', 'earliest_date']),
+            models.Index(fields=['learner', 'status']),
+        ]
+    
+    def __str__(self):
+        return f'Waitlist {self.id}: {self.learner.username} for {self.instructor.username} ({self.status})'
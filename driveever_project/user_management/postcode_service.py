@@ -8,6 +8,11 @@ import logging
 from typing import Dict, Optional, List, Tuple
 from django.conf import settings
 
+from .geo import haversine_km, haversine_matrix, place_matrix
+from .http_client import async_http_client, http_client
+from .response_cache import TieredCache
+from .single_flight import SingleFlight
+
 logger = logging.getLogger(__name__)
 
 class PostcodesIOService:
@@ -18,11 +23,41 @@ class PostcodesIOService:
     
     BASE_URL = "https://api.postcodes.io"
     
+    # Maximum number of postcodes Postcodes.io accepts in one bulk lookup
+    BULK_LIMIT = 100
+    
+    # Postcode data only changes with the quarterly ONS release, so successful
+    # lookups can be kept for a long time. "Not found" results expire sooner.
+    CACHE_DEFAULTS = {
+        'MAX_ENTRIES': 20000,
+        'TTL': 60 * 60 * 24 * 7,
+        'NEGATIVE_TTL': 60 * 60,
+        'CACHE_ALIAS': None,
+    }
+    
+    HEADERS = {'User-Agent': 'DriveEver/1.0 (https://driveever.com)'}
+    
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'DriveEver/1.0 (https://driveever.com)'
-        })
+        # Requests go through the shared, pooled outbound clients
+        self.session = http_client.bind(headers=self.HEADERS)
+        self.async_session = async_http_client.bind(headers=self.HEADERS)
+        
+        cache_config = {**self.CACHE_DEFAULTS, **getattr(settings, 'POSTCODE_CACHE', {})}
+        self.cache = TieredCache(
+            'postcodes',
+            max_entries=cache_config['MAX_ENTRIES'],
+            ttl=cache_config['TTL'],
+            negative_ttl=cache_config['NEGATIVE_TTL'],
+            cache_alias=cache_config['CACHE_ALIAS']
+        )
+        # Concurrent misses for the same postcode share one upstream call
+        self.flights = SingleFlight(
+            'postcodes', cache_alias=cache_config['CACHE_ALIAS'], lock_ttl=http_client.max_call_seconds()
+        )
+    
+    def cache_stats(self) -> Dict:
+        """Return hit/miss counters and sizing for the postcode response cache"""
+        return {**self.cache.stats(), 'single_flight': self.flights.stats()}
     
     def validate_postcode(self, postcode: str) -> Dict:
         """
@@ -38,16 +73,23 @@ class PostcodesIOService:
             # Clean postcode (remove spaces, convert to uppercase)
             clean_postcode = postcode.replace(' ', '').upper()
             
+            cache_key = f'validate:{clean_postcode}'
+            found, cached = self.cache.get(cache_key)
+            if found:
+                return cached
+            
             url = f"{self.BASE_URL}/postcodes/{clean_postcode}/validate"
             response = self.session.get(url, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
-                return {
+                result = {
                     'valid': data.get('result', False),
                     'postcode': clean_postcode,
                     'status': 'success'
                 }
+                self.cache.set(cache_key, result, negative=not result['valid'])
+                return result
             else:
                 return {
                     'valid': False,
@@ -73,6 +115,117 @@ class PostcodesIOService:
                 'message': f'Validation error: {str(e)}'
             }
     
+    def resolve_postcode(self, postcode: str) -> Dict:
+        """
+        Validate a UK postcode and get its details with a single lookup
+        
+        A 404 from the lookup endpoint means the postcode is invalid, so there
+        is no need for a separate call to the validate endpoint.
+        
+        Args:
+            postcode (str): UK postcode to resolve
+            
+        Returns:
+            Dict: Resolution with 'valid', 'status' ('success' when the answer
+            is definitive, 'error' when the lookup itself failed) and 'data'
+        """
+        try:
+            clean_postcode = postcode.replace(' ', '').upper()
+            
+            cache_key = f'resolve:{clean_postcode}'
+            found, cached = self.cache.get(cache_key)
+            if found:
+                return cached
+            
+            url = f"{self.BASE_URL}/postcodes/{clean_postcode}"
+            
+            def fetch():
+                resolution, negative = self._resolution(postcode, clean_postcode, self.session.get(url, timeout=10))
+                if negative is not None:
+                    self.cache.set(cache_key, resolution, negative=negative)
+                return resolution
+            
+            return self.flights.do(cache_key, fetch, recheck=lambda: self.cache.get(cache_key))
+                
+        except Exception as e:
+            return self._resolution_error(postcode, e)
+    
+    async def aresolve_postcode(self, postcode: str) -> Dict:
+        """Async version of resolve_postcode"""
+        try:
+            clean_postcode = postcode.replace(' ', '').upper()
+            
+            cache_key = f'resolve:{clean_postcode}'
+            found, cached = await self.cache.aget(cache_key)
+            if found:
+                return cached
+            
+            url = f"{self.BASE_URL}/postcodes/{clean_postcode}"
+            
+            async def fetch():
+                response = await self.async_session.get(url, timeout=10)
+                resolution, negative = self._resolution(postcode, clean_postcode, response)
+                if negative is not None:
+                    await self.cache.aset(cache_key, resolution, negative=negative)
+                return resolution
+            
+            return await self.flights.ado(cache_key, fetch, recheck=lambda: self.cache.aget(cache_key))
+                
+        except Exception as e:
+            return self._resolution_error(postcode, e)
+    
+    def _resolution(self, postcode: str, clean_postcode: str, response) -> Tuple[Dict, Optional[bool]]:
+        """
+        Turn a lookup response into a resolution
+        
+        Returns:
+            Tuple[Dict, Optional[bool]]: (resolution, whether to cache it as a
+            negative result, or None if it shouldn't be cached)
+        """
+        if response.status_code == 200:
+            data = response.json()
+            result = data.get('result', {})
+            
+            resolution = {
+                'valid': True,
+                'status': 'success',
+                'postcode': clean_postcode,
+                'data': self.format_postcode_data(result)
+            }
+            return resolution, False
+        elif response.status_code == 404:
+            resolution = {
+                'valid': False,
+                'status': 'success',
+                'postcode': clean_postcode,
+                'data': None,
+                'message': f'Postcode not found: {response.status_code}'
+            }
+            return resolution, True
+        else:
+            return {
+                'valid': False,
+                'status': 'error',
+                'postcode': postcode,
+                'data': None,
+                'message': f'Postcode not found: {response.status_code}'
+            }, None
+    
+    def _resolution_error(self, postcode: str, e: Exception) -> Dict:
+        if isinstance(e, requests.RequestException):
+            logger.error(f"Postcodes.io API request failed: {e}")
+            message = f'Network error: {str(e)}'
+        else:
+            logger.error(f"Postcode lookup error: {e}")
+            message = f'Lookup error: {str(e)}'
+        return {
+            'valid': False,
+            'status': 'error',
+            'postcode': postcode,
+            'data': None,
+            'message': message
+        }
+    
     def get_postcode_info(self, postcode: str) -> Dict:
         """
         Get detailed information about a UK postcode
@@ -83,67 +236,120 @@ class PostcodesIOService:
         Returns:
             Dict: Detailed postcode information
         """
+        return self._postcode_info(postcode, self.resolve_postcode(postcode))
+    
+    async def aget_postcode_info(self, postcode: str) -> Dict:
+        """Async version of get_postcode_info"""
+        return self._postcode_info(postcode, await self.aresolve_postcode(postcode))
+    
+    def _postcode_info(self, postcode: str, resolution: Dict) -> Dict:
+        if resolution['valid']:
+            return {
+                'status': 'success',
+                'postcode': resolution['postcode'],
+                'data': resolution['data']
+            }
+        
+        return {
+            'status': 'error',
+            'postcode': postcode,
+            'message': resolution['message']
+        }
+    
+    def get_outcode_info(self, outcode: str) -> Dict:
+        """
+        Get the centroid and administrative areas of an outward code
+        
+        Args:
+            outcode (str): Outward code (e.g., 'LN1')
+            
+        Returns:
+            Dict: Outcode information
+        """
         try:
-            clean_postcode = postcode.replace(' ', '').upper()
-            url = f"{self.BASE_URL}/postcodes/{clean_postcode}"
+            clean_outcode = outcode.replace(' ', '').upper()
+            
+            cache_key = f'outcode:{clean_outcode}'
+            found, cached = self.cache.get(cache_key)
+            if found:
+                return cached
+            
+            url = f"{self.BASE_URL}/outcodes/{clean_outcode}"
             response = self.session.get(url, timeout=10)
             
             if response.status_code == 200:
-                data = response.json()
-                result = data.get('result', {})
-                
-                return {
+                result = response.json().get('result') or {}
+                info = {
                     'status': 'success',
-                    'postcode': clean_postcode,
+                    'outcode': clean_outcode,
                     'data': {
-                        'postcode': result.get('postcode'),
-                        'quality': result.get('quality'),
-                        'eastings': result.get('eastings'),
-                        'northings': result.get('northings'),
-                        'country': result.get('country'),
-                        'nhs_ha': result.get('nhs_ha'),
+                        'outcode': result.get('outcode'),
                         'longitude': result.get('longitude'),
                         'latitude': result.get('latitude'),
-                        'european_electoral_region': result.get('european_electoral_region'),
-                        'primary_care_trust': result.get('primary_care_trust'),
-                        'region': result.get('region'),
-                        'lsoa': result.get('lsoa'),
-                        'msoa': result.get('msoa'),
-                        'incode': result.get('incode'),
-                        'outcode': result.get('outcode'),
-                        'parliamentary_constituency': result.get('parliamentary_constituency'),
-                        'admin_district': result.get('admin_district'),
-                        'parish': result.get('parish'),
-                        'admin_county': result.get('admin_county'),
-                        'admin_ward': result.get('admin_ward'),
-                        'ced': result.get('ced'),
-                        'ccg': result.get('ccg'),
-                        'nuts': result.get('nuts'),
-                        'codes': result.get('codes', {})
+                        'eastings': result.get('eastings'),
+                        'northings': result.get('northings'),
+                        'admin_district': result.get('admin_district') or [],
+                        'region': result.get('region') or [],
+                        'country': result.get('country') or []
                     }
                 }
+                self.cache.set(cache_key, info)
+                return info
             else:
-                return {
+                info = {
                     'status': 'error',
-                    'postcode': postcode,
-                    'message': f'Postcode not found: {response.status_code}'
+                    'outcode': outcode,
+                    'message': f'Outcode not found: {response.status_code}'
                 }
+                if response.status_code == 404:
+                    self.cache.set(cache_key, info, negative=True)
+                return info
                 
-        except requests.RequestException as e:
-            logger.error(f"Postcodes.io API request failed: {e}")
-            return {
-                'status': 'error',
-                'postcode': postcode,
-                'message': f'Network error: {str(e)}'
-            }
         except Exception as e:
-            logger.error(f"Postcode lookup error: {e}")
+            logger.error(f"Outcode lookup error: {e}")
             return {
                 'status': 'error',
-                'postcode': postcode,
+                'outcode': outcode,
                 'message': f'Lookup error: {str(e)}'
             }
     
+    def format_postcode_data(self, result: Dict) -> Dict:
+        """
+        Shape a Postcodes.io lookup result into the fields exposed by DriveEver
+        
+        Args:
+            result (Dict): Postcode result object from Postcodes.io
+            
+        Returns:
+            Dict: Postcode information
+        """
+        return {
+            'postcode': result.get('postcode'),
+            'quality': result.get('quality'),
+            'eastings': result.get('eastings'),
+            'northings': result.get('northings'),
+            'country': result.get('country'),
+            'nhs_ha': result.get('nhs_ha'),
+            'longitude': result.get('longitude'),
+            'latitude': result.get('latitude'),
+            'european_electoral_region': result.get('european_electoral_region'),
+            'primary_care_trust': result.get('primary_care_trust'),
+            'region': result.get('region'),
+            'lsoa': result.get('lsoa'),
+            'msoa': result.get('msoa'),
+            'incode': result.get('incode'),
+            'outcode': result.get('outcode'),
+            'parliamentary_constituency': result.get('parliamentary_constituency'),
+            'admin_district': result.get('admin_district'),
+            'parish': result.get('parish'),
+            'admin_county': result.get('admin_county'),
+            'admin_ward': result.get('admin_ward'),
+            'ced': result.get('ced'),
+            'ccg': result.get('ccg'),
+            'nuts': result.get('nuts'),
+            'codes': result.get('codes', {})
+        }
+    
     def find_nearest_postcodes(self, postcode: str, limit: int = 10) -> Dict:
         """
         Find nearest postcodes to a given postcode
@@ -157,46 +363,95 @@ class PostcodesIOService:
         """
         try:
             clean_postcode = postcode.replace(' ', '').upper()
+            
+            cache_key = f'nearest:{clean_postcode}:{limit}'
+            found, cached = self.cache.get(cache_key)
+            if found:
+                return cached
+            
             url = f"{self.BASE_URL}/postcodes/{clean_postcode}/nearest"
-            params = {'limit': limit}
             
-            response = self.session.get(url, params=params, timeout=10)
+            def fetch():
+                response = self.session.get(url, params={'limit': limit}, timeout=10)
+                nearest, negative = self._nearest(postcode, clean_postcode, response)
+                if negative is not None:
+                    self.cache.set(cache_key, nearest, negative=negative)
+                return nearest
             
-            if response.status_code == 200:
-                data = response.json()
-                results = data.get('result', [])
+            return self.flights.do(cache_key, fetch, recheck=lambda: self.cache.get(cache_key))
                 
-                return {
-                    'status': 'success',
-                    'reference_postcode': clean_postcode,
-                    'nearest_postcodes': [
-                        {
-                            'postcode': p.get('postcode'),
-                            'distance': p.get('distance'),
-                            'longitude': p.get('longitude'),
-                            'latitude': p.get('latitude')
-                        }
-                        for p in results
-                    ]
-                }
-            else:
-                return {
-                    'status': 'error',
-                    'reference_postcode': postcode,
-                    'message': f'Nearest postcodes lookup failed: {response.status_code}'
-                }
+        except Exception as e:
+            return self._nearest_error(postcode, e)
+    
+    async def afind_nearest_postcodes(self, postcode: str, limit: int = 10) -> Dict:
+        """Async version of find_nearest_postcodes"""
+        try:
+            clean_postcode = postcode.replace(' ', '').upper()
+            
+            cache_key = f'nearest:{clean_postcode}:{limit}'
+            found, cached = await self.cache.aget(cache_key)
+            if found:
+                return cached
+            
+            url = f"{self.BASE_URL}/postcodes/{clean_postcode}/nearest"
+            
+            async def fetch():
+                response = await self.async_session.get(url, params={'limit': limit}, timeout=10)
+                nearest, negative = self._nearest(postcode, clean_postcode, response)
+                if negative is not None:
+                    await self.cache.aset(cache_key, nearest, negative=negative)
+                return nearest
+            
+            return await self.flights.ado(cache_key, fetch, recheck=lambda: self.cache.aget(cache_key))
                 
         except Exception as e:
-            logger.error(f"Nearest postcodes lookup error: {e}")
-            return {
+            return self._nearest_error(postcode, e)
+    
+    def _nearest(self, postcode: str, clean_postcode: str, response) -> Tuple[Dict, Optional[bool]]:
+        """
+        Turn a nearest postcodes response into a result
+        
+        Returns:
+            Tuple[Dict, Optional[bool]]: (result, whether to cache it as a
+            negative result, or None if it shouldn't be cached)
+        """
+        if response.status_code == 200:
+            data = response.json()
+            results = data.get('result') or []
+            
+            nearest = {
+                'status': 'success',
+                'reference_postcode': clean_postcode,
+                'nearest_postcodes': [
+                    {
+                        'postcode': p.get('postcode'),
+                        'distance': p.get('distance'),
+                        'longitude': p.get('longitude'),
+                        'latitude': p.get('latitude')
+                    }
+                    for p in results
+                ]
+            }
+            return nearest, False
+        else:
+            nearest = {
                 'status': 'error',
                 'reference_postcode': postcode,
-                'message': f'Lookup error: {str(e)}'
+                'message': f'Nearest postcodes lookup failed: {response.status_code}'
             }
+            return nearest, True if response.status_code == 404 else None
+    
+    def _nearest_error(self, postcode: str, e: Exception) -> Dict:
+        logger.error(f"Nearest postcodes lookup error: {e}")
+        return {
+            'status': 'error',
+            'reference_postcode': postcode,
+            'message': f'Lookup error: {str(e)}'
+        }
     
     def bulk_postcode_lookup(self, postcodes: List[str]) -> Dict:
         """
-        Lookup multiple postcodes in a single request
+        Lookup multiple postcodes, one request per BULK_LIMIT postcodes
         
         Args:
             postcodes (List[str]): List of postcodes to lookup
@@ -215,30 +470,33 @@ class PostcodesIOService:
                 }
             
             url = f"{self.BASE_URL}/postcodes"
-            payload = {'postcodes': clean_postcodes}
+            results = []
             
-            response = self.session.post(url, json=payload, timeout=15)
-            
-            if response.status_code == 200:
-                data = response.json()
-                results = data.get('result', [])
+            for start in range(0, len(clean_postcodes), self.BULK_LIMIT):
+                payload = {'postcodes': clean_postcodes[start:start + self.BULK_LIMIT]}
+                # A lookup, so safe to retry even though it's a POST
+                response = self.session.post(url, json=payload, timeout=15, idempotent=True)
                 
-                return {
-                    'status': 'success',
-                    'results': [
-                        {
-                            'query': r.get('query'),
-                            'result': r.get('result', {}),
-                            'valid': r.get('result') is not None
-                        }
-                        for r in results
-                    ]
-                }
-            else:
-                return {
-                    'status': 'error',
-                    'message': f'Bulk lookup failed: {response.status_code}'
-                }
+                if response.status_code != 200:
+                    return {
+                        'status': 'error',
+                        'message': f'Bulk lookup failed: {response.status_code}'
+                    }
+                
+                data = response.json()
+                results.extend(data.get('result') or [])
+            
+            return {
+                'status': 'success',
+                'results': [
+                    {
+                        'query': r.get('query'),
+                        'result': r.get('result', {}),
+                        'valid': r.get('result') is not None
+                    }
+                    for r in results
+                ]
+            }
                 
         except Exception as e:
             logger.error(f"Bulk postcode lookup error: {e}")
@@ -247,6 +505,75 @@ class PostcodesIOService:
                 'message': f'Bulk lookup error: {str(e)}'
             }
     
+    def resolve_postcodes(self, postcodes: List[str]) -> List[Dict]:
+        """
+        Resolve many postcodes at once
+        
+        Cached resolutions are reused and the rest are fetched with the bulk
+        lookup endpoint, so the number of upstream requests depends on the
+        number of uncached postcodes divided by BULK_LIMIT. Fetched results are
+        cached for later resolve_postcode calls.
+        
+        Args:
+            postcodes (List[str]): UK postcodes to resolve
+            
+        Returns:
+            List[Dict]: One resolution per input postcode, in input order
+        """
+        clean_postcodes = [p.replace(' ', '').upper() for p in postcodes]
+        resolutions = {}
+        
+        for clean_postcode in set(clean_postcodes):
+            found, cached = self.cache.get(f'resolve:{clean_postcode}')
+            if found:
+                resolutions[clean_postcode] = cached
+        
+        uncached = [p for p in dict.fromkeys(clean_postcodes) if p and p not in resolutions]
+        if uncached:
+            lookup = self.bulk_postcode_lookup(uncached)
+            
+            if lookup['status'] == 'success':
+                for item in lookup['results']:
+                    clean_postcode = (item.get('query') or '').replace(' ', '').upper()
+                    if item['valid']:
+                        resolution = {
+                            'valid': True,
+                            'status': 'success',
+                            'postcode': clean_postcode,
+                            'data': self.format_postcode_data(item['result'])
+                        }
+                        self.cache.set(f'resolve:{clean_postcode}', resolution)
+                    else:
+                        resolution = {
+                            'valid': False,
+                            'status': 'success',
+                            'postcode': clean_postcode,
+                            'data': None,
+                            'message': 'Postcode not found: 404'
+                        }
+                        self.cache.set(f'resolve:{clean_postcode}', resolution, negative=True)
+                    resolutions[clean_postcode] = resolution
+            else:
+                for clean_postcode in uncached:
+                    resolutions[clean_postcode] = {
+                        'valid': False,
+                        'status': 'error',
+                        'postcode': clean_postcode,
+                        'data': None,
+                        'message': lookup.get('message', 'Bulk lookup failed')
+                    }
+        
+        return [
+            resolutions.get(clean_postcode) or {
+                'valid': False,
+                'status': 'success',
+                'postcode': clean_postcode,
+                'data': None,
+                'message': 'Postcode not found: 404'
+            }
+            for clean_postcode in clean_postcodes
+        ]
+    
     def autocomplete_postcode(self, partial_postcode: str, limit: int = 10) -> Dict:
         """
         Autocomplete partial postcode input
@@ -260,6 +587,12 @@ class PostcodesIOService:
         """
         try:
             clean_partial = partial_postcode.replace(' ', '').upper()
+            
+            cache_key = f'autocomplete:{clean_partial}:{limit}'
+            found, cached = self.cache.get(cache_key)
+            if found:
+                return cached
+            
             url = f"{self.BASE_URL}/postcodes/{clean_partial}/autocomplete"
             params = {'limit': limit}
             
@@ -269,11 +602,13 @@ class PostcodesIOService:
                 data = response.json()
                 suggestions = data.get('result', [])
                 
-                return {
+                result = {
                     'status': 'success',
                     'partial': clean_partial,
                     'suggestions': suggestions
                 }
+                self.cache.set(cache_key, result, negative=not suggestions)
+                return result
             else:
                 return {
                     'status': 'error',
@@ -301,11 +636,10 @@ class PostcodesIOService:
             Dict: Distance calculation result
         """
         try:
-            # Get coordinates for both postcodes
-            info1 = self.get_postcode_info(postcode1)
-            info2 = self.get_postcode_info(postcode2)
+            # Get coordinates for both postcodes with one (cached) bulk lookup
+            info1, info2 = self.resolve_postcodes([postcode1, postcode2])
             
-            if info1['status'] != 'success' or info2['status'] != 'success':
+            if not info1['valid'] or not info2['valid']:
                 return {
                     'status': 'error',
                     'message': 'Could not get coordinates for one or both postcodes'
@@ -342,6 +676,67 @@ class PostcodesIOService:
                 'message': f'Distance calculation error: {str(e)}'
             }
     
+    def distance_matrix(self, origins: List[str], destinations: List[str], unit: str = 'km') -> Dict:
+        """
+        Calculate distances between every origin and every destination postcode
+        
+        All postcodes are resolved together (cache first, then bulk lookups)
+        and the matrix is computed with vectorised haversine.
+        
+        Args:
+            origins (List[str]): Origin postcodes (matrix rows)
+            destinations (List[str]): Destination postcodes (matrix columns)
+            unit (str): 'km' or 'miles'
+            
+        Returns:
+            Dict: Distance matrix, with None for pairs involving an invalid postcode
+        """
+        try:
+            factor = 0.621371 if unit == 'miles' else 1.0
+            
+            clean_origins = [p.replace(' ', '').upper() for p in origins]
+            clean_destinations = [p.replace(' ', '').upper() for p in destinations]
+            unique_postcodes = list(dict.fromkeys(clean_origins + clean_destinations))
+            
+            resolved = dict(zip(unique_postcodes, self.resolve_postcodes(unique_postcodes)))
+            if any(r['status'] == 'error' for r in resolved.values()):
+                return {
+                    'status': 'error',
+                    'message': 'Could not get coordinates for the postcodes'
+                }
+            
+            def coordinates(postcodes):
+                valid = [i for i, p in enumerate(postcodes) if resolved[p]['valid']]
+                lats = [resolved[postcodes[i]]['data']['latitude'] for i in valid]
+                lons = [resolved[postcodes[i]]['data']['longitude'] for i in valid]
+                return valid, lats, lons
+            
+            origin_index, origin_lats, origin_lons = coordinates(clean_origins)
+            destination_index, destination_lats, destination_lons = coordinates(clean_destinations)
+            
+            shape = (len(clean_origins), len(clean_destinations))
+            if origin_index and destination_index:
+                distances = haversine_matrix(origin_lats, origin_lons, destination_lats, destination_lons)
+                matrix = place_matrix(distances, origin_index, destination_index, shape, scale=factor)
+            else:
+                matrix = [[None] * shape[1] for _ in range(shape[0])]
+            
+            return {
+                'status': 'success',
+                'unit': 'miles' if unit == 'miles' else 'km',
+                'origins': clean_origins,
+                'destinations': clean_destinations,
+                'matrix': matrix,
+                'invalid_postcodes': [p for p in unique_postcodes if not resolved[p]['valid']]
+            }
+            
+        except Exception as e:
+            logger.error(f"Distance matrix error: {e}")
+            return {
+                'status': 'error',
+                'message': f'Distance matrix error: {str(e)}'
+            }
+    
     def _haversine_distance(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
         """
         Calculate distance between two points using Haversine formula
@@ -353,24 +748,24 @@ class PostcodesIOService:
         Returns:
             float: Distance in kilometers
         """
-        import math
-        
-        # Convert to radians
-        lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
-        
-        # Haversine formula
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
-        a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-        c = 2 * math.asin(math.sqrt(a))
-        
-        # Earth's radius in kilometers
-        r = 6371
-        
-        return c * r
+        return haversine_km(lat1, lon1, lat2, lon2)
+
+def build_postcode_service() -> PostcodesIOService:
+    """
+    Create the postcode service configured by settings.POSTCODE_BACKEND
+    
+    'remote' (default) uses the Postcodes.io API for every lookup, 'local'
+    answers from the snapshot in settings.POSTCODE_DATA_FILE and only falls
+    back to Postcodes.io for unknown postcodes.
+    """
+    backend = getattr(settings, 'POSTCODE_BACKEND', 'remote')
+    if backend == 'local':
+        from .local_postcode_service import LocalPostcodeService
+        return LocalPostcodeService()
+    return PostcodesIOService()
 
 # Global instance for easy access
-postcode_service = PostcodesIOService()
+postcode_service = build_postcode_service()
 
 
 
@@ -0,0 +1,60 @@
+"""
+Postcode string helpers for DriveEver
+Normalising, formatting and splitting UK postcodes without any API calls
+"""
+
+import re
+from typing import List, Optional
+
+FULL_POSTCODE_RE = re.compile(r'^[A-Z]{1,2}\d[A-Z\d]?\d[A-Z]{2}$')
+OUTCODE_RE = re.compile(r'^[A-Z]{1,2}\d[A-Z\d]?$')
+POSTCODE_IN_TEXT_RE = re.compile(r'\b([A-Z]{1,2}\d[A-Z\d]?) ?\d[A-Z]{2}\b')
+
+
+def clean_postcode(postcode: str) -> str:
+    """Normalise a postcode to the compact upper-case form ("sw1a 1aa" -> "SW1A1AA")"""
+    return postcode.replace(' ', '').upper()
+
+
+def format_postcode(compact: str) -> str:
+    """Insert the space between outward and inward codes ("SW1A1AA" -> "SW1A 1AA")"""
+    return f'{compact[:-3]} {compact[-3:]}' if len(compact) > 3 else compact
+
+
+def outcode_of(postcode: str) -> Optional[str]:
+    """
+    Return the outward code of a full postcode or bare outcode
+
+    Returns None if the value is neither ("LN5 8NY" -> "LN5", "LN5" -> "LN5").
+    """
+    compact = clean_postcode(postcode)
+    if FULL_POSTCODE_RE.match(compact):
+        return compact[:-3]
+    if OUTCODE_RE.match(compact):
+        return compact
+    return None
+
+
+def extract_outcodes(postcodes: Optional[str]) -> List[str]:
+    """
+    Split a free-text coverage list ("LN1, LN2, LN5 8NY") into unique outcodes
+
+    Entries that are not a postcode or outcode are ignored.
+    """
+    outcodes = []
+    for entry in re.split(r'[,;\n]', postcodes or ''):
+        outcode = outcode_of(entry.strip())
+        if outcode and outcode not in outcodes:
+            outcodes.append(outcode)
+    return outcodes
+
+
+def outcodes_in_text(text: Optional[str]) -> List[str]:
+    """
+    Find the outcodes of every full postcode written in free text, such as an address
+    """
+    outcodes = []
+    for match in POSTCODE_IN_TEXT_RE.finditer((text or '').upper()):
+        if match.group(1) not in outcodes:
+            outcodes.append(match.group(1))
+    return outcodes
@@ -6,12 +6,24 @@ Provides postcode validation, lookup, and geolocation services
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
 from .postcode_service import postcode_service
+from .throttling import SlidingWindowThrottle
 import logging
 
 logger = logging.getLogger(__name__)
 
+
+class DistanceMatrixThrottle(SlidingWindowThrottle):
+    """
+    Per-client limit on distance matrices (THROTTLE_RATES['distance_matrix'])
+    """
+    scope = 'distance_matrix'
+    
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
 class PostcodeValidationView(APIView):
     """
     Validate UK postcodes using Postcodes.io API
@@ -97,10 +109,22 @@ class NearestPostcodesView(APIView):
     """
     permission_classes = [AllowAny]
     
+    def parse_limit(self, request):
+        """The ?limit= parameter, or a 400 response if it isn't a positive integer"""
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            limit = 0
+        if limit <= 0:
+            return Response(
+                {'error': 'limit must be a positive integer'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return limit
+    
     def get(self, request):
         """Find nearest postcodes"""
         postcode = request.query_params.get('postcode', '').strip()
-        limit = request.query_params.get('limit', 10)
         
         if not postcode:
             return Response(
@@ -108,8 +132,12 @@ class NearestPostcodesView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        limit = self.parse_limit(request)
+        if isinstance(limit, Response):
+            return limit
+        
         try:
-            result = postcode_service.find_nearest_postcodes(postcode, int(limit))
+            result = postcode_service.find_nearest_postcodes(postcode, limit)
             return Response(result, status=status.HTTP_200_OK)
         except Exception as e:
             logger.error(f"Nearest postcodes lookup error: {e}")
@@ -145,6 +173,60 @@ class DistanceCalculationView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+class DistanceMatrixView(APIView):
+    """
+    Calculate distances between many origin and destination postcodes
+    """
+    permission_classes = [AllowAny]
+    throttle_classes = [DistanceMatrixThrottle]  # Matrices can cost many upstream lookups
+    
+    MAX_POSTCODES = 1000  # per list
+    MAX_CELLS = 10000  # origins x destinations
+    
+    def post(self, request):
+        """Calculate a distance matrix"""
+        origins = request.data.get('origins', [])
+        destinations = request.data.get('destinations', [])
+        unit = request.data.get('unit', 'km')
+        
+        if not origins or not destinations or not isinstance(origins, list) or not isinstance(destinations, list):
+            return Response(
+                {'error': 'Origins and destinations must be non-empty lists'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if unit not in ('km', 'miles'):
+            return Response(
+                {'error': 'Unit must be km or miles'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if max(len(origins), len(destinations)) > self.MAX_POSTCODES:
+            return Response(
+                {'error': f'At most {self.MAX_POSTCODES} origins and {self.MAX_POSTCODES} destinations can be given'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if len(origins) * len(destinations) > self.MAX_CELLS:
+            return Response(
+                {'error': f'At most {self.MAX_CELLS} origin and destination pairs can be given'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            result = postcode_service.distance_matrix(
+                [str(p) for p in origins],
+                [str(p) for p in destinations],
+                unit
+            )
+            return Response(result, status=status.HTTP_200_OK)
+        except Exception as e:
+            logger.error(f"Distance matrix error: {e}")
+            return Response(
+                {'error': 'Distance matrix calculation failed'}, 
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
 class BulkPostcodeLookupView(APIView):
     """
     Lookup multiple postcodes in a single request
@@ -214,5 +296,12 @@ class PostcodeSearchView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-
-
+class PostcodeCacheStatsView(APIView):
+    """
+    Hit/miss counters for the postcode response cache
+    """
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request):
+        """Get postcode cache statistics"""
+        return Response(postcode_service.cache_stats(), status=status.HTTP_200_OK)
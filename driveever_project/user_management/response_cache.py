@@ -0,0 +1,193 @@
+"""
+Response caching helpers for DriveEver integrations
+Provides a bounded in-process LRU cache with per-entry TTLs and a tiered cache
+that layers it in front of an optional shared Django cache
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from django.core.cache import caches
+
+MISSING = object()
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache bounded by entry count
+
+    Every entry carries its own expiry time, so positive and negative
+    results can share one cache with different TTLs.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default: Any = MISSING) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class TieredCache:
+    """
+    In-process LRU cache in front of an optional shared Django cache
+
+    Lookups try the local LRU first, then the shared cache (if a cache alias
+    is configured), promoting shared hits into the LRU for their remaining
+    lifetime. Negative results (e.g. "postcode not found") are stored with a
+    separate, usually shorter, TTL.
+
+    aget() and aset() are for async code: the LRU is in memory, and the
+    shared cache is reached through Django's async cache methods.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        max_entries: int = 10000,
+        ttl: float = 3600,
+        negative_ttl: float = 300,
+        cache_alias: Optional[str] = None
+    ):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.cache_alias = cache_alias
+        self.local = LRUCache(max_entries)
+        self._counter_lock = threading.Lock()
+        self._counters = {
+            'local_hits': 0,
+            'shared_hits': 0,
+            'misses': 0,
+            'sets': 0,
+            'negative_sets': 0,
+        }
+
+    @property
+    def shared(self):
+        return caches[self.cache_alias] if self.cache_alias else None
+
+    def _shared_key(self, key: str) -> str:
+        return f'{self.namespace}:{key}'
+
+    def _count(self, counter: str) -> None:
+        with self._counter_lock:
+            self._counters[counter] += 1
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """
+        Look up a key
+
+        Returns:
+            Tuple[bool, Any]: (found, value)
+        """
+        value = self.local.get(key)
+        if value is not MISSING:
+            self._count('local_hits')
+            return True, value
+
+        shared = self.shared
+        entry = shared.get(self._shared_key(key)) if shared is not None else None
+        return self._promote(key, entry)
+
+    async def aget(self, key: str) -> Tuple[bool, Any]:
+        """Async version of get"""
+        value = self.local.get(key)
+        if value is not MISSING:
+            self._count('local_hits')
+            return True, value
+
+        shared = self.shared
+        entry = await shared.aget(self._shared_key(key)) if shared is not None else None
+        return self._promote(key, entry)
+
+    def _promote(self, key: str, entry: Optional[Tuple[float, Any]]) -> Tuple[bool, Any]:
+        """Copy a live shared entry into the LRU, counting the lookup's outcome"""
+        if entry is not None:
+            expires_at, value = entry
+            remaining = expires_at - time.time()
+            if remaining > 0:
+                self.local.set(key, value, remaining)
+                self._count('shared_hits')
+                return True, value
+
+        self._count('misses')
+        return False, None
+
+    def set(self, key: str, value: Any, negative: bool = False) -> None:
+        """Store a value, using the negative TTL for "not found" style results"""
+        ttl = self._store_local(key, value, negative)
+        shared = self.shared
+        if shared is not None:
+            shared.set(self._shared_key(key), (time.time() + ttl, value), int(ttl))
+
+    async def aset(self, key: str, value: Any, negative: bool = False) -> None:
+        """Async version of set"""
+        ttl = self._store_local(key, value, negative)
+        shared = self.shared
+        if shared is not None:
+            await shared.aset(self._shared_key(key), (time.time() + ttl, value), int(ttl))
+
+    def _store_local(self, key: str, value: Any, negative: bool) -> float:
+        ttl = self.negative_ttl if negative else self.ttl
+        self.local.set(key, value, ttl)
+        self._count('negative_sets' if negative else 'sets')
+        return ttl
+
+    def delete(self, key: str) -> None:
+        self.local.delete(key)
+        shared = self.shared
+        if shared is not None:
+            shared.delete(self._shared_key(key))
+
+    def clear(self) -> None:
+        """Clear the local layer (the shared layer expires on its own)"""
+        self.local.clear()
+
+    def stats(self) -> Dict:
+        with self._counter_lock:
+            counters = dict(self._counters)
+
+        hits = counters['local_hits'] + counters['shared_hits']
+        lookups = hits + counters['misses']
+        return {
+            'namespace': self.namespace,
+            **counters,
+            'hits': hits,
+            'hit_ratio': round(hits / lookups, 4) if lookups else None,
+            'entries': len(self.local),
+            'max_entries': self.local.max_entries,
+            'ttl': self.ttl,
+            'negative_ttl': self.negative_ttl,
+            'shared_cache': self.cache_alias,
+        }
@@ -0,0 +1,148 @@
+"""
+Search result cache for DriveEver
+Caches UserSearchView responses per outcode and invalidates them per outcode
+when instructors, their availability or academies change
+"""
+
+import threading
+import time
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .response_cache import TieredCache
+
+
+def normalise_price(value: Optional[str]) -> str:
+    """
+    Normalise a price filter for use in a cache key ("30", "30.0" and "30.00" share a key)
+
+    Values the search ignores (blank or not a number) all map to ''.
+    """
+    try:
+        return str(Decimal(value).normalize())
+    except (TypeError, ValueError, InvalidOperation):
+        return ''
+
+
+class SearchResultCache:
+    """
+    Search responses keyed on the normalised query, versioned per outcode
+
+    Each outcode has a generation counter in a Django cache that every
+    process shares. The generation is part of every result key, so bumping
+    it for an outcode makes all cached searches for that outcode unreachable
+    without touching any other outcode. Stale entries then expire on their
+    own TTL.
+
+    A generation only ever goes up. Counters start from the clock (in
+    microseconds) rather than 0 or 1, so one evicted from the generation
+    cache comes back ahead of every value it had, and results cached under
+    an old generation can't become reachable again.
+    """
+
+    DEFAULTS = {
+        'MAX_ENTRIES': 5000,
+        'TTL': 60 * 5,
+        'CACHE_ALIAS': None,
+        'GENERATION_CACHE_ALIAS': 'default',
+    }
+
+    def __init__(self, config: Optional[Dict] = None):
+        config = {**self.DEFAULTS, **(config or {})}
+        self.generation_alias = config['GENERATION_CACHE_ALIAS']
+        self.results = TieredCache(
+            'search',
+            max_entries=config['MAX_ENTRIES'],
+            ttl=config['TTL'],
+            negative_ttl=config['TTL'],
+            cache_alias=config['CACHE_ALIAS']
+        )
+        self._counter_lock = threading.Lock()
+        self._invalidations = 0
+
+    @property
+    def generations(self):
+        return caches[self.generation_alias]
+
+    def _generation_key(self, outcode: str) -> str:
+        return f'search-generation:{outcode}'
+
+    @staticmethod
+    def _seed() -> int:
+        return time.time_ns() // 1000
+
+    def generation(self, outcode: str) -> int:
+        """The outcode's current generation, starting one if it has none"""
+        generations = self.generations
+        key = self._generation_key(outcode)
+        generation = generations.get(key)
+        if generation is None:
+            generations.add(key, self._seed(), timeout=None)
+            generation = generations.get(key, 0)
+        return generation
+
+    def key(
+        self,
+        outcode: str,
+        user_type: str,
+        price_min: Optional[str],
+        price_max: Optional[str],
+        verified_only: bool,
+        **extra: Any
+    ) -> str:
+        """
+        Build the result key for a search in an outcode
+
+        Args:
+            outcode (str): Outcode of the searched postcode
+            user_type (str): '', 'instructor' or 'academy'
+            price_min (str): Raw price_min filter
+            price_max (str): Raw price_max filter
+            verified_only (bool): Verified instructors only
+            **extra: Anything else the response depends on (postcode, page, ...)
+        """
+        generation = self.generation(outcode)
+        parts = [
+            outcode,
+            str(generation),
+            user_type or 'all',
+            f'{normalise_price(price_min)}-{normalise_price(price_max)}',
+            'verified' if verified_only else 'any',
+        ]
+        parts.extend(f'{name}={extra[name]}' for name in sorted(extra))
+        return ':'.join(parts)
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        return self.results.get(key)
+
+    def set(self, key: str, value: Any) -> None:
+        self.results.set(key, value)
+
+    def invalidate(self, outcodes: Iterable[str]) -> None:
+        """Make every cached search in the given outcodes stale"""
+        generations = self.generations
+        for outcode in set(outcodes):
+            key = self._generation_key(outcode)
+            if not generations.add(key, self._seed(), timeout=None):
+                try:
+                    generations.incr(key)
+                except ValueError:
+                    # Evicted between add() and incr()
+                    generations.set(key, self._seed(), timeout=None)
+            with self._counter_lock:
+                self._invalidations += 1
+
+    def clear(self) -> None:
+        self.results.clear()
+
+    def stats(self) -> Dict:
+        stats = self.results.stats()
+        with self._counter_lock:
+            stats['invalidations'] = self._invalidations
+        return stats
+
+
+search_cache = SearchResultCache(getattr(settings, 'SEARCH_CACHE', None))
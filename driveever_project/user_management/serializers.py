@@ -1,6 +1,14 @@
 from rest_framework import serializers
-from .models import User, InstructorProfile, AcademyProfile, InstructorAvailability, Payment, Booking
+from .models import (
+    User, InstructorProfile, AcademyProfile, InstructorAvailability, AvailabilityException, Payment, Booking,
+    SlotHold, WaitlistEntry
+)
 from .postcode_service import postcode_service
+from .availability_bitmap import decode_bitmap, is_free
+from .booking_service import (
+    BOOKING_CONFLICT, blocked_bitmap, create_booking, day_availability, hold_slot, lesson_pricing
+)
+from .slot_engine import GRANULARITIES, LESSON_LENGTHS, to_minutes
 
 class UserSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, min_length=8)
@@ -148,7 +156,7 @@ class InstructorRegistrationSerializer(serializers.ModelSerializer):
         )
         
         # Create instructor profile
-        InstructorProfile.objects.create(
+        profile = InstructorProfile.objects.create(
             user=user,
             mobile_number=mobile_number,
             adi_number=adi_number,
@@ -156,6 +164,9 @@ class InstructorRegistrationSerializer(serializers.ModelSerializer):
             price_per_hour=price_per_hour
         )
         
+        # Fill in coverage centroids from the postcodes resolved during validation
+        profile.sync_coverage(centroids=getattr(self, '_coverage_centroids', None))
+        
         return user
     
     def validate_postcodes(self, value):
@@ -171,12 +182,12 @@ class InstructorRegistrationSerializer(serializers.ModelSerializer):
         if not postcode_list:
             raise serializers.ValidationError("At least one valid postcode is required.")
         
-        # Validate each postcode
-        invalid_postcodes = []
-        for postcode in postcode_list:
-            validation_result = postcode_service.validate_postcode(postcode)
-            if not validation_result['valid']:
-                invalid_postcodes.append(postcode)
+        # Validate all postcodes with bulk lookups (cached for later searches)
+        resolutions = postcode_service.resolve_postcodes(postcode_list)
+        invalid_postcodes = [
+            postcode for postcode, resolution in zip(postcode_list, resolutions)
+            if not resolution['valid']
+        ]
         
         if invalid_postcodes:
             raise serializers.ValidationError(
@@ -184,6 +195,17 @@ class InstructorRegistrationSerializer(serializers.ModelSerializer):
                 "Please enter valid UK postcodes."
             )
         
+        # Approximate each covered outcode's centroid by the first listed postcode in it
+        self._coverage_centroids = {}
+        for resolution in resolutions:
+            data = resolution['data']
+            if data and data.get('outcode') and data['outcode'] not in self._coverage_centroids:
+                self._coverage_centroids[data['outcode']] = {
+                    'latitude': data.get('latitude'),
+                    'longitude': data.get('longitude'),
+                    'district': data.get('admin_district')
+                }
+        
         return value
 
 class AcademyRegistrationSerializer(serializers.ModelSerializer):
@@ -264,8 +286,8 @@ class AcademyRegistrationSerializer(serializers.ModelSerializer):
         clean_postcode = value.strip()
         
         # Validate postcode
-        validation_result = postcode_service.validate_postcode(clean_postcode)
-        if not validation_result['valid']:
+        resolution = postcode_service.resolve_postcode(clean_postcode)
+        if not resolution['valid']:
             raise serializers.ValidationError(
                 f"'{clean_postcode}' is not a valid UK postcode. "
                 "Please enter a valid UK postcode."
@@ -310,7 +332,8 @@ class InstructorAvailabilitySerializer(serializers.ModelSerializer):
             'day_of_week_display', 'start_time', 'end_time', 'is_available', 
             'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        # The profile always comes from the logged-in instructor
+        read_only_fields = ['id', 'instructor_profile', 'created_at', 'updated_at']
     
     def validate(self, data):
         """
@@ -320,6 +343,26 @@ class InstructorAvailabilitySerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("End time must be after start time.")
         return data
 
+class AvailabilityExceptionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AvailabilityException
+        fields = ['id', 'date', 'start_time', 'end_time', 'is_available', 'reason', 'created_at']
+        read_only_fields = ['id', 'created_at']
+    
+    def validate(self, data):
+        """
+        Check the times: both or neither, end after start, and always set for extra availability
+        """
+        start_time = data.get('start_time')
+        end_time = data.get('end_time')
+        if (start_time is None) != (end_time is None):
+            raise serializers.ValidationError("Give both start and end time, or neither for the whole day.")
+        if start_time is not None and start_time >= end_time:
+            raise serializers.ValidationError("End time must be after start time.")
+        if data.get('is_available') and start_time is None:
+            raise serializers.ValidationError("Extra availability needs a start and end time.")
+        return data
+
 class PaymentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Payment
@@ -329,6 +372,58 @@ class PaymentSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'completed_at']
 
+
+def validate_booking_slot(data, instance=None, learner_id=None):
+    """
+    Validate a booking's date and time against availability, other bookings
+    and other learners' slot holds
+    
+    Shared by the booking and slot hold serializers; `instance` is the
+    booking being updated, which can't conflict with itself, and
+    `learner_id` is the learner booking, whose own holds don't block them.
+    """
+    # Ensure start time is before end time
+    if data['start_time'] >= data['end_time']:
+        raise serializers.ValidationError("End time must be after start time.")
+    
+    # Ensure lesson date is not in the past
+    from django.utils import timezone
+    if data['lesson_date'] < timezone.now().date():
+        raise serializers.ValidationError("Lesson date cannot be in the past.")
+    
+    # Check if instructor is available at this time, against their weekly availability
+    # bitmap and any exceptions for the date
+    start = to_minutes(data['start_time'])
+    end = to_minutes(data['end_time'])
+    profile = InstructorProfile.objects.filter(
+        user=data['instructor']
+    ).values_list('pk', 'availability_bitmap').first()
+    available = 0
+    if profile is not None:
+        available = day_availability(profile[0], decode_bitmap(profile[1]), data['lesson_date'])
+    
+    if not is_free(available, 0, start, end):
+        raise serializers.ValidationError(
+            "Instructor is not available at the selected time."
+        )
+    
+    # Check for conflicts against the day's bookings and holds
+    booked = blocked_bitmap(
+        data['instructor'].pk,
+        data['lesson_date'],
+        learner_id=learner_id,
+        exclude_id=instance.pk if instance is not None else None
+    )
+    
+    if not is_free(available, booked, start, end):
+        raise serializers.ValidationError(
+            "This time slot conflicts with an existing booking.",
+            code=BOOKING_CONFLICT
+        )
+    
+    return data
+
+
 class BookingSerializer(serializers.ModelSerializer):
     learner_name = serializers.CharField(source='learner.full_name', read_only=True)
     instructor_name = serializers.CharField(source='instructor.full_name', read_only=True)
@@ -349,50 +444,11 @@ class BookingSerializer(serializers.ModelSerializer):
         """
         Validate booking data
         """
-        # Ensure start time is before end time
-        if data['start_time'] >= data['end_time']:
-            raise serializers.ValidationError("End time must be after start time.")
-        
-        # Ensure lesson date is not in the past
-        from django.utils import timezone
-        if data['lesson_date'] < timezone.now().date():
-            raise serializers.ValidationError("Lesson date cannot be in the past.")
-        
-        # Check if instructor is available at this time
-        from datetime import datetime
-        lesson_datetime = datetime.combine(data['lesson_date'], data['start_time'])
-        day_of_week = lesson_datetime.weekday()
-        
-        # Check instructor availability for this day and time
-        from .models import InstructorAvailability
-        availability = InstructorAvailability.objects.filter(
-            instructor_profile__user=data['instructor'],
-            day_of_week=day_of_week,
-            start_time__lte=data['start_time'],
-            end_time__gte=data['end_time'],
-            is_available=True
-        ).first()
-        
-        if not availability:
-            raise serializers.ValidationError(
-                "Instructor is not available at the selected time."
-            )
-        
-        # Check for booking conflicts
-        conflicting_booking = Booking.objects.filter(
-            instructor=data['instructor'],
-            lesson_date=data['lesson_date'],
-            status__in=['pending', 'confirmed'],
-            start_time__lt=data['end_time'],
-            end_time__gt=data['start_time']
-        ).first()
-        
-        if conflicting_booking:
-            raise serializers.ValidationError(
-                "This time slot conflicts with an existing booking."
-            )
-        
-        return data
+        if self.instance is not None:
+            learner = data.get('learner', self.instance.learner)
+        else:
+            learner = data.get('learner')
+        return validate_booking_slot(data, self.instance, learner.pk if learner else None)
 
 class BookingCreateSerializer(serializers.ModelSerializer):
     """
@@ -413,13 +469,19 @@ class BookingCreateSerializer(serializers.ModelSerializer):
         # Get the instructor's price per hour
         try:
             instructor_profile = InstructorProfile.objects.get(user=data['instructor'])
-            data['price_per_hour'] = instructor_profile.price_per_hour
         except InstructorProfile.DoesNotExist:
             raise serializers.ValidationError("Instructor profile not found.")
         
-        # Validate the data using the main serializer
-        booking_serializer = BookingSerializer(data=data)
-        booking_serializer.is_valid(raise_exception=True)
+        # Validate the slot with the same checks as the main serializer
+        validate_booking_slot(data, learner_id=self.context['request'].user.pk)
+        
+        # Price the lesson from its times; duration_hours is optional, but must agree with them
+        pricing = lesson_pricing(instructor_profile.price_per_hour, data['start_time'], data['end_time'])
+        if 'duration_hours' in data and data['duration_hours'] != pricing['duration_hours']:
+            raise serializers.ValidationError({
+                'duration_hours': f"Doesn't match the lesson times ({pricing['duration_hours']} hours)."
+            })
+        data.update(pricing)
         
         return data
     
@@ -427,29 +489,125 @@ class BookingCreateSerializer(serializers.ModelSerializer):
         # Set the learner from the request user
         validated_data['learner'] = self.context['request'].user
         
-        # Create the booking
-        booking = Booking.objects.create(**validated_data)
+        # Create the booking, re-checking for conflicts under the instructor's row lock
+        booking = create_booking(**validated_data)
         return booking
 
+class BookingSeriesSerializer(serializers.Serializer):
+    """
+    Serializer for booking the same lesson time on a run of weekly dates
+    """
+    MAX_OCCURRENCES = 26
+    
+    instructor = serializers.PrimaryKeyRelatedField(queryset=User.objects.filter(user_type='instructor'))
+    start_date = serializers.DateField()
+    start_time = serializers.TimeField()
+    end_time = serializers.TimeField()
+    occurrences = serializers.IntegerField(min_value=1, max_value=MAX_OCCURRENCES)
+    interval_weeks = serializers.IntegerField(min_value=1, max_value=4, default=1)
+    allow_partial = serializers.BooleanField(default=False)
+    
+    lesson_type = serializers.CharField(max_length=50, required=False, allow_blank=True)
+    pickup_location = serializers.CharField(max_length=255, required=False, allow_blank=True)
+    dropoff_location = serializers.CharField(max_length=255, required=False, allow_blank=True)
+    notes = serializers.CharField(required=False, allow_blank=True)
+    
+    def validate(self, data):
+        if data['start_time'] >= data['end_time']:
+            raise serializers.ValidationError("End time must be after start time.")
+        
+        from django.utils import timezone
+        if data['start_date'] < timezone.now().date():
+            raise serializers.ValidationError("Lesson date cannot be in the past.")
+        
+        return data
+    
+    def lesson_dates(self):
+        """Every date in the series"""
+        from datetime import timedelta
+        data = self.validated_data
+        step = timedelta(weeks=data['interval_weeks'])
+        return [data['start_date'] + step * index for index in range(data['occurrences'])]
+
+class SlotHoldSerializer(serializers.ModelSerializer):
+    """
+    Serializer for holding a slot while a learner completes their booking
+    """
+    class Meta:
+        model = SlotHold
+        fields = ['id', 'instructor', 'lesson_date', 'start_time', 'end_time', 'expires_at']
+        read_only_fields = ['id', 'expires_at']
+    
+    def validate(self, data):
+        return validate_booking_slot(data, learner_id=self.context['request'].user.pk)
+    
+    def create(self, validated_data):
+        return hold_slot(
+            validated_data['instructor'].pk,
+            self.context['request'].user.pk,
+            validated_data['lesson_date'],
+            validated_data['start_time'],
+            validated_data['end_time']
+        )
+
+class HoldConfirmSerializer(serializers.Serializer):
+    """
+    Lesson details given when confirming a slot hold into a booking
+    """
+    lesson_type = serializers.CharField(max_length=50, required=False, allow_blank=True)
+    pickup_location = serializers.CharField(max_length=255, required=False, allow_blank=True)
+    dropoff_location = serializers.CharField(max_length=255, required=False, allow_blank=True)
+    notes = serializers.CharField(required=False, allow_blank=True)
+
+class WaitlistEntrySerializer(serializers.ModelSerializer):
+    """
+    Serializer for joining and listing a learner's waitlist entries
+    """
+    MAX_DAYS = 90
+    
+    instructor_name = serializers.CharField(source='instructor.full_name', read_only=True)
+    hold_expires_at = serializers.DateTimeField(source='hold.expires_at', read_only=True)
+    
+    class Meta:
+        model = WaitlistEntry
+        fields = [
+            'id', 'instructor', 'instructor_name', 'earliest_date', 'latest_date',
+            'preferred_start_time', 'preferred_end_time', 'status', 'hold', 'hold_expires_at',
+            'offered_date', 'offered_start_time', 'offered_end_time', 'offered_at', 'created_at'
+        ]
+        read_only_fields = [
+            'id', 'status', 'hold', 'offered_date', 'offered_start_time', 'offered_end_time',
+            'offered_at', 'created_at'
+        ]
+    
+    def validate(self, data):
+        from django.utils import timezone
+        
+        if data['earliest_date'] > data['latest_date']:
+            raise serializers.ValidationError("latest_date must not be before earliest_date.")
+        if data['latest_date'] <= timezone.now().date():
+            raise serializers.ValidationError("The date window must include a future date.")
+        if (data['latest_date'] - data['earliest_date']).days + 1 > self.MAX_DAYS:
+            raise serializers.ValidationError(f"The date window cannot be longer than {self.MAX_DAYS} days.")
+        
+        start_time = data.get('preferred_start_time')
+        end_time = data.get('preferred_end_time')
+        if start_time is not None and end_time is not None and start_time >= end_time:
+            raise serializers.ValidationError("preferred_end_time must be after preferred_start_time.")
+        return data
+
 class AvailabilityCheckSerializer(serializers.Serializer):
     """
     Serializer for checking instructor availability
     """
     instructor_id = serializers.IntegerField()
     date = serializers.DateField()
-    
-    def validate_instructor_id(self, value):
-        """
-        Validate that the instructor exists and is active
-        """
-        from .models import User, InstructorProfile
-        
-        try:
-            instructor = User.objects.get(id=value, user_type='instructor')
-            profile = InstructorProfile.objects.get(user=instructor, is_active=True)
-            return value
-        except (User.DoesNotExist, InstructorProfile.DoesNotExist):
-            raise serializers.ValidationError("Instructor not found or not active.")
+    lesson_minutes = serializers.ChoiceField(choices=LESSON_LENGTHS, default=60)
+    granularity = serializers.ChoiceField(
+        choices=GRANULARITIES,
+        default=60,
+        help_text="Minutes between candidate start times"
+    )
     
     def validate_date(self, value):
         """
@@ -459,3 +617,48 @@ class AvailabilityCheckSerializer(serializers.Serializer):
         if value < timezone.now().date():
             raise serializers.ValidationError("Date cannot be in the past.")
         return value
+
+
+class AvailabilityRangeSerializer(serializers.Serializer):
+    """
+    Serializer for checking several instructors' availability over a date range
+    """
+    MAX_INSTRUCTORS = 50
+    MAX_DAYS = 31
+    
+    instructor_ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        max_length=MAX_INSTRUCTORS
+    )
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    lesson_minutes = serializers.ChoiceField(choices=LESSON_LENGTHS, default=60)
+    granularity = serializers.ChoiceField(
+        choices=GRANULARITIES,
+        default=60,
+        help_text="Minutes between candidate start times"
+    )
+    
+    def validate_start_date(self, value):
+        """
+        Validate that the range does not start in the past
+        """
+        from django.utils import timezone
+        if value < timezone.now().date():
+            raise serializers.ValidationError("Start date cannot be in the past.")
+        return value
+    
+    def validate(self, data):
+        """
+        Validate the date range
+        """
+        if data['end_date'] < data['start_date']:
+            raise serializers.ValidationError("End date must not be before start date.")
+        
+        if (data['end_date'] - data['start_date']).days >= self.MAX_DAYS:
+            raise serializers.ValidationError(f"Date range cannot be longer than {self.MAX_DAYS} days.")
+        
+        # Drop repeated IDs, keeping the requested order
+        data['instructor_ids'] = list(dict.fromkeys(data['instructor_ids']))
+        return data
@@ -0,0 +1,157 @@
+"""
+Signal handlers for DriveEver
+Invalidate cached search results for the outcodes touched by a change and
+keep derived availability bitmaps up to date
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import AcademyProfile, InstructorAvailability, InstructorCoverage, InstructorProfile, User
+from .postcode_utils import extract_outcodes, outcode_of, outcodes_in_text
+from .search_cache import search_cache
+
+
+# User fields shown in search results
+SEARCH_USER_FIELDS = ('full_name', 'email', 'username')
+
+
+def invalidate_searches(outcodes):
+    """
+    Invalidate cached searches in some outcodes once the current transaction commits
+
+    Bumping the generation before the commit would let a search that runs in
+    between cache the old rows under the new generation.
+    """
+    outcodes = list(outcodes)
+    if outcodes:
+        transaction.on_commit(lambda: search_cache.invalidate(outcodes))
+
+
+def academy_outcodes(main_postcode, address):
+    outcodes = outcodes_in_text(address)
+    main_outcode = outcode_of(main_postcode or '')
+    if main_outcode and main_outcode not in outcodes:
+        outcodes.append(main_outcode)
+    return outcodes
+
+
+@receiver(pre_save, sender=InstructorProfile)
+def remember_instructor_outcodes(sender, instance, update_fields=None, **kwargs):
+    """Keep the outcodes an instructor covered before this save"""
+    instance._previous_outcodes = []
+    if instance.pk and (update_fields is None or 'postcodes' in update_fields):
+        previous = sender.objects.filter(pk=instance.pk).values_list('postcodes', flat=True).first()
+        instance._previous_outcodes = extract_outcodes(previous)
+
+
+@receiver(post_save, sender=InstructorProfile)
+def instructor_saved(sender, instance, **kwargs):
+    outcodes = extract_outcodes(instance.postcodes)
+    invalidate_searches(outcodes + getattr(instance, '_previous_outcodes', []))
+
+
+@receiver(post_delete, sender=InstructorProfile)
+def instructor_deleted(sender, instance, **kwargs):
+    invalidate_searches(extract_outcodes(instance.postcodes))
+
+
+# Instructor profile ids whose availability changed inside deferred_availability_sync()
+_deferred_profiles = ContextVar('deferred_availability_profiles', default=None)
+
+
+def sync_availability(instructor_profile):
+    """
+    Rebuild an instructor's availability bitmap
+
+    Availability is also shown in search results for every outcode the instructor
+    covers. Saving a new bitmap already invalidates those through instructor_saved.
+    """
+    if instructor_profile.update_availability_bitmap():
+        return
+    invalidate_searches(
+        InstructorCoverage.objects.filter(
+            instructor_profile_id=instructor_profile.pk
+        ).values_list('outcode', flat=True)
+    )
+
+
+@contextmanager
+def deferred_availability_sync():
+    """
+    Sync each instructor whose availability changes in the block once, at the end
+
+    Yields the set of changed profile ids; add to it for changes that don't
+    send signals (bulk_create, bulk_update). Nothing is synced if the block
+    raises.
+    """
+    changed = set()
+    token = _deferred_profiles.set(changed)
+    try:
+        yield changed
+    finally:
+        _deferred_profiles.reset(token)
+    if changed:
+        for instructor_profile in InstructorProfile.objects.filter(pk__in=changed):
+            sync_availability(instructor_profile)
+
+
+@receiver(post_save, sender=InstructorAvailability)
+@receiver(post_delete, sender=InstructorAvailability)
+def availability_changed(sender, instance, **kwargs):
+    deferred = _deferred_profiles.get()
+    if deferred is not None:
+        deferred.add(instance.instructor_profile_id)
+        return
+    sync_availability(instance.instructor_profile)
+
+
+@receiver(pre_save, sender=AcademyProfile)
+def remember_academy_outcodes(sender, instance, **kwargs):
+    """Keep the outcodes an academy was found under before this save"""
+    instance._previous_outcodes = []
+    if instance.pk:
+        previous = sender.objects.filter(pk=instance.pk).values('main_postcode', 'address').first()
+        if previous:
+            instance._previous_outcodes = academy_outcodes(previous['main_postcode'], previous['address'])
+
+
+@receiver(post_save, sender=AcademyProfile)
+def academy_saved(sender, instance, **kwargs):
+    outcodes = academy_outcodes(instance.main_postcode, instance.address)
+    invalidate_searches(outcodes + getattr(instance, '_previous_outcodes', []))
+
+
+@receiver(post_delete, sender=AcademyProfile)
+def academy_deleted(sender, instance, **kwargs):
+    invalidate_searches(academy_outcodes(instance.main_postcode, instance.address))
+
+
+@receiver(pre_save, sender=User)
+def remember_search_fields(sender, instance, update_fields=None, **kwargs):
+    """Keep the user's search result fields from before this save"""
+    instance._previous_search_fields = None
+    if instance.pk and (update_fields is None or set(update_fields) & set(SEARCH_USER_FIELDS)):
+        instance._previous_search_fields = sender.objects.filter(pk=instance.pk).values(*SEARCH_USER_FIELDS).first()
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    """Invalidate searches showing an instructor or academy whose name or email changed"""
+    previous = getattr(instance, '_previous_search_fields', None)
+    if created or previous is None:
+        return
+    if all(previous[field] == getattr(instance, field) for field in SEARCH_USER_FIELDS):
+        return
+
+    outcodes = list(InstructorCoverage.objects.filter(
+        instructor_profile__user_id=instance.pk
+    ).values_list('outcode', flat=True))
+    academy = AcademyProfile.objects.filter(user_id=instance.pk).values('main_postcode', 'address').first()
+    if academy:
+        outcodes += academy_outcodes(academy['main_postcode'], academy['address'])
+    invalidate_searches(outcodes)
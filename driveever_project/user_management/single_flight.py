@@ -0,0 +1,190 @@
+"""
+Request coalescing for DriveEver upstream lookups
+When a popular cached lookup expires, every concurrent request for it
+misses at once; single flight lets one of them call the upstream while the
+others wait for its result
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from django.core.cache import caches
+
+# Returns (found, value) from wherever the leader's result ends up, usually a TieredCache
+Recheck = Callable[[], Tuple[bool, Any]]
+# The same, as a coroutine function, for ado()
+ARecheck = Callable[[], Awaitable[Tuple[bool, Any]]]
+
+
+class _Call:
+    """A call in flight in this process"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    At most one upstream call per key in flight
+
+    Within a process, callers that arrive while a call for the same key is
+    running wait for it and share its result or exception.
+
+    With a shared cache alias, the caller leading a key in its process also
+    takes a short-lived lock in the shared cache (an atomic cache.add). A
+    leader that finds the lock taken by another process polls `recheck`,
+    usually a lookup in the shared response cache, until that result
+    appears. It only calls the upstream itself if the lock is released
+    without a result (e.g. the call failed) or `lock_ttl` passes.
+    """
+
+    POLL_INTERVAL = 0.05  # seconds
+
+    def __init__(self, namespace: str, cache_alias: Optional[str] = None, lock_ttl: float = 15):
+        self.namespace = namespace
+        self.cache_alias = cache_alias
+        self.lock_ttl = lock_ttl
+        self._calls = {}
+        self._async_calls = {}
+        self._lock = threading.Lock()
+        self._counters = {
+            'calls': 0,
+            'coalesced': 0,
+            'remote_waits': 0,
+            'remote_hits': 0,
+        }
+
+    @property
+    def shared(self):
+        return caches[self.cache_alias] if self.cache_alias else None
+
+    def _lock_key(self, key: str) -> str:
+        return f'singleflight:{self.namespace}:{key}'
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+
+    def do(self, key: str, fn: Callable[[], Any], recheck: Optional[Recheck] = None) -> Any:
+        """
+        Call fn() for key, or wait for the call already in flight for it
+
+        Raises:
+            Whatever the shared call raised
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            self._count('coalesced')
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._lead(key, fn, recheck)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def _lead(self, key: str, fn: Callable[[], Any], recheck: Optional[Recheck]) -> Any:
+        shared = self.shared
+        if shared is None:
+            self._count('calls')
+            return fn()
+
+        lock_key = self._lock_key(key)
+        acquired = shared.add(lock_key, 1, self.lock_ttl)
+        if not acquired and recheck is not None:
+            # Another process is fetching this key
+            self._count('remote_waits')
+            deadline = time.monotonic() + self.lock_ttl
+            while time.monotonic() < deadline:
+                time.sleep(self.POLL_INTERVAL)
+                found, value = recheck()
+                if found:
+                    self._count('remote_hits')
+                    return value
+                if shared.get(lock_key) is None:
+                    break
+
+        self._count('calls')
+        try:
+            return fn()
+        finally:
+            if acquired:
+                shared.delete(lock_key)
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[Any]], recheck: Optional[ARecheck] = None) -> Any:
+        """Async version of do; fn and recheck are coroutine functions"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            future = self._async_calls.get((loop, key))
+            leader = future is None
+            if leader:
+                future = self._async_calls[(loop, key)] = loop.create_future()
+
+        if not leader:
+            self._count('coalesced')
+            return await asyncio.shield(future)
+
+        try:
+            result = await self._alead(key, fn, recheck)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # retrieved, even if nobody else was waiting
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._async_calls[(loop, key)]
+
+    async def _alead(self, key: str, fn: Callable[[], Awaitable[Any]], recheck: Optional[ARecheck]) -> Any:
+        shared = self.shared
+        if shared is None:
+            self._count('calls')
+            return await fn()
+
+        lock_key = self._lock_key(key)
+        acquired = await shared.aadd(lock_key, 1, self.lock_ttl)
+        if not acquired and recheck is not None:
+            self._count('remote_waits')
+            deadline = time.monotonic() + self.lock_ttl
+            while time.monotonic() < deadline:
+                await asyncio.sleep(self.POLL_INTERVAL)
+                found, value = await recheck()
+                if found:
+                    self._count('remote_hits')
+                    return value
+                if await shared.aget(lock_key) is None:
+                    break
+
+        self._count('calls')
+        try:
+            return await fn()
+        finally:
+            if acquired:
+                await shared.adelete(lock_key)
+
+    def stats(self) -> Dict:
+        """Upstream calls made, and lookups that waited on another caller's call instead"""
+        with self._lock:
+            return {**self._counters, 'in_flight': len(self._calls) + len(self._async_calls)}
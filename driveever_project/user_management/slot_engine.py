@@ -0,0 +1,177 @@
+"""
+Lesson slot generation for DriveEver bookings
+Turns availability windows and booked intervals into bookable lesson slots
+in memory, so the database is only asked for each once
+"""
+
+from datetime import date, time, timedelta
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+# Intervals are (start, end) minutes since midnight, end exclusive
+Interval = Tuple[int, int]
+
+LESSON_LENGTHS = (60, 90, 120)  # minutes
+GRANULARITIES = (15, 30, 60)  # minutes between candidate start times
+
+
+def to_minutes(value: time) -> int:
+    """Minutes since midnight for a time of day"""
+    return value.hour * 60 + value.minute
+
+
+_MINUTE_LABELS = [f'{minutes // 60:02d}:{minutes % 60:02d}' for minutes in range(24 * 60 + 1)]
+
+
+def format_minutes(minutes: int) -> str:
+    """HH:MM for a number of minutes since midnight"""
+    return _MINUTE_LABELS[minutes]
+
+
+def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+    """
+    Sort intervals and merge any that overlap or touch
+
+    Empty or inverted intervals are dropped.
+    """
+    merged = []
+    for start, end in sorted(intervals):
+        if start >= end:
+            continue
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def subtract_intervals(windows: Iterable[Interval], busy: Iterable[Interval]) -> List[Interval]:
+    """
+    Remove busy intervals from availability windows with a single sorted sweep
+
+    Returns:
+        List[Interval]: The free parts of the windows, in order
+    """
+    windows = merge_intervals(windows)
+    busy = merge_intervals(busy)
+
+    free = []
+    first = 0
+    for start, end in windows:
+        # Busy intervals ending before this window can't touch any later window either
+        while first < len(busy) and busy[first][1] <= start:
+            first += 1
+
+        cursor = start
+        index = first
+        while index < len(busy) and busy[index][0] < end:
+            if busy[index][0] > cursor:
+                free.append((cursor, busy[index][0]))
+            cursor = max(cursor, busy[index][1])
+            index += 1
+
+        if cursor < end:
+            free.append((cursor, end))
+    return free
+
+
+def free_slots(
+    windows: Iterable[Interval],
+    busy: Iterable[Interval],
+    lesson_minutes: int = 60,
+    granularity: int = 60
+) -> List[Interval]:
+    """
+    Every lesson that fits in the windows without overlapping a busy interval
+
+    Candidate start times step by `granularity` from the start of each free
+    stretch, so a lesson can always start straight after a booking ends.
+
+    Args:
+        windows: Availability windows
+        busy: Booked (or otherwise unavailable) intervals
+        lesson_minutes (int): Lesson length, e.g. 60, 90 or 120
+        granularity (int): Minutes between candidate start times, e.g. 15, 30 or 60
+
+    Returns:
+        List[Interval]: (start, end) of each bookable lesson, in order
+    """
+    if lesson_minutes <= 0 or granularity <= 0:
+        raise ValueError('lesson_minutes and granularity must be positive')
+
+    slots = []
+    for start, end in subtract_intervals(windows, busy):
+        for slot_start in range(start, end - lesson_minutes + 1, granularity):
+            slots.append((slot_start, slot_start + lesson_minutes))
+    return slots
+
+
+def date_range(start_date: date, end_date: date) -> List[date]:
+    """Every date from start_date to end_date inclusive"""
+    return [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+
+
+def daily_free_slots(
+    windows_by_weekday: Mapping[int, Sequence[Interval]],
+    busy_by_date: Mapping[date, Sequence[Interval]],
+    dates: Iterable[date],
+    lesson_minutes: int = 60,
+    granularity: int = 60,
+    windows_by_date: Optional[Mapping[date, Sequence[Interval]]] = None
+) -> Dict[date, List[Interval]]:
+    """
+    Free slots for one instructor on each of several dates
+
+    Days without bookings or exceptions share the slots computed for their
+    weekday, so a long range costs one sweep per weekday plus one per booked
+    or exceptional day.
+
+    Args:
+        windows_by_weekday: Availability windows keyed by weekday (0=Monday)
+        busy_by_date: Booked intervals keyed by date
+        dates: Dates to compute slots for
+        windows_by_date: Windows replacing the weekday's on specific dates
+
+    Returns:
+        Dict[date, List[Interval]]: Bookable lessons for each date
+    """
+    windows_by_date = windows_by_date or {}
+    unbooked = {}
+    slots = {}
+    for day in dates:
+        weekday = day.weekday()
+        if day in windows_by_date:
+            slots[day] = free_slots(windows_by_date[day], busy_by_date.get(day, ()), lesson_minutes, granularity)
+            continue
+        windows = windows_by_weekday.get(weekday, ())
+        busy = busy_by_date.get(day)
+        if busy and windows:
+            slots[day] = free_slots(windows, busy, lesson_minutes, granularity)
+        else:
+            if weekday not in unbooked:
+                unbooked[weekday] = free_slots(windows, (), lesson_minutes, granularity)
+            slots[day] = unbooked[weekday]
+    return slots
+
+
+def format_duration(minutes: int) -> str:
+    """Describe a lesson length ("1 hour", "1.5 hours", "45 minutes")"""
+    if minutes < 60:
+        return f'{minutes} minutes'
+    hours = minutes / 60
+    if hours == 1:
+        return '1 hour'
+    return f'{hours:g} hours'
+
+
+def format_slots(slots: Iterable[Interval], lesson_minutes: int) -> List[Dict]:
+    """Format slots for API responses"""
+    duration = format_duration(lesson_minutes)
+    labels = _MINUTE_LABELS
+    return [
+        {
+            'start_time': labels[start],
+            'end_time': labels[end],
+            'duration': duration
+        }
+        for start, end in slots
+    ]
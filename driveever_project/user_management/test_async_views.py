@@ -0,0 +1,196 @@
+import asyncio
+import pytest
+import requests
+from asgiref.sync import async_to_sync
+from unittest import mock
+from rest_framework import status
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from .async_views import AsyncNearestPostcodesView, AsyncPostcodeLookupView, AsyncUserSearchView, AsyncVehicleCheckView
+from .http_client import AsyncHTTPClient, HTTPClient
+from .models import User
+from .postcode_service import PostcodesIOService
+from .response_cache import TieredCache
+from .postcode_views import NearestPostcodesView, PostcodeLookupView
+from .search_cache import search_cache
+from .test_instructor_search import make_instructor, resolution
+from .test_postcode_service import make_response
+from .vehicle_service import DVLAVehicleService
+from .views import UserSearchView
+
+
+def call(view_class, request):
+    """Call a view the way Django's handler does, awaiting async views"""
+    view = view_class.as_view()
+    response = async_to_sync(view)(request) if view_class.view_is_async else view(request)
+    response.render()
+    return response
+
+
+@pytest.fixture
+def factory():
+    return APIRequestFactory()
+
+
+@pytest.fixture
+def postcodes():
+    """Fixture to provide a PostcodesIOService with mocked sync and async sessions"""
+    service = PostcodesIOService()
+    service.session = mock.Mock()
+    service.async_session = mock.Mock()
+    service.async_session.get = mock.AsyncMock()
+    service.cache.clear()
+    return service
+
+
+class TestAsyncHTTPClient:
+    """
+    Test cases for the async outbound HTTP client
+    """
+
+    def test_without_httpx_requests_run_on_the_sync_client(self):
+        client = HTTPClient()
+        client.session = mock.Mock()
+        client.session.request.return_value = make_response(200, {'result': 'ok'})
+
+        async def fetch():
+            return await AsyncHTTPClient(client).bind(headers={'X-Test': '1'}).get('https://example.com/a')
+
+        with mock.patch('user_management.http_client.httpx', None):
+            response = async_to_sync(fetch)()
+
+        assert response.json() == {'result': 'ok'}
+        assert client.session.request.call_args.kwargs['headers'] == {'X-Test': '1'}
+
+    def test_transport_errors_are_requests_exceptions(self):
+        httpx = pytest.importorskip('httpx')
+        client = HTTPClient({'RETRIES': 1, 'BACKOFF': 0})
+        async_client = AsyncHTTPClient(client)
+        attempts = []
+
+        def handler(request):
+            attempts.append(request)
+            raise httpx.ConnectError('refused', request=request)
+
+        async def fetch():
+            async_client._sessions[asyncio.get_running_loop()] = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            return await async_client.get('https://example.com/a')
+
+        with pytest.raises(requests.ConnectionError):
+            async_to_sync(fetch)()
+        assert len(attempts) == 2
+        assert client.stats()['example.com']['errors'] == 2
+
+
+class TestAsyncPostcodeViews:
+    """
+    Test cases for the async postcode lookup view
+    """
+
+    def test_matches_sync_view(self, factory, postcodes):
+        found = make_response(200, {'result': {'postcode': 'LN1 1AA', 'outcode': 'LN1'}})
+        postcodes.session.get.return_value = found
+        postcodes.async_session.get.return_value = found
+
+        with mock.patch('user_management.postcode_views.postcode_service', postcodes):
+            sync_response = call(PostcodeLookupView, factory.get('/', {'postcode': 'LN1 1AA'}))
+        postcodes.cache.clear()
+        with mock.patch('user_management.async_views.postcode_service', postcodes):
+            async_response = call(AsyncPostcodeLookupView, factory.get('/', {'postcode': 'LN1 1AA'}))
+
+        assert AsyncPostcodeLookupView.view_is_async
+        assert async_response.status_code == sync_response.status_code == status.HTTP_200_OK
+        assert async_response.content == sync_response.content
+        postcodes.async_session.get.assert_awaited_once()
+
+    def test_missing_postcode(self, factory):
+        response = call(AsyncPostcodeLookupView, factory.get('/'))
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    @pytest.mark.parametrize('view_class', [NearestPostcodesView, AsyncNearestPostcodesView])
+    @pytest.mark.parametrize('limit', ['ten', '0'])
+    def test_invalid_limit(self, factory, view_class, limit):
+        response = call(view_class, factory.get('/', {'postcode': 'LN1 1AA', 'limit': limit}))
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_shared_cache_is_not_blocked_on(self, factory, postcodes):
+        postcodes.async_session.get.return_value = make_response(200, {'result': {'postcode': 'LN1 1AA'}})
+        shared = mock.Mock()
+        shared.aget = mock.AsyncMock(return_value=None)
+        shared.aset = mock.AsyncMock()
+
+        with mock.patch('user_management.async_views.postcode_service', postcodes), \
+                mock.patch.object(TieredCache, 'shared', new_callable=mock.PropertyMock, return_value=shared):
+            response = call(AsyncPostcodeLookupView, factory.get('/', {'postcode': 'LN1 1AA'}))
+
+        assert response.status_code == status.HTTP_200_OK
+        shared.aget.assert_awaited()
+        shared.aset.assert_awaited_once()
+        shared.get.assert_not_called()
+        shared.set.assert_not_called()
+
+
+class TestAsyncVehicleCheckView:
+    """
+    Test cases for the async vehicle check view
+    """
+
+    def test_lookup_is_awaited_and_cached(self, factory):
+        service = DVLAVehicleService(api_key='test')
+        service.async_session = mock.Mock()
+        service.async_session.post = mock.AsyncMock(return_value=make_response(200, {'make': 'FORD'}))
+        service.cache.clear()
+
+        try:
+            with mock.patch('user_management.async_views.vehicle_service', service):
+                first = call(AsyncVehicleCheckView, factory.post('/', {'registrationNumber': 'ab12 cde'}, format='json'))
+                second = call(AsyncVehicleCheckView, factory.post('/', {'registrationNumber': 'AB12CDE'}, format='json'))
+        finally:
+            service._executor.shutdown(wait=True)
+
+        assert first.status_code == second.status_code == status.HTTP_200_OK
+        assert second.data == {'success': True, 'data': {'make': 'FORD'}}
+        service.async_session.post.assert_awaited_once()
+
+    def test_invalid_registration(self, factory):
+        response = call(AsyncVehicleCheckView, factory.post('/', {'registrationNumber': 'NOPE'}, format='json'))
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data['error'] == 'Invalid UK number plate format'
+
+
+@pytest.mark.django_db
+class TestAsyncUserSearchView:
+    """
+    Test cases for the async instructor search view
+    """
+
+    def test_matches_sync_view(self, factory):
+        search_cache.clear()
+        make_instructor('lincoln', 'LN1, LN2', is_verified=True)
+        make_instructor('horncastle', 'LN10')
+        learner = User.objects.create_user(username='learner', password='testpass123', user_type='learner')
+
+        def search_request():
+            request = factory.get('/', {'postcode': 'LN1 1AA', 'user_type': 'instructor'})
+            force_authenticate(request, user=learner)
+            return request
+
+        with mock.patch('user_management.views.postcode_service.resolve_postcode',
+                        return_value=resolution('LN1 1AA', 'LN1')):
+            sync_response = call(UserSearchView, search_request())
+        search_cache.clear()
+        with mock.patch('user_management.async_views.postcode_service.aresolve_postcode',
+                        new=mock.AsyncMock(return_value=resolution('LN1 1AA', 'LN1'))):
+            async_response = call(AsyncUserSearchView, search_request())
+
+        assert async_response.status_code == sync_response.status_code == status.HTTP_200_OK
+        assert async_response.content == sync_response.content
+        assert [i['full_name'] for i in async_response.data['instructors']] == ['Lincoln']
+
+    def test_requires_authentication(self, factory):
+        response = call(AsyncUserSearchView, factory.get('/', {'postcode': 'LN1 1AA'}))
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
@@ -0,0 +1,210 @@
+import pytest
+from datetime import time, timedelta
+from decimal import Decimal
+from unittest import mock
+from django.urls import reverse
+from rest_framework import status
+
+from .availability_bitmap import (
+    apply_exceptions, bitmap_intervals, day_bitmap, day_of_week_bitmap, decode_bitmap, encode_bitmap,
+    interval_mask, is_free, weekly_bitmap
+)
+from .models import User, InstructorProfile, InstructorAvailability, Booking
+from .search_cache import search_cache
+from .serializers import BookingSerializer
+from .test_instructor_search import get_api_client, make_instructor, resolution
+from .test_slot_engine import hm, next_weekday
+
+
+class TestAvailabilityBitmap:
+    """
+    Test cases for weekly availability bitmaps
+    """
+
+    def test_windows_round_inwards_and_bookings_outwards(self):
+        assert bitmap_intervals(interval_mask(hm('09:10'), hm('10:05'), inner=True)) == [(hm('09:15'), hm('10:00'))]
+        assert bitmap_intervals(interval_mask(hm('09:10'), hm('10:05'))) == [(hm('09:00'), hm('10:15'))]
+
+    def test_encoding_round_trip(self):
+        week = weekly_bitmap([(0, hm('09:00'), hm('12:00')), (5, hm('08:30'), hm('13:00')), (6, hm('22:00'), hm('23:45'))])
+        encoded = encode_bitmap(week)
+
+        assert len(encoded) == 168
+        assert encoded[5 * 24 + 8:5 * 24 + 13] == 'cffff'
+        assert decode_bitmap(encoded) == week
+        assert bitmap_intervals(day_of_week_bitmap(week, 5)) == [(hm('08:30'), hm('13:00'))]
+
+    def test_exceptions_open_then_close(self):
+        available = day_bitmap([(hm('09:00'), hm('12:00'))])
+        exceptions = [(hm('17:00'), hm('19:00'), True), (hm('10:00'), hm('10:10'), False), (hm('18:00'), hm('20:00'), False)]
+
+        assert bitmap_intervals(apply_exceptions(available, exceptions)) == [
+            (hm('09:00'), hm('10:00')), (hm('10:15'), hm('12:00')), (hm('17:00'), hm('18:00'))
+        ]
+        assert apply_exceptions(available, [(0, 24 * 60, False)]) == 0
+
+    def test_is_free(self):
+        available = day_bitmap([(hm('09:00'), hm('17:00'))])
+        booked = day_bitmap([(hm('12:00'), hm('13:00'))])
+
+        assert is_free(available, booked, hm('10:00'), hm('12:00'))
+        assert not is_free(available, booked, hm('11:30'), hm('12:30'))
+        assert not is_free(available, booked, hm('16:30'), hm('17:30'))
+
+
+@pytest.mark.django_db
+class TestAvailabilityBitmapSync:
+    """
+    Test cases for keeping InstructorProfile.availability_bitmap in step with availability slots
+    """
+
+    @pytest.fixture
+    def instructor(self):
+        user = User.objects.create_user(username='instructor', password='testpass123', user_type='instructor')
+        InstructorProfile.objects.create(user=user, postcodes='LN1', price_per_hour=Decimal('30.00'))
+        return user
+
+    def add_slot(self, instructor, day_of_week, start, end):
+        return InstructorAvailability.objects.create(
+            instructor_profile=instructor.instructor_profile, day_of_week=day_of_week, start_time=start, end_time=end
+        )
+
+    def test_bitmap_follows_slots(self, instructor):
+        slot = self.add_slot(instructor, 5, time(9), time(12))
+        profile = InstructorProfile.objects.get(user=instructor)
+        assert bitmap_intervals(day_of_week_bitmap(profile.weekly_availability(), 5)) == [(hm('09:00'), hm('12:00'))]
+
+        slot.delete()
+        profile.refresh_from_db()
+        assert profile.weekly_availability() == 0
+
+    def test_booking_validation_uses_bitmaps(self, instructor):
+        monday = next_weekday(0)
+        self.add_slot(instructor, 0, time(9), time(12))
+        self.add_slot(instructor, 0, time(12), time(15))
+        learner = User.objects.create_user(username='learner', password='testpass123', user_type='learner')
+        Booking.objects.create(
+            learner=learner, instructor=instructor, lesson_date=monday, start_time=time(13), end_time=time(14),
+            price_per_hour=Decimal('30.00'), total_price=Decimal('30.00')
+        )
+
+        def validate(start, end, lesson_date=monday):
+            serializer = BookingSerializer(data={
+                'learner': learner.id, 'instructor': instructor.id, 'lesson_date': lesson_date,
+                'start_time': start, 'end_time': end, 'price_per_hour': '30.00'
+            })
+            serializer.is_valid()
+            return serializer.errors.get('non_field_errors', [])
+
+        # Adjacent windows together cover a lesson that neither covers alone
+        assert validate(time(11), time(13)) == []
+        assert validate(time(13, 30), time(14, 30)) == ['This time slot conflicts with an existing booking.']
+        assert validate(time(9), time(10), monday + timedelta(days=1)) == ['Instructor is not available at the selected time.']
+
+
+@pytest.mark.django_db
+class TestFreeTimeSearch:
+    """
+    Test cases for filtering instructor search by weekly availability
+    """
+
+    @pytest.fixture
+    def api_client(self):
+        """Fixture to provide an authenticated APIClient instance"""
+        client = get_api_client()
+        learner = User.objects.create_user(username='learner', password='testpass123', user_type='learner')
+        client.force_authenticate(user=learner)
+        search_cache.clear()
+        return client
+
+    def search(self, api_client, **params):
+        with mock.patch('user_management.views.postcode_service.resolve_postcode',
+                        return_value=resolution('LN1 1AA', 'LN1')):
+            return api_client.get(reverse('user-search'), {'postcode': 'LN1 1AA', 'user_type': 'instructor', **params})
+
+    def test_free_saturday_morning(self, api_client):
+        for username, start, end in [('early', time(8), time(12)), ('late', time(10), time(16)), ('weekday', None, None)]:
+            profile = make_instructor(username, 'LN1')
+            if start:
+                InstructorAvailability.objects.create(instructor_profile=profile, day_of_week=5, start_time=start, end_time=end)
+
+        morning = self.search(api_client, free_day='saturday', free_time='morning')
+        any_time = self.search(api_client, free_day='saturday')
+
+        assert [i['full_name'] for i in morning.data['instructors']] == ['Early']
+        assert sorted(i['full_name'] for i in any_time.data['instructors']) == ['Early', 'Late']
+
+    def test_free_time_needs_a_day(self, api_client):
+        assert self.search(api_client, free_time='morning').status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+class TestReplaceAvailability:
+    """
+    Test cases for replacing an instructor's availability in one request
+    """
+
+    @pytest.fixture
+    def profile(self):
+        profile = make_instructor('instructor', 'LN1')
+        for day in range(3):
+            InstructorAvailability.objects.create(instructor_profile=profile, day_of_week=day, start_time=time(9), end_time=time(12))
+        return profile
+
+    @pytest.fixture
+    def api_client(self, profile):
+        """Fixture to provide an APIClient authenticated as the instructor"""
+        client = get_api_client()
+        client.force_authenticate(user=profile.user)
+        return client
+
+    def replace(self, api_client, *slots):
+        return api_client.post(reverse('instructor-availability'), {
+            'availability_slots': [
+                {'day_of_week': day, 'start_time': start, 'end_time': end} for day, start, end in slots
+            ]
+        }, format='json')
+
+    def test_only_differences_are_written(self, api_client, profile, django_capture_on_commit_callbacks):
+        make_instructor('elsewhere', 'LN2')
+        monday = InstructorAvailability.objects.get(instructor_profile=profile, day_of_week=0)
+
+        with mock.patch.object(search_cache, 'invalidate') as invalidate, \
+                django_capture_on_commit_callbacks(execute=True):
+            response = self.replace(api_client, (0, '09:00', '12:00'), (1, '09:00', '14:00'), (3, '09:00', '12:00'))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['message'] == 'Successfully updated availability. Created 1 slots, updated 1, removed 1.'
+        assert [slot['day_of_week'] for slot in response.data['availability_slots']] == [0, 1, 3]
+        assert InstructorAvailability.objects.get(instructor_profile=profile, day_of_week=0).pk == monday.pk
+
+        # The bitmap is rebuilt and the search cache invalidated once, for this instructor only
+        assert invalidate.call_count == 1
+        assert list(invalidate.call_args.args[0]) == ['LN1']
+        profile.refresh_from_db()
+        week = profile.weekly_availability()
+        assert bitmap_intervals(day_of_week_bitmap(week, 1)) == [(hm('09:00'), hm('14:00'))]
+        assert day_of_week_bitmap(week, 2) == 0
+        assert bitmap_intervals(day_of_week_bitmap(week, 3)) == [(hm('09:00'), hm('12:00'))]
+
+    def test_unchanged_availability_writes_nothing(self, api_client, profile, django_capture_on_commit_callbacks):
+        with mock.patch.object(search_cache, 'invalidate') as invalidate, \
+                django_capture_on_commit_callbacks(execute=True):
+            response = self.replace(api_client, *[(day, '09:00', '12:00') for day in range(3)])
+
+        assert response.status_code == status.HTTP_200_OK
+        assert not invalidate.called
+
+    @pytest.mark.parametrize('slots', [
+        [(0, '09:00', '12:00'), (4, '12:00', '10:00')],
+        [(0, '09:00', '12:00'), (0, '09:00', '13:00')],
+    ])
+    def test_invalid_slots_leave_availability_untouched(self, api_client, profile, slots):
+        bitmap = profile.availability_bitmap
+
+        response = self.replace(api_client, *slots)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert InstructorAvailability.objects.filter(instructor_profile=profile).count() == 3
+        profile.refresh_from_db()
+        assert profile.availability_bitmap == bitmap
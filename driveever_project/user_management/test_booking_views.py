@@ -0,0 +1,598 @@
+import json
+import pytest
+from io import StringIO
+from datetime import time, timedelta
+from decimal import Decimal
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from .models import (
+    User, InstructorProfile, InstructorAvailability, AvailabilityException, Booking, SlotHold, WaitlistEntry
+)
+from . import booking_service, booking_views, waitlist
+from .booking_service import BookingConflict, create_booking, expire_holds, overlapping_bookings
+from .test_slot_engine import next_weekday
+from .waitlist import expire_offers
+
+
+def get_api_client():
+    from rest_framework.test import APIClient
+    return APIClient()
+
+
+@pytest.fixture
+def learner():
+    return User.objects.create_user(username='learner', password='testpass123', user_type='learner', full_name='Lee Learner')
+
+
+@pytest.fixture
+def instructor():
+    user = User.objects.create_user(
+        username='instructor', password='testpass123', user_type='instructor', full_name='Ian Instructor'
+    )
+    profile = InstructorProfile.objects.create(user=user, postcodes='LN1', price_per_hour=Decimal('30.00'))
+    for day in range(5):
+        InstructorAvailability.objects.create(
+            instructor_profile=profile, day_of_week=day, start_time=time(9), end_time=time(17)
+        )
+    return user
+
+
+@pytest.fixture
+def api_client(learner):
+    """Fixture to provide an APIClient authenticated as the learner"""
+    client = get_api_client()
+    client.force_authenticate(user=learner)
+    return client
+
+
+def make_booking(learner, instructor, lesson_date, start, end, status='pending'):
+    return Booking.objects.create(
+        learner=learner, instructor=instructor, lesson_date=lesson_date, start_time=start, end_time=end,
+        status=status, price_per_hour=Decimal('30.00'), total_price=Decimal('30.00')
+    )
+
+
+@pytest.mark.django_db
+class TestInstructorBookingsView:
+    """
+    Test cases for the instructor calendar
+    """
+
+    def calendar(self, api_client, instructor, **params):
+        return api_client.get(reverse('instructor-bookings', args=[instructor.id]), params)
+
+    def test_query_count_is_constant(self, api_client, learner, instructor):
+        monday = next_weekday(0)
+        for week in range(8):
+            make_booking(learner, instructor, monday + timedelta(weeks=week), time(10), time(11))
+
+        def count_queries(days):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.calendar(
+                    api_client, instructor,
+                    start_date=monday.isoformat(), end_date=(monday + timedelta(days=days - 1)).isoformat()
+                )
+            assert response.status_code == status.HTTP_200_OK
+            return response, len(queries)
+
+        week, week_queries = count_queries(7)
+        month, month_queries = count_queries(30)
+
+        assert week_queries == month_queries == 4
+        assert len(month.data['calendar_data']) == 30
+        assert month.data['calendar_data'][0]['bookings'][0]['learner_name'] == 'Lee Learner'
+        assert month.data['calendar_data'][0]['availability'][0]['start_time'] == '09:00'
+        assert month.data['calendar_data'][5]['availability'] == []
+        assert len(week.data['calendar_data'][0]['bookings']) == 1
+
+    def test_long_ranges_are_streamed(self, api_client, learner, instructor):
+        monday = next_weekday(0)
+        make_booking(learner, instructor, monday + timedelta(days=100), time(10), time(11))
+
+        response = self.calendar(
+            api_client, instructor, start_date=monday.isoformat(), end_date=(monday + timedelta(days=179)).isoformat()
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.streaming
+        data = json.loads(b''.join(response.streaming_content))
+        assert data['instructor_name'] == 'Ian Instructor'
+        assert len(data['calendar_data']) == 180
+        assert len(data['calendar_data'][100]['bookings']) == 1
+
+    @pytest.mark.parametrize('params', [
+        {'start_date': '2030-01-01', 'end_date': '2032-01-01'},
+        {'start_date': '2030-01-10', 'end_date': '2030-01-01'},
+        {'start_date': 'tomorrow'},
+    ])
+    def test_invalid_ranges(self, api_client, instructor, params):
+        assert self.calendar(api_client, instructor, **params).status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+class TestCreateBookingView:
+    """
+    Test cases for creating bookings without double-booking an instructor
+    """
+
+    def book(self, api_client, instructor, lesson_date, start, end, **extra):
+        return api_client.post(reverse('create-booking'), {
+            'instructor': instructor.id,
+            'lesson_date': lesson_date.isoformat(),
+            'start_time': start,
+            'end_time': end,
+            **extra,
+        }, format='json')
+
+    def test_create_booking(self, api_client, learner, instructor):
+        response = self.book(api_client, instructor, next_weekday(0), '10:00', '11:00')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        booking = Booking.objects.get()
+        assert booking.learner == learner
+        assert booking.total_price == Decimal('30.00')
+
+    def test_price_comes_from_lesson_times(self, api_client, instructor):
+        response = self.book(api_client, instructor, next_weekday(0), '10:00', '11:30')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        booking = Booking.objects.get()
+        assert booking.duration_hours == Decimal('1.5')
+        assert booking.total_price == Decimal('45.00')
+
+    def test_duration_must_match_lesson_times(self, api_client, instructor):
+        response = self.book(api_client, instructor, next_weekday(0), '10:00', '12:00', duration_hours='0.5')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'duration_hours' in response.data
+        assert not Booking.objects.exists()
+
+    def test_overlapping_booking_is_a_conflict(self, api_client, learner, instructor):
+        monday = next_weekday(0)
+        make_booking(learner, instructor, monday, time(10), time(11))
+
+        response = self.book(api_client, instructor, monday, '10:30', '11:30')
+
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert Booking.objects.count() == 1
+
+    def test_cancelled_bookings_do_not_conflict(self, api_client, learner, instructor):
+        monday = next_weekday(0)
+        make_booking(learner, instructor, monday, time(10), time(11), status='cancelled')
+
+        assert self.book(api_client, instructor, monday, '10:00', '11:00').status_code == status.HTTP_201_CREATED
+
+    def test_outside_availability_is_rejected(self, api_client, instructor):
+        response = self.book(api_client, instructor, next_weekday(5), '10:00', '11:00')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_conflict_after_validation_is_caught(self, learner, instructor):
+        monday = next_weekday(0)
+        fields = dict(
+            learner=learner, instructor=instructor, lesson_date=monday, start_time=time(10), end_time=time(11),
+            price_per_hour=Decimal('30.00'), total_price=Decimal('30.00')
+        )
+        # Another learner books the slot between validation and save
+        make_booking(learner, instructor, monday, time(10, 30), time(11, 30))
+
+        with pytest.raises(BookingConflict):
+            create_booking(**fields)
+        assert Booking.objects.count() == 1
+
+    def test_existing_overlaps_are_reported(self, learner, instructor):
+        monday = next_weekday(0)
+        first = make_booking(learner, instructor, monday, time(10), time(11), status='confirmed')
+        second = make_booking(learner, instructor, monday, time(10, 30), time(11, 30))
+        make_booking(learner, instructor, monday, time(11, 30), time(12))
+        make_booking(learner, instructor, monday, time(10), time(11), status='cancelled')
+
+        assert overlapping_bookings(Booking.objects.all()) == [(second, first)]
+
+        out = StringIO()
+        call_command('find_overlapping_bookings', stdout=out)
+        assert f'booking {second.pk} (pending' in out.getvalue()
+        assert '1 overlapping pair(s)' in out.getvalue()
+        # Nothing is changed
+        assert Booking.objects.filter(status='cancelled').count() == 1
+
+    def test_instructor_without_profile_cannot_be_booked(self, learner):
+        instructor = User.objects.create_user(username='new', password='testpass123', user_type='instructor')
+
+        with pytest.raises(BookingConflict):
+            create_booking(
+                learner=learner, instructor=instructor, lesson_date=next_weekday(0), start_time=time(10),
+                end_time=time(11), price_per_hour=Decimal('30.00'), total_price=Decimal('30.00')
+            )
+        assert not Booking.objects.exists()
+
+
+@pytest.mark.django_db
+class TestSlotHolds:
+    """
+    Test cases for holding slots before booking them
+    """
+
+    @pytest.fixture
+    def rival_client(self):
+        """Fixture to provide an APIClient authenticated as a second learner"""
+        rival = User.objects.create_user(username='rival', password='testpass123', user_type='learner')
+        client = get_api_client()
+        client.force_authenticate(user=rival)
+        return client
+
+    def hold(self, client, instructor, lesson_date, start='10:00', end='11:00'):
+        return client.post(reverse('slot-hold'), {
+            'instructor': instructor.id,
+            'lesson_date': lesson_date.isoformat(),
+            'start_time': start,
+            'end_time': end,
+        }, format='json')
+
+    def test_held_slot_fails_fast_for_other_learners(self, api_client, rival_client, instructor):
+        monday = next_weekday(0)
+
+        held = self.hold(api_client, instructor, monday)
+        assert held.status_code == status.HTTP_201_CREATED
+        assert held.data['expires_at']
+
+        assert self.hold(rival_client, instructor, monday, '10:30', '11:30').status_code == status.HTTP_409_CONFLICT
+        assert rival_client.post(reverse('create-booking'), {
+            'instructor': instructor.id, 'lesson_date': monday.isoformat(), 'start_time': '10:00', 'end_time': '11:00'
+        }, format='json').status_code == status.HTTP_409_CONFLICT
+        assert self.hold(rival_client, instructor, monday, '11:00', '12:00').status_code == status.HTTP_201_CREATED
+
+    def test_availability_hides_other_learners_holds(self, api_client, rival_client, instructor):
+        monday = next_weekday(0)
+        self.hold(api_client, instructor, monday, '09:00', '16:00')
+
+        def starts(client):
+            response = client.post(reverse('check-availability'), {'instructor_id': instructor.id, 'date': monday})
+            return [slot['start_time'] for slot in response.data['available_slots']]
+
+        assert starts(rival_client) == ['16:00']
+        assert len(starts(api_client)) == 8
+
+        response = rival_client.post(reverse('availability-range'), {
+            'instructor_ids': [instructor.id], 'start_date': monday, 'end_date': monday
+        }, format='json')
+        assert response.data['instructors'][0]['total_slots'] == 1
+
+    def test_confirm_hold(self, api_client, learner, instructor):
+        held = self.hold(api_client, instructor, next_weekday(0), '10:00', '11:30')
+
+        response = api_client.post(reverse('confirm-hold', args=[held.data['id']]), {'notes': 'Pick up at home'})
+
+        assert response.status_code == status.HTTP_201_CREATED
+        booking = Booking.objects.get()
+        assert booking.learner == learner
+        assert booking.duration_hours == Decimal('1.5')
+        assert booking.total_price == Decimal('45.00')
+        assert booking.notes == 'Pick up at home'
+        assert not SlotHold.objects.exists()
+
+    def test_expired_hold_cannot_be_confirmed(self, api_client, rival_client, instructor):
+        monday = next_weekday(0)
+        held = self.hold(api_client, instructor, monday)
+        SlotHold.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        # Expired holds stop blocking straight away
+        assert self.hold(rival_client, instructor, monday).status_code == status.HTTP_201_CREATED
+
+        response = api_client.post(reverse('confirm-hold', args=[held.data['id']]))
+        assert response.status_code == status.HTTP_410_GONE
+        assert not Booking.objects.exists()
+
+    def test_new_hold_replaces_previous(self, api_client, instructor):
+        monday = next_weekday(0)
+        self.hold(api_client, instructor, monday, '10:00', '11:00')
+        self.hold(api_client, instructor, monday, '14:00', '15:00')
+
+        assert list(SlotHold.objects.values_list('start_time', flat=True)) == [time(14)]
+
+    def test_release_and_expire(self, api_client, instructor):
+        held = self.hold(api_client, instructor, next_weekday(0))
+        assert api_client.delete(reverse('slot-hold-detail', args=[held.data['id']])).status_code == status.HTTP_204_NO_CONTENT
+
+        self.hold(api_client, instructor, next_weekday(1), '10:00', '11:00')
+        SlotHold.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        assert expire_holds() == 1
+        assert not SlotHold.objects.exists()
+
+
+@pytest.mark.django_db
+class TestCreateBookingSeriesView:
+    """
+    Test cases for booking a weekly series in one request
+    """
+
+    def book_series(self, api_client, instructor, start_date, occurrences, **extra):
+        return api_client.post(reverse('create-booking-series'), {
+            'instructor': instructor.id,
+            'start_date': start_date.isoformat(),
+            'start_time': '10:00',
+            'end_time': '11:00',
+            'occurrences': occurrences,
+            **extra
+        }, format='json')
+
+    def test_query_count_does_not_grow_with_series(self, api_client, instructor):
+        monday = next_weekday(0)
+
+        def count_queries(start_date, occurrences):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.book_series(api_client, instructor, start_date, occurrences)
+            assert response.status_code == status.HTTP_201_CREATED
+            return response, len(queries)
+
+        short, short_queries = count_queries(monday, 2)
+        long, long_queries = count_queries(monday + timedelta(days=1), 10)
+
+        assert short_queries == long_queries
+        assert len(long.data['bookings']) == 10
+        assert long.data['bookings'][9]['lesson_date'] == (monday + timedelta(days=1, weeks=9)).isoformat()
+        assert long.data['bookings'][0]['total_price'] == '30.00'
+        assert Booking.objects.count() == 12
+
+    def test_conflicts_book_nothing(self, api_client, learner, instructor):
+        monday = next_weekday(0)
+        make_booking(learner, instructor, monday + timedelta(weeks=2), time(10, 30), time(11, 30))
+
+        response = self.book_series(api_client, instructor, monday, 4)
+
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert response.data['conflicts'] == [{
+            'date': (monday + timedelta(weeks=2)).isoformat(),
+            'reason': 'This time slot conflicts with an existing booking.'
+        }]
+        assert Booking.objects.count() == 1
+
+    def test_partial_series(self, api_client, learner, instructor):
+        monday = next_weekday(0)
+        make_booking(learner, instructor, monday + timedelta(weeks=1), time(10), time(11))
+
+        response = self.book_series(api_client, instructor, monday, 3, allow_partial=True, interval_weeks=1)
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert len(response.data['bookings']) == 2
+        assert [conflict['date'] for conflict in response.data['conflicts']] == [(monday + timedelta(weeks=1)).isoformat()]
+
+    def test_dates_outside_availability_are_reported(self, api_client, instructor):
+        response = self.book_series(api_client, instructor, next_weekday(5), 2, allow_partial=True)
+
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert response.data['conflicts'][0]['reason'] == 'Instructor is not available at the selected time.'
+
+    def test_series_length_is_limited(self, api_client, instructor):
+        response = self.book_series(api_client, instructor, next_weekday(0), 27)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+class TestAvailabilityExceptions:
+    """
+    Test cases for date-specific availability exceptions
+    """
+
+    @pytest.fixture
+    def instructor_client(self, instructor):
+        """Fixture to provide an APIClient authenticated as the instructor"""
+        client = get_api_client()
+        client.force_authenticate(user=instructor)
+        return client
+
+    def slots(self, api_client, instructor, lesson_date):
+        response = api_client.post(reverse('check-availability'), {'instructor_id': instructor.id, 'date': lesson_date})
+        return [slot['start_time'] for slot in response.data['available_slots']]
+
+    def test_holiday_and_extra_slot(self, api_client, instructor_client, instructor):
+        monday = next_weekday(0)
+        saturday = monday + timedelta(days=5)
+
+        holiday = instructor_client.post(reverse('availability-exceptions'), {
+            'date': monday.isoformat(), 'reason': 'Holiday'
+        }, format='json')
+        extra = instructor_client.post(reverse('availability-exceptions'), {
+            'date': saturday.isoformat(), 'start_time': '10:00', 'end_time': '12:00', 'is_available': True
+        }, format='json')
+        assert holiday.status_code == extra.status_code == status.HTTP_201_CREATED
+
+        assert self.slots(api_client, instructor, monday) == []
+        assert self.slots(api_client, instructor, saturday) == ['10:00', '11:00']
+        assert len(self.slots(api_client, instructor, monday + timedelta(weeks=1))) == 8
+
+        # Booking follows the same rules
+        booking = {'instructor': instructor.id, 'start_time': '10:00', 'end_time': '11:00'}
+        assert api_client.post(
+            reverse('create-booking'), {**booking, 'lesson_date': monday.isoformat()}, format='json'
+        ).status_code == status.HTTP_400_BAD_REQUEST
+        assert api_client.post(
+            reverse('create-booking'), {**booking, 'lesson_date': saturday.isoformat()}, format='json'
+        ).status_code == status.HTTP_201_CREATED
+
+        calendar = api_client.get(reverse('instructor-bookings', args=[instructor.id]), {
+            'start_date': monday.isoformat(), 'end_date': saturday.isoformat()
+        })
+        assert calendar.data['calendar_data'][0]['exceptions'][0]['reason'] == 'Holiday'
+        assert calendar.data['calendar_data'][5]['exceptions'][0]['start_time'] == '10:00'
+
+        listed = instructor_client.get(reverse('availability-exceptions'), {'start_date': saturday.isoformat()})
+        assert [exception['id'] for exception in listed.data] == [extra.data['id']]
+
+        assert instructor_client.delete(
+            reverse('availability-exception-detail', args=[holiday.data['id']])
+        ).status_code == status.HTTP_204_NO_CONTENT
+        assert len(self.slots(api_client, instructor, monday)) == 8
+
+    @pytest.mark.parametrize('data', [
+        {'start_time': '10:00'},
+        {'start_time': '12:00', 'end_time': '10:00'},
+        {'is_available': True},
+    ])
+    def test_invalid_exceptions(self, instructor_client, data):
+        response = instructor_client.post(reverse('availability-exceptions'), {
+            'date': next_weekday(0).isoformat(), **data
+        }, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_exceptions_apply_to_series(self, api_client, instructor):
+        monday = next_weekday(0)
+        AvailabilityException.objects.create(instructor_profile=instructor.instructor_profile, date=monday + timedelta(weeks=1))
+
+        response = api_client.post(reverse('create-booking-series'), {
+            'instructor': instructor.id, 'start_date': monday.isoformat(), 'start_time': '10:00', 'end_time': '11:00',
+            'occurrences': 3, 'allow_partial': True
+        }, format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert [conflict['date'] for conflict in response.data['conflicts']] == [(monday + timedelta(weeks=1)).isoformat()]
+
+
+@pytest.mark.django_db
+class TestWaitlist:
+    """
+    Test cases for offering cancelled slots to the waitlist
+    """
+
+    def waiting_learner(self, username, instructor, lesson_date, start=None, end=None):
+        learner = User.objects.create_user(username=username, password='testpass123', user_type='learner')
+        WaitlistEntry.objects.create(
+            learner=learner, instructor=instructor, earliest_date=lesson_date - timedelta(days=3),
+            latest_date=lesson_date + timedelta(days=3), preferred_start_time=start, preferred_end_time=end
+        )
+        client = get_api_client()
+        client.force_authenticate(user=learner)
+        return learner, client
+
+    def cancel(self, client, booking, capture_on_commit):
+        """Cancel a booking, running what waits for the cancellation to be committed"""
+        with capture_on_commit(execute=True):
+            return client.post(reverse('cancel-booking', args=[booking.id]))
+
+    def test_cancellation_is_offered_to_first_match(self, api_client, learner, instructor, django_capture_on_commit_callbacks):
+        lesson_date = next_weekday(0) + timedelta(weeks=1)
+        booking = make_booking(learner, instructor, lesson_date, time(10), time(11))
+        self.waiting_learner('evenings', instructor, lesson_date, time(16), time(20))
+        mornings, mornings_client = self.waiting_learner('mornings', instructor, lesson_date, time(9), time(12))
+        anytime, anytime_client = self.waiting_learner('anytime', instructor, lesson_date)
+
+        response = self.cancel(api_client, booking, django_capture_on_commit_callbacks)
+        assert response.status_code == status.HTTP_200_OK
+
+        entries = mornings_client.get(reverse('waitlist')).data
+        assert entries[0]['status'] == 'offered'
+        assert entries[0]['offered_start_time'] == '10:00:00'
+        assert entries[0]['hold_expires_at']
+
+        # The slot is held for the learner it was offered to
+        assert anytime_client.post(reverse('slot-hold'), {
+            'instructor': instructor.id, 'lesson_date': lesson_date.isoformat(), 'start_time': '10:00', 'end_time': '11:00'
+        }, format='json').status_code == status.HTTP_409_CONFLICT
+
+        confirmed = mornings_client.post(reverse('confirm-hold', args=[entries[0]['hold']]))
+        assert confirmed.status_code == status.HTTP_201_CREATED
+        assert WaitlistEntry.objects.get(learner=mornings).status == 'booked'
+        assert WaitlistEntry.objects.get(learner=anytime).status == 'waiting'
+
+    def test_lapsed_offer_passes_to_next_learner(self, api_client, learner, instructor, django_capture_on_commit_callbacks):
+        lesson_date = next_weekday(0) + timedelta(weeks=1)
+        booking = make_booking(learner, instructor, lesson_date, time(10), time(11))
+        first, _ = self.waiting_learner('first', instructor, lesson_date)
+        second, _ = self.waiting_learner('second', instructor, lesson_date)
+
+        self.cancel(api_client, booking, django_capture_on_commit_callbacks)
+        SlotHold.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        assert expire_offers() == 1
+        assert WaitlistEntry.objects.get(learner=first).status == 'expired'
+        assert WaitlistEntry.objects.get(learner=second).status == 'offered'
+        assert SlotHold.objects.get(expires_at__gt=timezone.now()).learner == second
+
+    def test_offers_skip_learners_holding_a_slot(self, api_client, learner, instructor, django_capture_on_commit_callbacks):
+        lesson_date = next_weekday(0) + timedelta(weeks=1)
+        booking = make_booking(learner, instructor, lesson_date, time(10), time(11))
+        busy, busy_client = self.waiting_learner('busy', instructor, lesson_date)
+        free, _ = self.waiting_learner('free', instructor, lesson_date)
+        held = busy_client.post(reverse('slot-hold'), {
+            'instructor': instructor.id, 'lesson_date': lesson_date.isoformat(), 'start_time': '14:00', 'end_time': '15:00'
+        }, format='json')
+        assert held.status_code == status.HTTP_201_CREATED
+
+        self.cancel(api_client, booking, django_capture_on_commit_callbacks)
+
+        # The learner mid-checkout keeps their hold and the offer goes to the next in line
+        assert SlotHold.objects.filter(pk=held.data['id'], learner=busy).exists()
+        assert WaitlistEntry.objects.get(learner=busy).status == 'waiting'
+        assert WaitlistEntry.objects.get(learner=free).status == 'offered'
+
+    def test_leaving_the_waitlist_releases_the_offer(self, api_client, learner, instructor, django_capture_on_commit_callbacks):
+        lesson_date = next_weekday(0) + timedelta(weeks=1)
+        booking = make_booking(learner, instructor, lesson_date, time(10), time(11))
+        waiting, client = self.waiting_learner('waiting', instructor, lesson_date)
+        self.cancel(api_client, booking, django_capture_on_commit_callbacks)
+
+        entry = WaitlistEntry.objects.get(learner=waiting)
+        assert client.delete(reverse('waitlist-detail', args=[entry.id])).status_code == status.HTTP_204_NO_CONTENT
+        assert not SlotHold.objects.exists()
+        assert client.get(reverse('waitlist')).data == []
+
+    def test_offer_passes_over_learners_who_cant_hold_it(
+        self, api_client, learner, instructor, django_capture_on_commit_callbacks, monkeypatch
+    ):
+        lesson_date = next_weekday(0) + timedelta(weeks=1)
+        booking = make_booking(learner, instructor, lesson_date, time(10), time(11))
+        busy, _ = self.waiting_learner('busy', instructor, lesson_date)
+        free, _ = self.waiting_learner('free', instructor, lesson_date)
+
+        # The first learner starts holding another slot after the waitlist is read
+        def hold_slot(instructor_id, learner_id, *args, **kwargs):
+            if learner_id == busy.id:
+                raise BookingConflict('The learner is already holding a slot with this instructor.')
+            return booking_service.hold_slot(instructor_id, learner_id, *args, **kwargs)
+        monkeypatch.setattr(waitlist, 'hold_slot', hold_slot)
+
+        self.cancel(api_client, booking, django_capture_on_commit_callbacks)
+
+        assert WaitlistEntry.objects.get(learner=busy).status == 'waiting'
+        assert WaitlistEntry.objects.get(learner=free).status == 'offered'
+        assert SlotHold.objects.get().learner == free
+
+    def test_failed_offer_keeps_the_cancellation(
+        self, api_client, learner, instructor, django_capture_on_commit_callbacks, monkeypatch
+    ):
+        lesson_date = next_weekday(0) + timedelta(weeks=1)
+        booking = make_booking(learner, instructor, lesson_date, time(10), time(11))
+        self.waiting_learner('waiting', instructor, lesson_date)
+
+        def offer_cancelled_booking(booking):
+            raise RuntimeError('waitlist unavailable')
+        monkeypatch.setattr(booking_views, 'offer_cancelled_booking', offer_cancelled_booking)
+
+        response = self.cancel(api_client, booking, django_capture_on_commit_callbacks)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert Booking.objects.get(pk=booking.pk).status == 'cancelled'
+        assert not SlotHold.objects.exists()
+
+    @pytest.mark.parametrize('days, status_code', [
+        ((1, 7), status.HTTP_201_CREATED),
+        ((7, 1), status.HTTP_400_BAD_REQUEST),
+        ((-7, -1), status.HTTP_400_BAD_REQUEST),
+        ((1, 120), status.HTTP_400_BAD_REQUEST),
+    ])
+    def test_join_waitlist(self, api_client, instructor, days, status_code):
+        today = timezone.now().date()
+        response = api_client.post(reverse('waitlist'), {
+            'instructor': instructor.id,
+            'earliest_date': (today + timedelta(days=days[0])).isoformat(),
+            'latest_date': (today + timedelta(days=days[1])).isoformat(),
+        }, format='json')
+
+        assert response.status_code == status_code
@@ -0,0 +1,158 @@
+import pytest
+import requests
+from unittest import mock
+
+from .http_client import CircuitBreaker, HTTPClient, UpstreamUnavailable
+from .test_postcode_service import make_response
+
+
+@pytest.fixture
+def client():
+    """Fixture to provide an HTTPClient with a mocked session and no backoff sleeps"""
+    http_client = HTTPClient({
+        'RETRIES': 2,
+        'CONNECT_TIMEOUT': 2,
+        'READ_TIMEOUT': 5,
+        'BREAKER_MIN_CALLS': 4,
+        'HOSTS': {'slow.example.com': {'MAX_CONCURRENT': 1}},
+    })
+    http_client.session = mock.Mock()
+    with mock.patch('user_management.http_client.time.sleep') as sleep:
+        http_client.sleep = sleep
+        yield http_client
+
+
+class TestHTTPClient:
+    """
+    Test cases for the shared outbound HTTP client
+    """
+
+    def test_idempotent_calls_are_retried(self, client):
+        client.session.request.side_effect = [requests.ConnectionError(), make_response(503), make_response(200)]
+
+        response = client.get('https://api.postcodes.io/postcodes/LN11AA')
+
+        assert response.status_code == 200
+        assert client.session.request.call_count == 3
+        assert client.sleep.call_count == 2
+        assert all(0 <= call.args[0] <= client.backoff_max for call in client.sleep.call_args_list)
+
+        stats = client.stats()['api.postcodes.io']
+        assert stats['requests'] == 3
+        assert stats['retries'] == 2
+        assert stats['errors'] == 2
+        assert stats['statuses'] == {503: 1, 200: 1}
+
+    def test_posts_are_sent_once_unless_marked_idempotent(self, client):
+        client.session.request.return_value = make_response(503)
+
+        assert client.post('https://example.com/charge').status_code == 503
+        assert client.session.request.call_count == 1
+
+        client.post('https://example.com/lookup', idempotent=True)
+        assert client.session.request.call_count == 4
+
+    def test_last_failure_is_raised(self, client):
+        client.session.request.side_effect = requests.Timeout()
+
+        with pytest.raises(requests.Timeout):
+            client.get('https://example.com/slow')
+        assert client.session.request.call_count == 3
+
+    def test_connect_and_read_timeouts(self, client):
+        client.session.request.return_value = make_response(200)
+
+        client.get('https://example.com/a')
+        client.get('https://example.com/b', timeout=15)
+        client.get('https://example.com/c', timeout=(1, 2))
+
+        timeouts = [call.kwargs['timeout'] for call in client.session.request.call_args_list]
+        assert timeouts == [(2, 5), (2, 15), (1, 2)]
+
+    def test_bound_client_adds_headers(self, client):
+        client.session.request.return_value = make_response(200)
+        dvla = client.bind(headers={'x-api-key': 'secret'}, timeout=30)
+
+        dvla.post('https://dvla.example.com/vehicles', json={}, headers={'X-Trace': '1'})
+
+        call = client.session.request.call_args
+        assert call.kwargs['headers'] == {'x-api-key': 'secret', 'X-Trace': '1'}
+        assert call.kwargs['timeout'] == (2, 30)
+
+
+class TestCircuitBreaker:
+    """
+    Test cases for the per-upstream circuit breaker and bulkhead
+    """
+
+    def test_breaker_opens_and_fails_fast(self, client):
+        client.session.request.return_value = make_response(503)
+
+        client.get('https://api.postcodes.io/postcodes/LN11AA', retries=0)
+        client.get('https://api.postcodes.io/postcodes/LN11AB')
+        assert client.session.request.call_count == 4
+
+        with pytest.raises(UpstreamUnavailable) as excinfo:
+            client.get('https://api.postcodes.io/postcodes/LN11AC')
+        assert excinfo.value.retry_after > 0
+        assert client.session.request.call_count == 4
+
+        # Other upstreams are unaffected
+        client.get('https://example.com/ok', retries=0)
+        assert client.session.request.call_count == 5
+
+        stats = client.stats()['api.postcodes.io']
+        assert stats['circuit']['state'] == CircuitBreaker.OPEN
+        assert stats['rejected'] == 1
+
+    def test_half_open_trial_closes_the_circuit(self):
+        breaker = CircuitBreaker(min_calls=2, open_seconds=30)
+        with mock.patch('user_management.http_client.time.monotonic', return_value=100):
+            breaker.record(failed=True)
+            breaker.record(failed=True)
+            assert not breaker.allow()
+
+        with mock.patch('user_management.http_client.time.monotonic', return_value=131):
+            assert breaker.allow()
+            assert breaker.state == CircuitBreaker.HALF_OPEN
+            # Only one trial call at a time
+            assert not breaker.allow()
+            breaker.record(failed=False)
+
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert breaker.allow()
+
+    def test_trial_raising_unexpected_error_frees_the_trial(self, client):
+        breaker = client.upstream('api.postcodes.io').breaker
+        breaker.state, breaker.opened_at = CircuitBreaker.OPEN, 0.0
+        client.session.request.side_effect = ValueError('bad header')
+
+        with pytest.raises(ValueError):
+            client.get('https://api.postcodes.io/postcodes/LN11AA')
+
+        # The next call is let through as a new trial instead of being refused for good
+        client.session.request.side_effect = None
+        client.session.request.return_value = make_response(200)
+        assert client.get('https://api.postcodes.io/postcodes/LN11AA').status_code == 200
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_slow_calls_count_as_failures(self):
+        breaker = CircuitBreaker(slow_call_seconds=5)
+
+        assert breaker.is_failure(200, 6.0)
+        assert breaker.is_failure(429, 0.1)
+        assert breaker.is_failure(None, 0.1)
+        assert not breaker.is_failure(404, 0.1)
+
+    def test_bulkhead_rejects_when_full(self, client):
+        upstream = client.upstream('slow.example.com')
+        assert upstream.bulkhead.acquire()
+
+        with pytest.raises(UpstreamUnavailable):
+            client.get('https://slow.example.com/lookup')
+        client.session.request.assert_not_called()
+
+        upstream.bulkhead.release()
+        client.session.request.return_value = make_response(200)
+        assert client.get('https://slow.example.com/lookup').status_code == 200
+        assert upstream.bulkhead.in_flight == 0
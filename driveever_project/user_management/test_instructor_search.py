@@ -0,0 +1,378 @@
+import pytest
+from datetime import time
+from decimal import Decimal
+from unittest import mock
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+
+from .geo import geohash_encode, geohash_neighbours, haversine_km, place_matrix
+from .models import User, InstructorProfile, InstructorCoverage, InstructorAvailability
+from .postcode_utils import extract_outcodes
+from .checks import check_search_generation_cache
+from .search_cache import search_cache
+
+
+@pytest.fixture(autouse=True)
+def empty_search_cache():
+    """Cached responses outlive the per-test database rollback"""
+    search_cache.clear()
+
+
+def get_api_client():
+    from rest_framework.test import APIClient
+    return APIClient()
+
+
+def make_instructor(username, postcodes, price='30.00', is_verified=False, **profile_fields):
+    user = User.objects.create_user(
+        username=username,
+        email=f'{username}@example.com',
+        password='testpass123',
+        user_type='instructor',
+        full_name=username.title()
+    )
+    return InstructorProfile.objects.create(
+        user=user,
+        postcodes=postcodes,
+        price_per_hour=Decimal(price),
+        is_verified=is_verified,
+        **profile_fields
+    )
+
+
+def place_instructor(username, outcode, latitude, longitude, **kwargs):
+    profile = make_instructor(username, outcode, **kwargs)
+    profile.sync_coverage(centroids={outcode: {'latitude': latitude, 'longitude': longitude}})
+    return profile
+
+
+def resolution(postcode, outcode, latitude=53.23, longitude=-0.54):
+    return {
+        'valid': True,
+        'status': 'success',
+        'postcode': postcode.replace(' ', ''),
+        'data': {
+            'postcode': postcode,
+            'outcode': outcode,
+            'latitude': latitude,
+            'longitude': longitude,
+            'region': 'East Midlands',
+            'admin_district': 'Lincoln'
+        }
+    }
+
+
+class TestExtractOutcodes:
+    """
+    Test cases for parsing free-text instructor coverage
+    """
+
+    def test_mixed_outcodes_and_postcodes(self):
+        assert extract_outcodes('LN1, ln2 ,LN5 8NY, LN1 1AA, nonsense') == ['LN1', 'LN2', 'LN5']
+
+    def test_empty_coverage(self):
+        assert extract_outcodes(None) == []
+
+
+class TestGeo:
+    """
+    Test cases for geohash and distance helpers
+    """
+
+    def test_geohash_encode(self):
+        assert geohash_encode(57.64911, 10.40744, 9) == 'u4pruydqq'
+
+    def test_neighbours_include_own_cell(self):
+        cells = geohash_neighbours(53.23, -0.54, 5)
+        assert len(cells) == 9
+        assert geohash_encode(53.23, -0.54, 5) in cells
+
+    def test_haversine(self):
+        # Lincoln to Nottingham is roughly 51 km
+        assert haversine_km(53.2307, -0.5406, 52.9548, -1.1581) == pytest.approx(51, abs=2)
+
+    @pytest.mark.parametrize('numpy', [True, False])
+    def test_place_matrix(self, numpy):
+        distances = [[1.234, 2.345], [3.456, 4.567]]
+        with mock.patch('user_management.geo.np', None) if not numpy else mock.MagicMock():
+            assert place_matrix(distances, [0, 1], [0, 1], (2, 2), scale=10) == [[12.34, 23.45], [34.56, 45.67]]
+            assert place_matrix(distances, [0, 2], [1, 2], (3, 3)) == [
+                [None, 1.23, 2.35], [None, None, None], [None, 3.46, 4.57]
+            ]
+
+
+@pytest.mark.django_db
+class TestInstructorCoverage:
+    """
+    Test cases for keeping InstructorCoverage in sync with InstructorProfile.postcodes
+    """
+
+    def test_coverage_follows_postcodes_on_save(self):
+        profile = make_instructor('coverage', 'LN1, LN2')
+        assert set(profile.coverage_areas.values_list('outcode', flat=True)) == {'LN1', 'LN2'}
+
+        profile.postcodes = 'LN2, LN10'
+        profile.save()
+        assert set(profile.coverage_areas.values_list('outcode', flat=True)) == {'LN2', 'LN10'}
+
+    def test_centroids_fill_existing_rows(self):
+        profile = make_instructor('centroid', 'LN1')
+        profile.sync_coverage(centroids={'LN1': {'latitude': 53.2, 'longitude': -0.5, 'district': 'Lincoln'}})
+
+        area = InstructorCoverage.objects.get(instructor_profile=profile)
+        assert (area.latitude, area.longitude, area.district) == (53.2, -0.5, 'Lincoln')
+
+
+@pytest.mark.django_db
+class TestUserSearchView:
+    """
+    Test cases for instructor search by postcode
+    """
+
+    @pytest.fixture
+    def api_client(self):
+        """Fixture to provide an authenticated APIClient instance"""
+        client = get_api_client()
+        learner = User.objects.create_user(username='learner', password='testpass123', user_type='learner')
+        client.force_authenticate(user=learner)
+        return client
+
+    def test_outcode_match_is_exact(self, api_client):
+        make_instructor('lincoln', 'LN1, LN2')
+        make_instructor('horncastle', 'LN10')
+
+        with mock.patch('user_management.views.postcode_service.resolve_postcode',
+                        return_value=resolution('LN1 1AA', 'LN1')):
+            response = api_client.get(reverse('user-search'), {'postcode': 'LN1 1AA', 'user_type': 'instructor'})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [i['full_name'] for i in response.data['instructors']] == ['Lincoln']
+        assert response.data['instructors'][0]['is_nearby'] is False
+
+    def test_radius_search_is_sorted_by_distance(self, api_client):
+        place_instructor('gainsborough', 'DN21', 53.40, -0.77, service_radius_km=50)
+        place_instructor('lincoln', 'LN1', 53.23, -0.54, service_radius_km=50)
+        place_instructor('london', 'SW1A', 51.50, -0.14, service_radius_km=50)
+        place_instructor('sleaford', 'NG34', 53.00, -0.41, service_radius_km=10)
+
+        with mock.patch('user_management.views.postcode_service.resolve_postcode',
+                        return_value=resolution('LN1 1AA', 'LN1')):
+            response = api_client.get(reverse('user-search'), {'postcode': 'LN1 1AA', 'radius_km': 40})
+
+        assert response.status_code == status.HTTP_200_OK
+        instructors = response.data['instructors']
+        # Sleaford is inside the search radius but the postcode is outside its own service radius
+        assert [i['full_name'] for i in instructors] == ['Lincoln', 'Gainsborough']
+        assert instructors[0]['is_nearby'] is False
+        assert instructors[1]['is_nearby'] is True
+        assert instructors[0]['distance_km'] < instructors[1]['distance_km']
+
+    def test_nearby_fallback_uses_service_area(self, api_client):
+        place_instructor('lincoln', 'LN2', 53.25, -0.52)
+
+        with mock.patch('user_management.views.postcode_service.resolve_postcode',
+                        return_value=resolution('LN1 1AA', 'LN1')):
+            response = api_client.get(reverse('user-search'), {'postcode': 'LN1 1AA'})
+
+        assert [i['is_nearby'] for i in response.data['instructors']] == [True]
+        assert 'km away' in response.data['instructors'][0]['distance_note']
+
+    def test_invalid_radius(self, api_client):
+        with mock.patch('user_management.views.postcode_service.resolve_postcode',
+                        return_value=resolution('LN1 1AA', 'LN1')):
+            response = api_client.get(reverse('user-search'), {'postcode': 'LN1 1AA', 'radius_km': 'far'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def search_all_pages(self, api_client, params):
+        pages = []
+        cursor = None
+        with mock.patch('user_management.views.postcode_service.resolve_postcode',
+                        return_value=resolution('LN1 1AA', 'LN1')):
+            while True:
+                response = api_client.get(reverse('user-search'), {**params, **({'cursor': cursor} if cursor else {})})
+                assert response.status_code == status.HTTP_200_OK
+                pages.append(response.data)
+                cursor = response.data['pagination']['next_cursor']
+                if not cursor:
+                    return pages
+
+    def test_pages_follow_verified_then_price_order(self, api_client):
+        make_instructor('budget', 'LN1', price='25.00')
+        make_instructor('premium', 'LN1', price='40.00', is_verified=True)
+        make_instructor('standard', 'LN1', price='30.00')
+        make_instructor('standard_too', 'LN1', price='30.00')
+        make_instructor('verified', 'LN1', price='35.00', is_verified=True)
+
+        pages = self.search_all_pages(api_client, {'postcode': 'LN1 1AA', 'user_type': 'instructor', 'page_size': 2})
+
+        assert [len(page['instructors']) for page in pages] == [2, 2, 1]
+        names = [i['full_name'] for page in pages for i in page['instructors']]
+        assert names == ['Verified', 'Premium', 'Budget', 'Standard', 'Standard_Too']
+        assert pages[0]['summary'] == {
+            'total_instructors': 5,
+            'total_academies': 0,
+            'verified_instructors': 2,
+            'price_range': {'min': 25.0, 'max': 40.0}
+        }
+        assert pages[-1]['pagination']['has_more'] is False
+
+    def test_radius_pages_follow_distance(self, api_client):
+        for i, latitude in enumerate([53.30, 53.24, 53.27]):
+            place_instructor(f'instructor{i}', f'LN{i + 2}', latitude, -0.54)
+
+        pages = self.search_all_pages(api_client, {'postcode': 'LN1 1AA', 'radius_km': 20, 'page_size': 2})
+
+        distances = [i['distance_km'] for page in pages for i in page['instructors']]
+        assert [len(page['instructors']) for page in pages] == [2, 1]
+        assert distances == sorted(distances)
+        assert pages[0]['summary']['total_instructors'] == 3
+
+    def test_invalid_cursor(self, api_client):
+        with mock.patch('user_management.views.postcode_service.resolve_postcode',
+                        return_value=resolution('LN1 1AA', 'LN1')):
+            response = api_client.get(reverse('user-search'), {'postcode': 'LN1 1AA', 'cursor': 'not-a-cursor'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def search_query_count(self, api_client, params):
+        with mock.patch('user_management.views.postcode_service.resolve_postcode',
+                        return_value=resolution('LN1 1AA', 'LN1')):
+            with CaptureQueriesContext(connection) as queries:
+                response = api_client.get(reverse('user-search'), params)
+        assert response.status_code == status.HTTP_200_OK
+        return len(response.data['instructors']), len(queries)
+
+    @pytest.mark.parametrize('params', [
+        {'postcode': 'LN1 1AA', 'user_type': 'instructor'},
+        {'postcode': 'LN1 1AA', 'user_type': 'instructor', 'radius_km': 20},
+    ])
+    def test_query_count_does_not_grow_with_results(self, api_client, params, django_capture_on_commit_callbacks):
+        def add_instructors(start, count):
+            with django_capture_on_commit_callbacks(execute=True):
+                for i in range(start, start + count):
+                    profile = place_instructor(f'instructor{i}', 'LN1', 53.23, -0.54)
+                    for day in range(3):
+                        InstructorAvailability.objects.create(
+                            instructor_profile=profile, day_of_week=day, start_time=time(9), end_time=time(17)
+                        )
+
+        add_instructors(0, 2)
+        few_results, few_queries = self.search_query_count(api_client, params)
+
+        add_instructors(2, 8)
+        many_results, many_queries = self.search_query_count(api_client, params)
+
+        assert (few_results, many_results) == (2, 10)
+        assert many_queries == few_queries
+
+
+@pytest.mark.django_db
+class TestSearchResultCache:
+    """
+    Test cases for caching search results per outcode
+    """
+
+    @pytest.fixture
+    def api_client(self):
+        """Fixture to provide an authenticated APIClient instance"""
+        client = get_api_client()
+        learner = User.objects.create_user(username='learner', password='testpass123', user_type='learner')
+        client.force_authenticate(user=learner)
+        return client
+
+    def search(self, api_client, postcode='LN1 1AA', outcode='LN1', **params):
+        with mock.patch('user_management.views.postcode_service.resolve_postcode',
+                        return_value=resolution(postcode, outcode)) as resolve:
+            response = api_client.get(reverse('user-search'), {'postcode': postcode, **params})
+        assert response.status_code == status.HTTP_200_OK
+        return response.data, resolve.call_count
+
+    def test_repeat_search_skips_database_and_postcode_lookup(self, api_client):
+        make_instructor('lincoln', 'LN1')
+        self.search(api_client, user_type='instructor', price_max='50')
+
+        with CaptureQueriesContext(connection) as queries:
+            data, lookups = self.search(api_client, user_type='instructor', price_max='50.00')
+
+        assert len(queries) == 0
+        assert lookups == 0
+        assert [i['full_name'] for i in data['instructors']] == ['Lincoln']
+        assert data['search_criteria']['price_max'] == '50.00'
+
+    def test_changes_invalidate_only_affected_outcodes(self, api_client, django_capture_on_commit_callbacks):
+        profile = make_instructor('lincoln', 'LN1')
+        make_instructor('grimsby', 'DN31')
+        self.search(api_client)
+        self.search(api_client, 'DN31 1AA', 'DN31')
+
+        with django_capture_on_commit_callbacks(execute=True):
+            InstructorAvailability.objects.create(
+                instructor_profile=profile, day_of_week=0, start_time=time(9), end_time=time(17)
+            )
+
+        data, lookups = self.search(api_client)
+        assert lookups == 1
+        assert data['instructors'][0]['availability_count'] == 1
+        assert self.search(api_client, 'DN31 1AA', 'DN31')[1] == 0
+
+    def test_moving_instructor_invalidates_old_outcode(self, api_client, django_capture_on_commit_callbacks):
+        profile = make_instructor('lincoln', 'LN1')
+        assert len(self.search(api_client)[0]['instructors']) == 1
+
+        with django_capture_on_commit_callbacks(execute=True):
+            profile.postcodes = 'LN2'
+            profile.save()
+
+        assert self.search(api_client)[0]['instructors'] == []
+
+    def test_invalidation_waits_for_commit(self, api_client, django_capture_on_commit_callbacks):
+        profile = make_instructor('lincoln', 'LN1')
+        self.search(api_client)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            profile.postcodes = 'LN2'
+            profile.save()
+            # Searches before the commit neither see nor cache a new generation
+            assert self.search(api_client)[1] == 0
+
+        assert self.search(api_client)[1] == 1
+
+    def test_renaming_instructor_invalidates_their_outcodes(self, api_client, django_capture_on_commit_callbacks):
+        profile = make_instructor('lincoln', 'LN1')
+        self.search(api_client)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            profile.user.full_name = 'Lincoln Driving'
+            profile.user.save()
+
+        data, lookups = self.search(api_client)
+        assert lookups == 1
+        assert data['instructors'][0]['full_name'] == 'Lincoln Driving'
+
+    def test_radius_searches_are_not_cached(self, api_client):
+        place_instructor('lincoln', 'LN1', 53.23, -0.54)
+        self.search(api_client, radius_km=10)
+
+        assert self.search(api_client, radius_km=10)[1] == 1
+
+    def test_evicted_generation_never_goes_backwards(self):
+        search_cache.invalidate(['LN1'])
+        before = search_cache.generation('LN1')
+
+        search_cache.generations.delete(search_cache._generation_key('LN1'))
+        search_cache.invalidate(['LN1'])
+
+        assert search_cache.generation('LN1') > before
+
+    def test_check_warns_when_generations_are_per_process(self, settings, tmp_path):
+        assert [e.id for e in check_search_generation_cache(None)] == ['user_management.W001']
+
+        settings.CACHES = {
+            **settings.CACHES,
+            'shared': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': str(tmp_path)},
+        }
+        settings.SEARCH_CACHE = {**settings.SEARCH_CACHE, 'GENERATION_CACHE_ALIAS': 'shared'}
+        assert check_search_generation_cache(None) == []
@@ -0,0 +1,111 @@
+import pytest
+from unittest import mock
+from django.core.management import call_command
+
+from .local_postcode_service import LocalPostcodeService, write_postcode_snapshot
+
+
+ONSPD_HEADER = 'pcd,pcds,doterm,oseast1m,osnrth1m,rgn,oslaua,lat,long\n'
+ONSPD_ROWS = [
+    'LN1 1AA,LN1 1AA,,497300,371700,E12000004,E07000138,53.230000,-0.540000',
+    'LN1 1AB,LN1 1AB,,497350,371750,E12000004,E07000138,53.231000,-0.541000',
+    'LN101AA,LN10 1AA,,522000,363000,E12000004,E07000137,53.150000,-0.180000',
+    'SW1A1AA,SW1A 1AA,,529090,179645,E12000007,E09000033,51.501009,-0.141588',
+    'SW1A9ZZ,SW1A 9ZZ,200012,529000,179600,E12000007,E09000033,51.500000,-0.140000',
+    'ZZ991ZZ,ZZ99 1ZZ,,,,,,99.999999,0.000000',
+]
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    """Fixture to build a small postcode snapshot from an ONSPD-style CSV"""
+    csv_file = tmp_path / 'onspd.csv'
+    csv_file.write_text(ONSPD_HEADER + '\n'.join(ONSPD_ROWS) + '\n')
+
+    names_file = tmp_path / 'names.csv'
+    names_file.write_text('E12000004,East Midlands\nE12000007,London\nE07000138,Lincoln\n')
+
+    output = tmp_path / 'postcodes.bin'
+    call_command('import_postcodes', str(csv_file), output=str(output), names=[str(names_file)])
+    return output
+
+
+@pytest.fixture
+def service(snapshot):
+    """Fixture to provide a LocalPostcodeService that must not touch the network"""
+    local_service = LocalPostcodeService(data_file=str(snapshot))
+    local_service.session = mock.Mock()
+    local_service.session.get.side_effect = AssertionError('unexpected network call')
+    local_service.session.post.side_effect = AssertionError('unexpected network call')
+    return local_service
+
+
+class TestLocalPostcodeService:
+    """
+    Test cases for the snapshot-backed postcode service
+    """
+
+    def test_import_skips_terminated_and_unlocated_postcodes(self, service):
+        assert len(service.store) == 4
+        assert service.store.find('SW1A 9ZZ') is None
+        assert service.store.find('ZZ99 1ZZ') is None
+
+    def test_lookup_answers_from_snapshot(self, service):
+        result = service.get_postcode_info('ln1 1aa')
+
+        assert result['status'] == 'success'
+        assert result['postcode'] == 'LN11AA'
+        assert result['data']['postcode'] == 'LN1 1AA'
+        assert result['data']['outcode'] == 'LN1'
+        assert result['data']['region'] == 'East Midlands'
+        assert result['data']['admin_district'] == 'Lincoln'
+        assert result['data']['eastings'] == 497300
+        assert result['data']['latitude'] == pytest.approx(53.23, abs=1e-5)
+
+    def test_validate_known_postcode(self, service):
+        result = service.validate_postcode('SW1A 1AA')
+        assert result == {'valid': True, 'postcode': 'SW1A1AA', 'status': 'success'}
+
+    def test_unknown_postcode_falls_back_to_api(self, service):
+        service.session.get.side_effect = None
+        service.session.get.return_value = mock.Mock(status_code=200, json=lambda: {'result': False})
+
+        result = service.validate_postcode('AB1 2CD')
+
+        assert result['valid'] is False
+        service.session.get.assert_called_once()
+
+    def test_nearest_postcodes_stop_at_max_distance(self, service):
+        result = service.find_nearest_postcodes('LN1 1AB', limit=5)
+
+        # LN10 1AA is 25km away
+        postcodes = [p['postcode'] for p in result['nearest_postcodes']]
+        assert postcodes == ['LN1 1AB', 'LN1 1AA']
+        assert result['nearest_postcodes'][0]['distance'] == 0
+
+    def test_nearest_postcodes_cross_outcodes(self, tmp_path):
+        data_file = str(tmp_path / 'postcodes.bin')
+        write_postcode_snapshot(data_file, [
+            ('LN1 1AA', 53.2300, -0.5400, 0, 0, '', ''),
+            ('LN1 9ZZ', 53.2600, -0.5900, 0, 0, '', ''),  # same outcode, 4.8km away
+            ('LN2 1AA', 53.2320, -0.5380, 0, 0, '', ''),  # next outcode, 260m away
+            ('LN6 1AA', 53.2100, -0.5700, 0, 0, '', ''),  # 3km away, in another grid cell
+        ])
+        local_service = LocalPostcodeService(data_file=data_file)
+
+        result = local_service.find_nearest_postcodes('LN1 1AA', limit=3)
+
+        nearest = result['nearest_postcodes']
+        assert [p['postcode'] for p in nearest] == ['LN1 1AA', 'LN2 1AA', 'LN6 1AA']
+        assert [p['distance'] for p in nearest] == sorted(p['distance'] for p in nearest)
+
+    def test_autocomplete_uses_prefix_range(self, service):
+        result = service.autocomplete_postcode('LN1', limit=10)
+        assert result['suggestions'] == ['LN10 1AA', 'LN1 1AA', 'LN1 1AB']
+
+    def test_bulk_lookup_preserves_order(self, service):
+        result = service.bulk_postcode_lookup(['SW1A 1AA', 'LN1 1AA'])
+
+        assert result['status'] == 'success'
+        assert [r['query'] for r in result['results']] == ['SW1A1AA', 'LN11AA']
+        assert all(r['valid'] for r in result['results'])
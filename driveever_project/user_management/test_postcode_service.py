@@ -0,0 +1,166 @@
+import pytest
+from unittest import mock
+
+from .postcode_service import PostcodesIOService
+from .response_cache import LRUCache
+
+
+def make_response(status_code, payload=None):
+    response = mock.Mock(status_code=status_code)
+    response.json.return_value = payload or {}
+    return response
+
+
+@pytest.fixture
+def service():
+    """Fixture to provide a PostcodesIOService with a mocked HTTP session"""
+    postcode_service = PostcodesIOService()
+    postcode_service.session = mock.Mock()
+    return postcode_service
+
+
+class TestPostcodeCache:
+    """
+    Test cases for the postcode response cache
+    """
+
+    def test_repeat_lookup_is_served_from_cache(self, service):
+        service.session.get.return_value = make_response(200, {
+            'result': {'postcode': 'LN1 1AA', 'outcode': 'LN1', 'latitude': 53.23, 'longitude': -0.54}
+        })
+
+        first = service.get_postcode_info('ln1 1aa')
+        second = service.get_postcode_info('LN1 1AA')
+
+        assert first == second
+        assert service.session.get.call_count == 1
+        stats = service.cache_stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+
+    def test_not_found_is_cached_with_negative_ttl(self, service):
+        service.session.get.return_value = make_response(404)
+
+        service.get_postcode_info('ZZ1 1ZZ')
+        result = service.get_postcode_info('ZZ1 1ZZ')
+
+        assert result['status'] == 'error'
+        assert service.session.get.call_count == 1
+        assert service.cache_stats()['negative_sets'] == 1
+
+    def test_network_errors_are_not_cached(self, service):
+        service.session.get.return_value = make_response(503)
+
+        service.validate_postcode('LN1 1AA')
+        service.validate_postcode('LN1 1AA')
+
+        assert service.session.get.call_count == 2
+
+    def test_lru_evicts_least_recently_used(self):
+        cache = LRUCache(max_entries=2)
+        cache.set('a', 1, ttl=60)
+        cache.set('b', 2, ttl=60)
+        cache.get('a')
+        cache.set('c', 3, ttl=60)
+
+        assert cache.get('a') == 1
+        assert cache.get('b', None) is None
+        assert len(cache) == 2
+
+    def test_expired_entries_are_dropped(self):
+        cache = LRUCache()
+        cache.set('a', 1, ttl=0)
+        assert cache.get('a', None) is None
+
+
+class TestResolvePostcode:
+    """
+    Test cases for single-lookup postcode resolution
+    """
+
+    def test_found_postcode_is_valid_with_data(self, service):
+        service.session.get.return_value = make_response(200, {
+            'result': {'postcode': 'LN1 1AA', 'region': 'East Midlands'}
+        })
+
+        resolution = service.resolve_postcode('LN1 1AA')
+
+        assert resolution['valid'] is True
+        assert resolution['status'] == 'success'
+        assert resolution['data']['region'] == 'East Midlands'
+        assert service.session.get.call_count == 1
+
+    def test_not_found_postcode_is_invalid(self, service):
+        service.session.get.return_value = make_response(404)
+
+        resolution = service.resolve_postcode('ZZ1 1ZZ')
+
+        assert resolution['valid'] is False
+        assert resolution['status'] == 'success'
+
+    def test_upstream_failure_is_an_error(self, service):
+        service.session.get.return_value = make_response(500)
+
+        resolution = service.resolve_postcode('LN1 1AA')
+
+        assert resolution['valid'] is False
+        assert resolution['status'] == 'error'
+
+    def test_lookup_shares_the_resolution(self, service):
+        service.session.get.return_value = make_response(200, {'result': {'postcode': 'LN1 1AA'}})
+
+        service.resolve_postcode('LN1 1AA')
+        info = service.get_postcode_info('LN1 1AA')
+
+        assert info['status'] == 'success'
+        assert service.session.get.call_count == 1
+
+    def test_bulk_resolution_is_chunked_and_cached(self, service):
+        postcodes = [f'LN{i} 1AA' for i in range(150)]
+
+        def bulk_response(url, json, **kwargs):
+            return make_response(200, {'result': [
+                {'query': p, 'result': {'postcode': p} if not p.startswith('LN9') else None}
+                for p in json['postcodes']
+            ]})
+
+        service.session.post.side_effect = bulk_response
+
+        resolutions = service.resolve_postcodes(postcodes)
+
+        assert service.session.post.call_count == 2
+        assert [len(c.kwargs['json']['postcodes']) for c in service.session.post.call_args_list] == [100, 50]
+        assert resolutions[0]['valid'] is True
+        assert resolutions[9]['valid'] is False
+
+        service.resolve_postcode('LN1 1AA')
+        service.resolve_postcodes(['LN2 1AA', 'LN3 1AA'])
+        service.session.get.assert_not_called()
+        assert service.session.post.call_count == 2
+
+
+class TestDistanceMatrix:
+    """
+    Test cases for the vectorised distance matrix
+    """
+
+    def test_matrix_uses_one_bulk_lookup(self, service):
+        coordinates = {
+            'LN11AA': (53.2307, -0.5406),
+            'NG11AA': (52.9548, -1.1581),
+            'SW1A1AA': (51.5010, -0.1416),
+        }
+        service.session.post.return_value = make_response(200, {'result': [
+            {'query': p, 'result': {'postcode': p, 'latitude': lat, 'longitude': lon}}
+            for p, (lat, lon) in coordinates.items()
+        ] + [{'query': 'ZZ11ZZ', 'result': None}]})
+
+        result = service.distance_matrix(['LN1 1AA', 'ZZ1 1ZZ'], ['NG1 1AA', 'SW1A 1AA', 'LN1 1AA'])
+
+        assert service.session.post.call_count == 1
+        assert result['status'] == 'success'
+        assert result['invalid_postcodes'] == ['ZZ11ZZ']
+        assert result['matrix'][0][0] == pytest.approx(51, abs=2)
+        assert result['matrix'][0][1] == pytest.approx(192, abs=5)
+        assert result['matrix'][0][2] == 0
+        assert result['matrix'][1] == [None, None, None]
@@ -0,0 +1,165 @@
+import asyncio
+import threading
+import time
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import caches
+from unittest import mock
+
+from .single_flight import SingleFlight
+from .test_postcode_service import make_response
+from .vehicle_service import DVLAVehicleService
+
+
+def run_concurrently(count, target):
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+class TestSingleFlight:
+    """
+    Test cases for coalescing concurrent lookups of the same key
+    """
+
+    def test_concurrent_callers_share_one_call(self):
+        flights = SingleFlight('test')
+        release = threading.Event()
+        calls = []
+        results = []
+
+        def fetch():
+            calls.append(1)
+            release.wait(5)
+            return 'LN1 1AA'
+
+        threads = run_concurrently(8, lambda: results.append(flights.do('LN11AA', fetch)))
+        while flights.stats()['coalesced'] < 7:
+            time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+        assert results == ['LN1 1AA'] * 8
+        assert flights.stats()['in_flight'] == 0
+
+    def test_errors_are_shared_then_forgotten(self):
+        flights = SingleFlight('test')
+
+        with pytest.raises(ValueError):
+            flights.do('key', mock.Mock(side_effect=ValueError('upstream down')))
+        assert flights.do('key', lambda: 'ok') == 'ok'
+
+    def test_waits_for_another_process(self):
+        flights = SingleFlight('test', cache_alias='default', lock_ttl=5)
+        shared = caches['default']
+        # Another process holds the lock and is about to cache its result
+        shared.add(flights._lock_key('AB12CDE'), 1, 5)
+        recheck = mock.Mock(side_effect=[(False, None), (True, 'cached by the other process')])
+        fetch = mock.Mock()
+
+        try:
+            with mock.patch.object(SingleFlight, 'POLL_INTERVAL', 0):
+                result = flights.do('AB12CDE', fetch, recheck=recheck)
+        finally:
+            shared.delete(flights._lock_key('AB12CDE'))
+
+        assert result == 'cached by the other process'
+        fetch.assert_not_called()
+        assert flights.stats()['remote_hits'] == 1
+
+    def test_calls_upstream_when_other_process_gives_up(self):
+        flights = SingleFlight('test', cache_alias='default', lock_ttl=5)
+        shared = caches['default']
+        shared.add(flights._lock_key('LN11AA'), 1, 5)
+
+        def recheck():
+            # The other process failed: no result, lock released
+            shared.delete(flights._lock_key('LN11AA'))
+            return False, None
+
+        with mock.patch.object(SingleFlight, 'POLL_INTERVAL', 0):
+            assert flights.do('LN11AA', lambda: 'fetched', recheck=recheck) == 'fetched'
+        assert shared.get(flights._lock_key('LN11AA')) is None
+
+    def test_async_callers_share_one_call(self):
+        flights = SingleFlight('test')
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return 'LN1 1AA'
+
+        async def lookups():
+            return await asyncio.gather(*(flights.ado('LN11AA', fetch) for _ in range(5)))
+
+        assert async_to_sync(lookups)() == ['LN1 1AA'] * 5
+        assert len(calls) == 1
+
+
+class TestVehicleSingleFlight:
+    """
+    Test cases for coalescing DVLA lookups
+    """
+
+    def test_concurrent_misses_make_one_dvla_call(self):
+        service = DVLAVehicleService(api_key='test')
+        service.cache.clear()
+        release = threading.Event()
+
+        def post(*args, **kwargs):
+            release.wait(5)
+            return make_response(200, {'make': 'FORD'})
+
+        service.session = mock.Mock()
+        service.session.post.side_effect = post
+        results = []
+
+        try:
+            threads = run_concurrently(5, lambda: results.append(service.lookup('AB12CDE')))
+            while service.flights.stats()['coalesced'] < 4:
+                time.sleep(0.001)
+            release.set()
+            for thread in threads:
+                thread.join()
+        finally:
+            service._executor.shutdown(wait=True)
+
+        assert results == [(200, {'make': 'FORD'})] * 5
+        assert service.session.post.call_count == 1
+        assert service.cache_stats()['upstream_calls'] == 1
+
+    def test_lock_outlasts_slowest_dvla_call(self):
+        service = DVLAVehicleService(api_key='test')
+        service._executor.shutdown()
+        client = service.session.client
+
+        attempts = client.retries + 1
+        assert service.flights.lock_ttl >= (client.connect_timeout + service.TIMEOUT) * attempts
+
+    def test_result_from_another_process_counts_as_a_hit(self):
+        service = DVLAVehicleService(api_key='test')
+        service._executor.shutdown()
+        service.cache.clear()
+        service.flights.cache_alias = 'default'
+        service.session = mock.Mock()
+        # Another process is fetching this registration, and caches it while we wait
+        caches['default'].add(service.flights._lock_key('AB12CDE'), 1, 5)
+        recheck = service._stored
+
+        def stored_by_other_process(registration):
+            service.cache.set(registration, {'status_code': 200, 'data': {'make': 'FORD'}, 'fetched_at': time.time()})
+            return recheck(registration)
+
+        try:
+            with mock.patch.object(service, '_stored', side_effect=stored_by_other_process):
+                assert service.lookup('AB12CDE') == (200, {'make': 'FORD'})
+        finally:
+            caches['default'].delete(service.flights._lock_key('AB12CDE'))
+
+        service.session.post.assert_not_called()
+        stats = service.cache_stats()
+        assert (stats['misses'], stats['fresh_hits']) == (0, 1)
@@ -0,0 +1,222 @@
+import pytest
+from datetime import date, time, timedelta
+from decimal import Decimal
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+
+from .models import User, InstructorProfile, InstructorAvailability, AvailabilityException, Booking
+from .slot_engine import daily_free_slots, date_range, format_duration, free_slots, merge_intervals, subtract_intervals
+
+
+def hm(value):
+    hours, minutes = value.split(':')
+    return int(hours) * 60 + int(minutes)
+
+
+def get_api_client():
+    from rest_framework.test import APIClient
+    return APIClient()
+
+
+def next_weekday(weekday):
+    """The first date after today falling on the given weekday (0=Monday)"""
+    today = date.today()
+    return today + timedelta(days=(weekday - today.weekday() - 1) % 7 + 1)
+
+
+class TestSlotEngine:
+    """
+    Test cases for in-memory slot generation
+    """
+
+    def test_merge_overlapping_and_touching(self):
+        assert merge_intervals([(hm('13:00'), hm('15:00')), (hm('09:00'), hm('12:00')), (hm('12:00'), hm('13:30'))]) == [
+            (hm('09:00'), hm('15:00'))
+        ]
+
+    def test_subtract_bookings_from_windows(self):
+        windows = [(hm('09:00'), hm('12:00')), (hm('13:00'), hm('17:00'))]
+        busy = [(hm('10:00'), hm('11:00')), (hm('11:30'), hm('13:30')), (hm('16:00'), hm('18:00'))]
+
+        assert subtract_intervals(windows, busy) == [
+            (hm('09:00'), hm('10:00')),
+            (hm('11:00'), hm('11:30')),
+            (hm('13:30'), hm('16:00')),
+        ]
+
+    def test_only_whole_lessons_are_offered(self):
+        slots = free_slots([(hm('09:00'), hm('12:30'))], [(hm('10:00'), hm('10:30'))], lesson_minutes=90, granularity=30)
+
+        assert slots == [(hm('10:30'), hm('12:00')), (hm('11:00'), hm('12:30'))]
+
+    def test_unbooked_days_share_weekday_slots(self):
+        monday = next_weekday(0)
+        dates = date_range(monday, monday + timedelta(days=14))
+        slots = daily_free_slots({0: [(hm('09:00'), hm('11:00'))]}, {monday: [(hm('09:00'), hm('10:00'))]}, dates)
+
+        assert len(slots) == 15
+        assert slots[monday] == [(hm('10:00'), hm('11:00'))]
+        assert slots[monday + timedelta(days=7)] == [(hm('09:00'), hm('10:00')), (hm('10:00'), hm('11:00'))]
+        assert slots[monday + timedelta(days=7)] is slots[monday + timedelta(days=14)]
+        assert slots[monday + timedelta(days=1)] == []
+
+    def test_date_windows_replace_weekday_windows(self):
+        monday = next_weekday(0)
+        dates = date_range(monday, monday + timedelta(days=7))
+        slots = daily_free_slots(
+            {0: [(hm('09:00'), hm('11:00'))]}, {}, dates,
+            windows_by_date={monday: [], monday + timedelta(days=5): [(hm('10:00'), hm('11:00'))]}
+        )
+
+        assert slots[monday] == []
+        assert slots[monday + timedelta(days=5)] == [(hm('10:00'), hm('11:00'))]
+        assert len(slots[monday + timedelta(days=7)]) == 2
+
+    @pytest.mark.parametrize('minutes, label', [(60, '1 hour'), (90, '1.5 hours'), (120, '2 hours')])
+    def test_format_duration(self, minutes, label):
+        assert format_duration(minutes) == label
+
+
+@pytest.mark.django_db
+class TestCheckAvailabilityView:
+    """
+    Test cases for checking an instructor's free slots on a date
+    """
+
+    @pytest.fixture
+    def api_client(self):
+        """Fixture to provide an authenticated APIClient instance"""
+        client = get_api_client()
+        learner = User.objects.create_user(username='learner', password='testpass123', user_type='learner')
+        client.force_authenticate(user=learner)
+        return client
+
+    @pytest.fixture
+    def instructor(self):
+        user = User.objects.create_user(
+            username='instructor', password='testpass123', user_type='instructor', full_name='Ian Instructor'
+        )
+        profile = InstructorProfile.objects.create(user=user, postcodes='LN1', price_per_hour=Decimal('30.00'))
+        InstructorAvailability.objects.create(
+            instructor_profile=profile, day_of_week=0, start_time=time(8), end_time=time(20)
+        )
+        return user
+
+    def book(self, instructor, lesson_date, start, end):
+        learner = User.objects.create_user(username=f'booker{start.hour}', password='testpass123', user_type='learner')
+        return Booking.objects.create(
+            learner=learner, instructor=instructor, lesson_date=lesson_date, start_time=start, end_time=end,
+            price_per_hour=Decimal('30.00'), total_price=Decimal('30.00')
+        )
+
+    def test_slots_avoid_bookings_with_four_queries(self, api_client, instructor):
+        monday = next_weekday(0)
+        self.book(instructor, monday, time(10), time(11, 30))
+        self.book(instructor, monday, time(15), time(16))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.post(reverse('check-availability'), {
+                'instructor_id': instructor.id, 'date': monday, 'lesson_minutes': 120, 'granularity': 30
+            })
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(queries) == 4
+        starts = [slot['start_time'] for slot in response.data['available_slots']]
+        assert starts == ['08:00', '11:30', '12:00', '12:30', '13:00', '16:00', '16:30', '17:00', '17:30', '18:00']
+        assert response.data['available_slots'][0]['duration'] == '2 hours'
+
+    def test_day_without_availability(self, api_client, instructor):
+        response = api_client.post(reverse('check-availability'), {'instructor_id': instructor.id, 'date': next_weekday(1)})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['available_slots'] == []
+
+    def test_unknown_instructor(self, api_client):
+        response = api_client.post(reverse('check-availability'), {'instructor_id': 999, 'date': next_weekday(0)})
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_unsupported_lesson_length(self, api_client, instructor):
+        response = api_client.post(reverse('check-availability'), {
+            'instructor_id': instructor.id, 'date': next_weekday(0), 'lesson_minutes': 45
+        })
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+class TestAvailabilityRangeView:
+    """
+    Test cases for checking several instructors over a date range
+    """
+
+    @pytest.fixture
+    def api_client(self):
+        """Fixture to provide an authenticated APIClient instance"""
+        client = get_api_client()
+        learner = User.objects.create_user(username='learner', password='testpass123', user_type='learner')
+        client.force_authenticate(user=learner)
+        return client
+
+    def make_instructors(self, count):
+        instructors = []
+        for i in range(count):
+            user = User.objects.create_user(
+                username=f'instructor{i}', password='testpass123', user_type='instructor', full_name=f'Instructor {i}'
+            )
+            profile = InstructorProfile.objects.create(user=user, postcodes='LN1', price_per_hour=Decimal('30.00'))
+            for day in range(5):
+                InstructorAvailability.objects.create(
+                    instructor_profile=profile, day_of_week=day, start_time=time(9), end_time=time(17)
+                )
+            instructors.append(user)
+        return instructors
+
+    def test_range_for_many_instructors_uses_four_queries(self, api_client):
+        instructors = self.make_instructors(4)
+        monday = next_weekday(0)
+        learner = User.objects.get(username='learner')
+        Booking.objects.create(
+            learner=learner, instructor=instructors[0], lesson_date=monday, start_time=time(9), end_time=time(12),
+            price_per_hour=Decimal('30.00'), total_price=Decimal('90.00')
+        )
+        # An extra Saturday morning for one instructor and a day off for another
+        AvailabilityException.objects.create(
+            instructor_profile=instructors[1].instructor_profile, date=monday + timedelta(days=5),
+            start_time=time(9), end_time=time(11), is_available=True
+        )
+        AvailabilityException.objects.create(
+            instructor_profile=instructors[2].instructor_profile, date=monday + timedelta(days=1)
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.post(reverse('availability-range'), {
+                'instructor_ids': [instructor.id for instructor in instructors] + [999],
+                'start_date': monday,
+                'end_date': monday + timedelta(days=13)
+            }, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(queries) == 4
+        assert response.data['not_found'] == [999]
+
+        first = response.data['instructors'][0]
+        assert first['instructor_id'] == instructors[0].id
+        assert len(first['days']) == 14
+        assert first['days'][0]['available_slots'][0]['start_time'] == '12:00'
+        assert first['total_slots'] == 10 * 8 - 3
+        assert response.data['instructors'][1]['total_slots'] == 10 * 8 + 2
+        assert response.data['instructors'][2]['total_slots'] == 9 * 8
+        assert response.data['instructors'][3]['total_slots'] == 10 * 8
+
+    def test_range_is_limited(self, api_client):
+        monday = next_weekday(0)
+        response = api_client.post(reverse('availability-range'), {
+            'instructor_ids': [1],
+            'start_date': monday,
+            'end_date': monday + timedelta(days=60)
+        }, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
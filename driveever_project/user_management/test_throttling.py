@@ -0,0 +1,172 @@
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIRequestFactory
+from unittest import mock
+
+from .test_postcode_service import make_response
+from .throttling import COUNT_BASE, SlidingWindowThrottle
+
+
+class ClientThrottle(SlidingWindowThrottle):
+    rate = '10/min'
+
+    def get_cache_key(self, request, view):
+        return f'throttle_test_{self.get_ident(request)}'
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    """Throttle counters would otherwise carry over into other tests"""
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def allowed_at(now, count=1, ip='10.0.0.1'):
+    """Make `count` requests at time `now`; how many were allowed"""
+    request = APIRequestFactory().get('/', REMOTE_ADDR=ip)
+    allowed = 0
+    for _ in range(count):
+        throttle = ClientThrottle()
+        throttle.timer = lambda: now
+        allowed += throttle.allow_request(request, None)
+    return allowed
+
+
+class TestSlidingWindowThrottle:
+    """
+    Test cases for the sliding-window rate limiter
+    """
+
+    def test_limit_within_a_window(self):
+        assert allowed_at(600, 12) == 10
+        # Other clients have their own limit
+        assert allowed_at(600, ip='10.0.0.2') == 1
+
+    def test_previous_window_slides_out(self):
+        assert allowed_at(600, 10) == 10
+
+        # Half way through the next window, half of the previous window still counts
+        assert allowed_at(690, 10) == 5
+        # A window later, only the second burst counts, weighted by what's left of it
+        assert allowed_at(750, 10) == 7
+
+    def test_rejected_requests_are_not_counted(self):
+        assert allowed_at(600, 50) == 10
+
+        # Hammering in window 10 doesn't hold the client back once it has slid out
+        assert allowed_at(720, 10) == 10
+
+    def test_one_increment_per_request(self):
+        allowed_at(600)
+        with mock.patch.object(cache, 'get', wraps=cache.get) as get, \
+                mock.patch.object(cache, 'incr', wraps=cache.incr) as incr:
+            allowed_at(601, 3)
+
+        assert incr.call_count == 3
+        get.assert_not_called()
+        assert cache.get('throttle_test_10.0.0.1:10') == 4
+
+    def test_counter_carries_previous_window(self):
+        allowed_at(600, 4)
+        allowed_at(660)
+
+        assert cache.get('throttle_test_10.0.0.1:11') == 4 * COUNT_BASE + 1
+
+    def test_wait(self):
+        allowed_at(600, 10)
+        throttle = ClientThrottle()
+        throttle.timer = lambda: 615
+        request = APIRequestFactory().get('/', REMOTE_ADDR='10.0.0.1')
+
+        assert not throttle.allow_request(request, None)
+        # 45 seconds to the next window, then 6 more until 9 of the 10 have slid out
+        assert throttle.wait() == pytest.approx(51)
+
+
+class TestVehicleCheckThrottle:
+    """
+    Test cases for the vehicle check rate limit
+    """
+
+    def test_rate_limited_response(self):
+        from rest_framework.test import APIClient
+        client = APIClient()
+
+        with mock.patch('user_management.vehicle_views.vehicle_service.lookup',
+                        return_value=(200, {'make': 'FORD'})):
+            responses = [
+                client.post(reverse('vehicle-check'), {'registrationNumber': 'AB12CDE'}, format='json')
+                for _ in range(11)
+            ]
+
+        assert [r.status_code for r in responses[:10]] == [status.HTTP_200_OK] * 10
+        assert responses[10].status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert responses[10].data['error'] == 'Rate limit exceeded'
+        assert int(responses[10]['Retry-After']) > 0
+
+    def test_forwarded_for_header_does_not_reset_the_limit(self):
+        from rest_framework.test import APIClient
+        client = APIClient()
+
+        with mock.patch('user_management.vehicle_views.vehicle_service.lookup',
+                        return_value=(200, {'make': 'FORD'})):
+            responses = [
+                client.post(reverse('vehicle-check'), {'registrationNumber': 'AB12CDE'}, format='json',
+                            HTTP_X_FORWARDED_FOR=f'203.0.113.{attempt}')
+                for attempt in range(11)
+            ]
+
+        assert responses[10].status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    def test_only_valid_checks_are_counted(self):
+        from rest_framework.test import APIClient
+        client = APIClient()
+
+        for _ in range(12):
+            assert client.get(reverse('vehicle-check')).status_code == status.HTTP_200_OK
+            invalid = client.post(reverse('vehicle-check'), {'registrationNumber': 'NOPE'}, format='json')
+            assert invalid.status_code == status.HTTP_400_BAD_REQUEST
+
+        with mock.patch('user_management.vehicle_views.vehicle_service.lookup',
+                        return_value=(200, {'make': 'FORD'})):
+            response = client.post(reverse('vehicle-check'), {'registrationNumber': 'AB12CDE'}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+
+
+class TestDistanceMatrixView:
+    """
+    Test cases for the distance matrix size limits and rate limit
+    """
+
+    def matrix(self, client, origins, destinations):
+        return client.post(reverse('postcode-distance-matrix'), {
+            'origins': origins, 'destinations': destinations
+        }, format='json')
+
+    @pytest.mark.parametrize('origins, destinations', [
+        (1001, 1),  # too many on one side
+        (200, 200),  # too many pairs
+    ])
+    def test_size_limits(self, origins, destinations):
+        from rest_framework.test import APIClient
+
+        with mock.patch('user_management.postcode_views.postcode_service.distance_matrix') as distance_matrix:
+            response = self.matrix(APIClient(), ['LN1 1AA'] * origins, ['NG1 1AA'] * destinations)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        distance_matrix.assert_not_called()
+
+    def test_rate_limited(self):
+        from rest_framework.test import APIClient
+        client = APIClient()
+
+        with mock.patch('user_management.postcode_views.postcode_service.distance_matrix',
+                        return_value={'status': 'success'}):
+            responses = [self.matrix(client, ['LN1 1AA'], ['NG1 1AA']) for _ in range(11)]
+
+        assert [r.status_code for r in responses[:10]] == [status.HTTP_200_OK] * 10
+        assert responses[10].status_code == status.HTTP_429_TOO_MANY_REQUESTS
@@ -0,0 +1,121 @@
+import pytest
+import requests
+import time
+from unittest import mock
+from django.urls import reverse
+from rest_framework import status
+
+from .http_client import UpstreamUnavailable
+from .test_postcode_service import make_response
+from .vehicle_service import DVLAVehicleService
+
+
+def get_api_client():
+    from rest_framework.test import APIClient
+    return APIClient()
+
+
+@pytest.fixture
+def service():
+    """Fixture to provide a DVLAVehicleService with a mocked HTTP session"""
+    vehicle_service = DVLAVehicleService(api_key='test')
+    vehicle_service.session = mock.Mock()
+    yield vehicle_service
+    vehicle_service._executor.shutdown(wait=True)
+
+
+def age_entry(service, registration, seconds):
+    """Pretend a cached entry was fetched `seconds` ago"""
+    _, entry = service.cache.get(registration)
+    entry['fetched_at'] = time.time() - seconds
+
+
+class TestVehicleCache:
+    """
+    Test cases for the stale-while-revalidate vehicle lookup cache
+    """
+
+    def test_fresh_hits_skip_dvla(self, service):
+        service.session.post.return_value = make_response(200, {'make': 'FORD'})
+
+        assert service.lookup('AB12CDE') == (200, {'make': 'FORD'})
+        assert service.lookup('AB12CDE') == (200, {'make': 'FORD'})
+
+        assert service.session.post.call_count == 1
+        stats = service.cache_stats()
+        assert stats['fresh_hits'] == 1
+        assert stats['upstream_calls'] == 1
+        assert stats['hit_ratio'] == 0.5
+
+    def test_stale_hits_are_served_while_refreshing(self, service):
+        service.session.post.return_value = make_response(200, {'make': 'FORD'})
+        service.lookup('AB12CDE')
+        age_entry(service, 'AB12CDE', service.fresh_ttl + 1)
+        service.session.post.return_value = make_response(200, {'make': 'VAUXHALL'})
+
+        assert service.lookup('AB12CDE') == (200, {'make': 'FORD'})
+        service._executor.shutdown(wait=True)
+
+        assert service.lookup('AB12CDE') == (200, {'make': 'VAUXHALL'})
+        stats = service.cache_stats()
+        assert stats['stale_hits'] == 1
+        assert stats['background_refreshes'] == 1
+        assert stats['upstream_calls'] == 2
+
+    def test_failed_refresh_keeps_stale_entry(self, service):
+        service.session.post.return_value = make_response(200, {'make': 'FORD'})
+        service.lookup('AB12CDE')
+        age_entry(service, 'AB12CDE', service.fresh_ttl + 1)
+        service.session.post.side_effect = requests.ConnectionError()
+
+        assert service.lookup('AB12CDE') == (200, {'make': 'FORD'})
+        service._executor.shutdown(wait=True)
+
+        assert service.cache.get('AB12CDE')[1]['data'] == {'make': 'FORD'}
+        assert service.cache_stats()['upstream_errors'] == 1
+
+    def test_not_found_is_cached_with_negative_ttl(self, service):
+        service.session.post.return_value = make_response(404)
+
+        assert service.lookup('ZZ99ZZZ') == (404, None)
+        assert service.lookup('ZZ99ZZZ') == (404, None)
+
+        assert service.session.post.call_count == 1
+        assert service.cache_stats()['negative_hits'] == 1
+        assert service.cache.stats()['negative_sets'] == 1
+
+    def test_errors_are_not_cached(self, service):
+        service.session.post.return_value = make_response(503)
+
+        service.lookup('AB12CDE')
+        service.lookup('AB12CDE')
+
+        assert service.session.post.call_count == 2
+
+
+class TestVehicleCheckView:
+    """
+    Test cases for the vehicle check endpoint
+    """
+
+    def test_repeat_checks_use_the_cache(self, service):
+        service.session.post.return_value = make_response(200, {'make': 'FORD'})
+        client = get_api_client()
+
+        with mock.patch('user_management.vehicle_views.vehicle_service', service):
+            first = client.post(reverse('vehicle-check'), {'registrationNumber': 'ab12 cde'}, format='json')
+            second = client.post(reverse('vehicle-check'), {'registrationNumber': 'AB12-CDE'}, format='json')
+
+        assert first.status_code == second.status_code == status.HTTP_200_OK
+        assert second.data['data'] == {'make': 'FORD'}
+        assert service.session.post.call_count == 1
+
+    def test_open_circuit_fails_fast(self, service):
+        service.session.post.side_effect = UpstreamUnavailable('dvla', 'circuit open', retry_after=12.5)
+        client = get_api_client()
+
+        with mock.patch('user_management.vehicle_views.vehicle_service', service):
+            response = client.post(reverse('vehicle-check'), {'registrationNumber': 'AB12CDE'}, format='json')
+
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response['Retry-After'] == '13'
@@ -0,0 +1,129 @@
+"""
+Request throttling for DriveEver
+Sliding-window rate limits counted atomically in the cache, one round trip
+per request
+"""
+
+from typing import Tuple
+
+from django.core.cache import cache as default_cache
+from django.core.cache.backends.redis import RedisCache
+from rest_framework.throttling import SimpleRateThrottle
+
+# Each window's counter also carries the previous window's final count,
+# as previous * COUNT_BASE + current, so one increment returns both
+COUNT_BASE = 2 ** 32
+
+# KEYS: current window, previous window
+# ARGV: COUNT_BASE, key timeout, weight of the previous window, limit
+SLIDING_WINDOW_SCRIPT = """
+local base = tonumber(ARGV[1])
+local value = redis.call('INCR', KEYS[1])
+if value == 1 then
+    local previous = tonumber(redis.call('GET', KEYS[2]) or '0') % base
+    value = redis.call('INCRBY', KEYS[1], previous * base)
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+local current = value % base
+local previous = (value - current) / base
+if previous * tonumber(ARGV[3]) + current > tonumber(ARGV[4]) then
+    redis.call('DECR', KEYS[1])
+    return {current - 1, previous, 0}
+end
+return {current, previous, 1}
+"""
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """
+    Sliding-window rate limit for any view
+
+    The limit applies to every `duration`-long window, estimated as the
+    current fixed window's count plus the previous window's count weighted
+    by how much of it the sliding window still covers. Unlike
+    SimpleRateThrottle, which reads and rewrites a list of timestamps, each
+    request is a single atomic operation:
+    - on Redis, one Lua script
+    - on other backends, one cache.incr(), plus a get and add for a
+      client's first request in each window and a decr when rejecting
+
+    Rejected requests aren't counted, so a client that slows down is let
+    through again as the window slides. Limits are shared between processes
+    on Redis and Memcached; the local-memory cache is atomic but per process.
+
+    Subclasses set `scope` (for THROTTLE_RATES) and get_cache_key().
+    """
+
+    cache = default_cache
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        now = self.timer()
+        window = int(now // self.duration)
+        overlap = 1 - (now % self.duration) / self.duration
+        current, previous, allowed = self.hit(self.key, window, overlap)
+        if allowed:
+            return True
+
+        self._wait = self.wait_for(current, previous, overlap)
+        return False
+
+    def hit(self, key: str, window: int, overlap: float) -> Tuple[int, int, bool]:
+        """
+        Count a request in a fixed window, unless that would break the limit
+
+        Args:
+            key (str): The client's throttle key
+            window (int): Index of the current fixed window
+            overlap (float): Share of the previous window the sliding window still covers
+
+        Returns:
+            Tuple[int, int, bool]: (current window count, previous window count, allowed)
+        """
+        if isinstance(self.cache, RedisCache):
+            return self._hit_redis(key, window, overlap)
+
+        current_key = f'{key}:{window}'
+        try:
+            value = self.cache.incr(current_key)
+        except ValueError:
+            # First request this window: carry over the previous window's count
+            previous = self.cache.get(f'{key}:{window - 1}', 0) % COUNT_BASE
+            value = previous * COUNT_BASE + 1
+            if not self.cache.add(current_key, value, self.duration * 2):
+                value = self.cache.incr(current_key)
+
+        current, previous = value % COUNT_BASE, value // COUNT_BASE
+        if previous * overlap + current > self.num_requests:
+            self.cache.decr(current_key)
+            return current - 1, previous, False
+        return current, previous, True
+
+    def _hit_redis(self, key: str, window: int, overlap: float) -> Tuple[int, int, bool]:
+        client = self.cache._cache.get_client(write=True)
+        current, previous, allowed = client.eval(
+            SLIDING_WINDOW_SCRIPT, 2,
+            self.cache.make_and_validate_key(f'{key}:{window}'),
+            self.cache.make_and_validate_key(f'{key}:{window - 1}'),
+            COUNT_BASE, self.duration * 2, overlap, self.num_requests
+        )
+        return int(current), int(previous), bool(allowed)
+
+    def wait_for(self, current: int, previous: int, overlap: float) -> float:
+        """Seconds until a request from this client would be allowed"""
+        elapsed = 1 - overlap
+        if current + 1 > self.num_requests:
+            # Only the next window helps, once enough of this one has slid out
+            needed = 1 - (self.num_requests - 1) / current if current else 0
+            return (overlap + max(needed, 0)) * self.duration
+        needed = 1 - (self.num_requests - current - 1) / previous
+        return max(needed - elapsed, 0) * self.duration
+
+    def wait(self):
+        return getattr(self, '_wait', None)
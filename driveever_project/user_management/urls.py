@@ -1,20 +1,30 @@
+from django.conf import settings
 from django.urls import path
 from .views import (
     UserRegistrationView, InstructorProfileView, InstructorAvailabilityView,
     LearnerRegistrationView, InstructorRegistrationView, AcademyRegistrationView,
-    UserSearchView, InstructorListView
+    UserSearchView, SearchCacheStatsView, OutboundHTTPStatsView, InstructorListView, AvailabilityExceptionView,
+    AvailabilityExceptionDetailView
 )
 from .postcode_views import (
     PostcodeValidationView, PostcodeLookupView, PostcodeAutocompleteView,
-    NearestPostcodesView, DistanceCalculationView, BulkPostcodeLookupView,
-    PostcodeSearchView
+    NearestPostcodesView, DistanceCalculationView, DistanceMatrixView, BulkPostcodeLookupView,
+    PostcodeSearchView, PostcodeCacheStatsView
 )
 from .booking_views import (
-    CheckAvailabilityView, CreateBookingView, MyBookingsView, BookingDetailView,
-    CancelBookingView, InstructorBookingsView, confirm_booking, complete_booking
+    CheckAvailabilityView, AvailabilityRangeView, CreateBookingView, MyBookingsView,
+    BookingDetailView, CancelBookingView, InstructorBookingsView, SlotHoldView, SlotHoldDetailView,
+    ConfirmHoldView, CreateBookingSeriesView, WaitlistView, WaitlistDetailView, confirm_booking, complete_booking
 )
 from .auth_views import login_view, register_and_login_view
-from .vehicle_views import VehicleCheckView, VehicleCheckHealthView
+from .vehicle_views import VehicleCheckView, VehicleCheckHealthView, VehicleCacheStatsView
+
+# Under ASGI, the endpoints that wait on Postcodes.io or DVLA are served by async views
+if getattr(settings, 'ASYNC_INTEGRATION_VIEWS', False):
+    from .async_views import (
+        AsyncNearestPostcodesView as NearestPostcodesView, AsyncPostcodeLookupView as PostcodeLookupView,
+        AsyncUserSearchView as UserSearchView, AsyncVehicleCheckView as VehicleCheckView
+    )
 
 urlpatterns = [
     path('register/', UserRegistrationView.as_view(), name='user-register'),
@@ -22,9 +32,13 @@ urlpatterns = [
     path('register/instructor/', InstructorRegistrationView.as_view(), name='instructor-register'),
     path('register/academy/', AcademyRegistrationView.as_view(), name='academy-register'),
     path('search/', UserSearchView.as_view(), name='user-search'),
+    path('search/cache-stats/', SearchCacheStatsView.as_view(), name='search-cache-stats'),
+    path('integrations/http-stats/', OutboundHTTPStatsView.as_view(), name='outbound-http-stats'),
     path('instructors/', InstructorListView.as_view(), name='instructors-list'),  # Use new view
     path('profile/', InstructorProfileView.as_view(), name='instructor-profile'),
     path('availability/', InstructorAvailabilityView.as_view(), name='instructor-availability'),
+    path('availability/exceptions/', AvailabilityExceptionView.as_view(), name='availability-exceptions'),
+    path('availability/exceptions/<int:exception_id>/', AvailabilityExceptionDetailView.as_view(), name='availability-exception-detail'),
     
     # Postcode API endpoints
     path('postcode/validate/', PostcodeValidationView.as_view(), name='postcode-validate'),
@@ -32,8 +46,10 @@ urlpatterns = [
     path('postcode/autocomplete/', PostcodeAutocompleteView.as_view(), name='postcode-autocomplete'),
     path('postcode/nearest/', NearestPostcodesView.as_view(), name='postcode-nearest'),
     path('postcode/distance/', DistanceCalculationView.as_view(), name='postcode-distance'),
+    path('postcode/distance-matrix/', DistanceMatrixView.as_view(), name='postcode-distance-matrix'),
     path('postcode/bulk/', BulkPostcodeLookupView.as_view(), name='postcode-bulk'),
     path('postcode/search/', PostcodeSearchView.as_view(), name='postcode-search'),
+    path('postcode/cache-stats/', PostcodeCacheStatsView.as_view(), name='postcode-cache-stats'),
     
     # Authentication endpoints
     path('login/', login_view, name='login'),
@@ -41,7 +57,14 @@ urlpatterns = [
     
     # Booking API endpoints
     path('booking/availability/', CheckAvailabilityView.as_view(), name='check-availability'),
+    path('booking/availability/range/', AvailabilityRangeView.as_view(), name='availability-range'),
     path('booking/create/', CreateBookingView.as_view(), name='create-booking'),
+    path('booking/create-series/', CreateBookingSeriesView.as_view(), name='create-booking-series'),
+    path('booking/hold/', SlotHoldView.as_view(), name='slot-hold'),
+    path('booking/hold/<int:hold_id>/', SlotHoldDetailView.as_view(), name='slot-hold-detail'),
+    path('booking/hold/<int:hold_id>/confirm/', ConfirmHoldView.as_view(), name='confirm-hold'),
+    path('booking/waitlist/', WaitlistView.as_view(), name='waitlist'),
+    path('booking/waitlist/<int:entry_id>/', WaitlistDetailView.as_view(), name='waitlist-detail'),
     path('booking/my-bookings/', MyBookingsView.as_view(), name='my-bookings'),
     path('booking/<int:booking_id>/', BookingDetailView.as_view(), name='booking-detail'),
     path('booking/<int:booking_id>/cancel/', CancelBookingView.as_view(), name='cancel-booking'),
@@ -52,4 +75,5 @@ urlpatterns = [
     # Vehicle Check API endpoints
     path('vehicle/check/', VehicleCheckView.as_view(), name='vehicle-check'),
     path('vehicle/health/', VehicleCheckHealthView.as_view(), name='vehicle-health'),
+    path('vehicle/cache-stats/', VehicleCacheStatsView.as_view(), name='vehicle-cache-stats'),
 ]
@@ -0,0 +1,257 @@
+"""
+DVLA Vehicle Enquiry Service for DriveEver
+Looks up vehicles by registration, caching results so repeat checks don't
+spend DVLA rate limit
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+import requests
+from django.conf import settings
+
+from .http_client import async_http_client, http_client
+from .response_cache import TieredCache
+from .single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+class DVLAVehicleService:
+    """
+    Service class for the DVLA Vehicle Enquiry API
+    https://developer-portal.driver-vehicle-licensing.api.gov.uk/
+
+    Lookups are cached on the cleaned registration with stale-while-revalidate:
+    - fresh entries (younger than FRESH_TTL) are served straight from the cache
+    - stale entries (up to FRESH_TTL + STALE_TTL old) are served immediately
+      while a background thread refreshes them from DVLA
+    - "vehicle not found" (404) responses are cached for NEGATIVE_TTL and never
+      served stale
+    Other DVLA responses and network errors are not cached. Concurrent misses
+    for the same registration share one DVLA call.
+    """
+
+    API_URL = 'https://driver-vehicle-licensing.api.gov.uk/vehicle-enquiry/v1/vehicles'
+    TIMEOUT = 30  # read timeout; connecting uses OUTBOUND_HTTP['CONNECT_TIMEOUT']
+
+    # Vehicle details (tax and MOT status) change rarely, but not never
+    CACHE_DEFAULTS = {
+        'MAX_ENTRIES': 10000,
+        'FRESH_TTL': 60 * 60 * 6,
+        'STALE_TTL': 60 * 60 * 24 * 7,
+        'NEGATIVE_TTL': 60 * 60,
+        'CACHE_ALIAS': None,
+        'REFRESH_WORKERS': 2,
+    }
+
+    def __init__(self, api_key: Optional[str] = None):
+        self.api_key = api_key or getattr(settings, 'DVLA_API_KEY', '')
+        headers = {
+            'Content-Type': 'application/json',
+            'x-api-key': self.api_key
+        }
+        self.session = http_client.bind(headers=headers, timeout=self.TIMEOUT)
+        self.async_session = async_http_client.bind(headers=headers, timeout=self.TIMEOUT)
+
+        cache_config = {**self.CACHE_DEFAULTS, **getattr(settings, 'VEHICLE_CACHE', {})}
+        self.fresh_ttl = cache_config['FRESH_TTL']
+        self.cache = TieredCache(
+            'vehicles',
+            max_entries=cache_config['MAX_ENTRIES'],
+            ttl=cache_config['FRESH_TTL'] + cache_config['STALE_TTL'],
+            negative_ttl=cache_config['NEGATIVE_TTL'],
+            cache_alias=cache_config['CACHE_ALIAS']
+        )
+        # The cross-process lock must outlast the slowest DVLA call, retries included
+        self.flights = SingleFlight(
+            'vehicles',
+            cache_alias=cache_config['CACHE_ALIAS'],
+            lock_ttl=http_client.max_call_seconds(self.TIMEOUT)
+        )
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=cache_config['REFRESH_WORKERS'],
+            thread_name_prefix='dvla-refresh'
+        )
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._counters = {
+            'fresh_hits': 0,
+            'stale_hits': 0,
+            'negative_hits': 0,
+            'misses': 0,
+            'upstream_calls': 0,
+            'upstream_errors': 0,
+            'background_refreshes': 0,
+        }
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+
+    def _fetch(self, registration: str) -> Tuple[int, Optional[Dict]]:
+        """
+        Ask DVLA about a registration, caching 200 and 404 responses
+
+        Raises:
+            requests.RequestException: On timeouts and connection errors
+        """
+        self._count('upstream_calls')
+        try:
+            # An enquiry, so safe to retry even though it's a POST
+            response = self.session.post(self.API_URL, json={'registrationNumber': registration}, idempotent=True)
+        except requests.RequestException:
+            self._count('upstream_errors')
+            raise
+        return self._store(registration, response)
+
+    async def _afetch(self, registration: str) -> Tuple[int, Optional[Dict]]:
+        """Async version of _fetch"""
+        self._count('upstream_calls')
+        try:
+            response = await self.async_session.post(
+                self.API_URL, json={'registrationNumber': registration}, idempotent=True
+            )
+        except requests.RequestException:
+            self._count('upstream_errors')
+            raise
+        entry = self._entry(registration, response)
+        if entry is not None:
+            await self.cache.aset(registration, entry, negative=entry['status_code'] == 404)
+        return response.status_code, entry['data'] if entry else None
+
+    def _store(self, registration: str, response) -> Tuple[int, Optional[Dict]]:
+        """Cache 200 and 404 responses from DVLA"""
+        entry = self._entry(registration, response)
+        if entry is not None:
+            self.cache.set(registration, entry, negative=entry['status_code'] == 404)
+        return response.status_code, entry['data'] if entry else None
+
+    def _entry(self, registration: str, response) -> Optional[Dict]:
+        """The cache entry for a DVLA response, or None for responses that aren't cached"""
+        if response.status_code == 200:
+            return {'status_code': 200, 'data': response.json(), 'fetched_at': time.time()}
+        if response.status_code == 404:
+            return {'status_code': 404, 'data': None, 'fetched_at': time.time()}
+
+        self._count('upstream_errors')
+        logger.warning(f"DVLA API returned {response.status_code} for {registration}")
+        return None
+
+    def _refresh(self, registration: str) -> None:
+        try:
+            self._fetch(registration)
+        except requests.RequestException as e:
+            logger.warning(f"Background DVLA refresh failed for {registration}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(registration)
+
+    def _refresh_in_background(self, registration: str) -> None:
+        """Refresh a stale entry, unless a refresh for it is already running"""
+        with self._lock:
+            if registration in self._refreshing:
+                return
+            self._refreshing.add(registration)
+            self._counters['background_refreshes'] += 1
+        self._executor.submit(self._refresh, registration)
+
+    def lookup(self, registration: str) -> Tuple[int, Optional[Dict]]:
+        """
+        Look up a vehicle by its cleaned registration (e.g. 'AB12CDE')
+
+        Returns:
+            Tuple[int, Optional[Dict]]: (DVLA status code, vehicle data for 200 responses)
+
+        Raises:
+            requests.RequestException: On timeouts and connection errors when nothing is cached
+        """
+        cached = self._cached(registration)
+        if cached is not None:
+            return cached
+        return self.flights.do(registration, lambda: self._fetch(registration), recheck=lambda: self._stored(registration))
+
+    async def alookup(self, registration: str) -> Tuple[int, Optional[Dict]]:
+        """Async version of lookup; stale entries are still refreshed on a background thread"""
+        cached = await self._acached(registration)
+        if cached is not None:
+            return cached
+        return await self.flights.ado(
+            registration, lambda: self._afetch(registration), recheck=lambda: self._astored(registration)
+        )
+
+    def _stored(self, registration: str) -> Tuple[bool, Optional[Tuple[int, Optional[Dict]]]]:
+        """
+        (found, (status code, data)) for a registration another process may have just fetched
+
+        Finding it turns the miss _cached() counted for this lookup into a hit.
+        """
+        return self._restored(registration, *self.cache.get(registration))
+
+    async def _astored(self, registration: str) -> Tuple[bool, Optional[Tuple[int, Optional[Dict]]]]:
+        """Async version of _stored"""
+        return self._restored(registration, *await self.cache.aget(registration))
+
+    def _restored(
+        self, registration: str, found: bool, entry: Optional[Dict]
+    ) -> Tuple[bool, Optional[Tuple[int, Optional[Dict]]]]:
+        if not found:
+            return False, None
+        with self._lock:
+            self._counters['misses'] -= 1
+        return True, self._hit(registration, entry)
+
+    def _cached(self, registration: str) -> Optional[Tuple[int, Optional[Dict]]]:
+        """The cached answer for a registration, or None (counted as a miss)"""
+        return self._answer(registration, *self.cache.get(registration))
+
+    async def _acached(self, registration: str) -> Optional[Tuple[int, Optional[Dict]]]:
+        """Async version of _cached"""
+        return self._answer(registration, *await self.cache.aget(registration))
+
+    def _answer(self, registration: str, found: bool, entry: Optional[Dict]) -> Optional[Tuple[int, Optional[Dict]]]:
+        if not found:
+            self._count('misses')
+            return None
+        return self._hit(registration, entry)
+
+    def _hit(self, registration: str, entry: Dict) -> Tuple[int, Optional[Dict]]:
+        """Count a cache hit, refreshing stale entries in the background"""
+        if entry['status_code'] == 404:
+            self._count('negative_hits')
+        elif time.time() - entry['fetched_at'] < self.fresh_ttl:
+            self._count('fresh_hits')
+        else:
+            self._count('stale_hits')
+            self._refresh_in_background(registration)
+        return entry['status_code'], entry['data']
+
+    def cache_stats(self) -> Dict:
+        """Hit ratio and upstream call counts for the vehicle cache"""
+        with self._lock:
+            counters = dict(self._counters)
+
+        hits = counters['fresh_hits'] + counters['stale_hits'] + counters['negative_hits']
+        lookups = hits + counters['misses']
+        return {
+            **counters,
+            'hits': hits,
+            'lookups': lookups,
+            'hit_ratio': round(hits / lookups, 4) if lookups else None,
+            'entries': len(self.cache.local),
+            'fresh_ttl': self.fresh_ttl,
+            'ttl': self.cache.ttl,
+            'negative_ttl': self.cache.negative_ttl,
+            'shared_cache': self.cache.cache_alias,
+            'single_flight': self.flights.stats(),
+        }
+
+    def clear(self) -> None:
+        self.cache.clear()
+
+
+vehicle_service = DVLAVehicleService()
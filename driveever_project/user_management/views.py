@@ -2,14 +2,27 @@ from django.shortcuts import render
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated
-from django.db.models import Q
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from django.conf import settings
+from django.db import transaction
+from datetime import datetime
+from decimal import Decimal
+from django.db.models import Count, Exists, Max, Min, OuterRef, Prefetch, Q
+from django.db.models.functions import Substr
 from .serializers import (
-    UserSerializer, InstructorProfileSerializer, InstructorAvailabilitySerializer,
+    UserSerializer, InstructorProfileSerializer, InstructorAvailabilitySerializer, AvailabilityExceptionSerializer,
     LearnerRegistrationSerializer, InstructorRegistrationSerializer, AcademyRegistrationSerializer
 )
-from .models import InstructorProfile, InstructorAvailability, User, AcademyProfile
+from .models import (
+    InstructorProfile, InstructorCoverage, InstructorAvailability, AvailabilityException, User, AcademyProfile
+)
+from .availability_bitmap import DAY_NAMES, DAY_PERIODS, free_hours_pattern
+from .http_client import http_client
+from .instructor_search import InvalidCursor, cursor_key, decode_cursor, encode_cursor, instructor_distances
 from .postcode_service import postcode_service
+from .postcode_utils import outcode_of
+from .search_cache import search_cache
+from .signals import deferred_availability_sync
 
 # Create your views here.
 
@@ -109,14 +122,36 @@ class AcademyRegistrationView(APIView):
 class UserSearchView(APIView):
     """
     Search for instructors and academies by postcode and other criteria
+    
+    Results are paged with an opaque `cursor` (from `pagination.next_cursor`
+    of the previous page) and `page_size`; the summary covers every match.
+    Outcode searches are served from the search result cache until an
+    instructor, availability slot or academy in that outcode changes.
     """
     def get(self, request):
+        search = self.parse_search(request)
+        if isinstance(search, Response):
+            return search
+        
+        # Validate the postcode and get its details with a single Postcodes.io lookup
+        postcode_info = postcode_service.resolve_postcode(search['criteria']['postcode'])
+        return self.search(search, postcode_info)
+    
+    def parse_search(self, request):
+        """
+        Validate the search parameters and check the search result cache
+        
+        Returns:
+            An error or cached Response, or the parsed search for search()
+        """
         # Get search parameters
         postcode = request.query_params.get('postcode', '').strip().upper()
         user_type = request.query_params.get('user_type', '').strip().lower()
         price_min = request.query_params.get('price_min', '')
         price_max = request.query_params.get('price_max', '')
         verified_only = request.query_params.get('verified_only', 'false').lower() == 'true'
+        free_day = request.query_params.get('free_day', '').strip().lower()
+        free_time = request.query_params.get('free_time', '').strip().lower()
         
         if not postcode:
             return Response(
@@ -124,32 +159,116 @@ class UserSearchView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Validate postcode using Postcodes.io API
-        postcode_validation = postcode_service.validate_postcode(postcode)
-        if not postcode_validation['valid']:
+        page_size = getattr(settings, 'SEARCH_PAGE_SIZE', 20)
+        if request.query_params.get('page_size'):
+            try:
+                page_size = int(request.query_params['page_size'])
+            except ValueError:
+                page_size = 0
+            
+            if page_size <= 0:
+                return Response(
+                    {'error': 'page_size must be a positive integer'}, 
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            page_size = min(page_size, getattr(settings, 'SEARCH_MAX_PAGE_SIZE', 100))
+        
+        try:
+            cursor = decode_cursor(request.query_params.get('cursor'))
+        except InvalidCursor as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        radius_km = None
+        if request.query_params.get('radius_km'):
+            try:
+                radius_km = float(request.query_params['radius_km'])
+            except ValueError:
+                radius_km = 0
+            
+            if radius_km <= 0:
+                return Response(
+                    {'error': 'radius_km must be a positive number'}, 
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            radius_km = min(radius_km, getattr(settings, 'SEARCH_MAX_RADIUS_KM', 100))
+        
+        # Weekly availability filter, e.g. free_day=saturday&free_time=morning
+        if free_day and free_day not in DAY_NAMES:
             return Response(
-                {'error': f'Invalid postcode: {postcode}. Please enter a valid UK postcode.'}, 
+                {'error': f"free_day must be one of: {', '.join(DAY_NAMES)}"}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Get enhanced postcode information
-        postcode_info = postcode_service.get_postcode_info(postcode)
+        if free_time and (not free_day or free_time not in DAY_PERIODS):
+            return Response(
+                {'error': f"free_time needs free_day and must be one of: {', '.join(DAY_PERIODS)}"}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        search_criteria = {
+            'postcode': postcode,
+            'user_type': user_type,
+            'price_min': price_min,
+            'price_max': price_max,
+            'verified_only': verified_only,
+            'radius_km': radius_km,
+            'free_day': free_day,
+            'free_time': free_time
+        }
+        
+        # Outcode searches depend only on the outcode's instructors and academies, so they
+        # can be cached; radius searches also depend on the surrounding outcodes
+        cache_key = None
+        if radius_km is None and outcode_of(postcode):
+            cache_key = search_cache.key(
+                outcode_of(postcode), user_type, price_min, price_max, verified_only,
+                postcode=postcode.replace(' ', '_'),
+                free=f'{free_day}-{free_time}',
+                page_size=page_size,
+                cursor=request.query_params.get('cursor', '')
+            )
+            found, cached = search_cache.get(cache_key)
+            if found:
+                return Response({**cached, 'search_criteria': search_criteria}, status=status.HTTP_200_OK)
+        
+        return {
+            'criteria': search_criteria,
+            'page_size': page_size,
+            'cursor': cursor,
+            'cache_key': cache_key
+        }
+    
+    def search(self, search, postcode_info):
+        """Search for instructors and academies around a resolved postcode"""
+        search_criteria = search['criteria']
+        postcode = search_criteria['postcode']
+        user_type = search_criteria['user_type']
+        price_min = search_criteria['price_min']
+        price_max = search_criteria['price_max']
+        verified_only = search_criteria['verified_only']
+        radius_km = search_criteria['radius_km']
+        free_day = search_criteria['free_day']
+        free_time = search_criteria['free_time']
+        page_size = search['page_size']
+        cursor = search['cursor']
+        cache_key = search['cache_key']
+        
         if postcode_info['status'] != 'success':
             return Response(
                 {'error': 'Unable to get postcode information'}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
         
+        if not postcode_info['valid']:
+            return Response(
+                {'error': f'Invalid postcode: {postcode}. Please enter a valid UK postcode.'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
         results = {
             'instructors': [],
             'academies': [],
-            'search_criteria': {
-                'postcode': postcode,
-                'user_type': user_type,
-                'price_min': price_min,
-                'price_max': price_max,
-                'verified_only': verified_only
-            },
+            'search_criteria': search_criteria,
             'postcode_info': postcode_info['data'],
             'search_metadata': {
                 'postcode_validated': True,
@@ -162,16 +281,19 @@ class UserSearchView(APIView):
             }
         }
         
+        summary = {
+            'total_instructors': 0,
+            'total_academies': 0,
+            'verified_instructors': 0,
+            'price_range': {'min': None, 'max': None}
+        }
+        next_position = {}
+        
         try:
             # Search for instructors
             if not user_type or user_type == 'instructor':
                 instructor_query = Q(is_active=True)
                 
-                # Postcode search (check if postcode outcode is in the instructor's covered areas)
-                # Extract the outcode (first part) of the postcode (e.g., "LN5" from "LN5 8NY")
-                postcode_outcode = postcode.split()[0] if ' ' in postcode else postcode[:4]
-                instructor_query &= Q(postcodes__icontains=postcode_outcode)
-                
                 # Price filtering
                 if price_min:
                     try:
@@ -191,88 +313,75 @@ class UserSearchView(APIView):
                 if verified_only:
                     instructor_query &= Q(is_verified=True)
                 
-                instructors = InstructorProfile.objects.filter(instructor_query).select_related('user')
+                # Load every instructor's open availability in one extra query
+                available_slots = Prefetch(
+                    'availability_slots',
+                    queryset=InstructorAvailability.objects.filter(is_available=True).order_by('day_of_week', 'start_time'),
+                    to_attr='available_slots'
+                )
                 
-                # If no exact matches found, search for instructors in the same region
-                if not instructors.exists():
-                    # Get the region from postcode info
-                    region = postcode_info['data'].get('region', '')
-                    admin_district = postcode_info['data'].get('admin_district', '')
-                    
-                    # Search for instructors in the same region or admin district
-                    nearby_query = Q(is_active=True)
-                    if region:
-                        # Look for instructors whose postcodes might be in the same region
-                        # This is a simplified approach - in production you'd want more sophisticated geolocation
-                        nearby_query &= (
-                            Q(postcodes__icontains=region) |
-                            Q(postcodes__icontains=admin_district)
+                # Outcode of the searched postcode, e.g. "LN5" for "LN5 8NY"
+                postcode_outcode = postcode_info['data'].get('outcode') or outcode_of(postcode)
+                latitude = postcode_info['data'].get('latitude')
+                longitude = postcode_info['data'].get('longitude')
+                instructors = InstructorProfile.objects.filter(instructor_query).select_related('user').prefetch_related(
+                    available_slots
+                )
+                
+                # Availability filtering on the weekly bitmap (one hex digit per hour)
+                if free_day:
+                    start_hour, end_hour = DAY_PERIODS.get(free_time, (0, 24))
+                    position, pattern = free_hours_pattern(DAY_NAMES.index(free_day), start_hour, end_hour)
+                    instructors = instructors.annotate(
+                        free_hours=Substr('availability_bitmap', position, len(pattern))
+                    )
+                    if free_time:
+                        instructors = instructors.filter(free_hours=pattern)
+                    else:
+                        instructors = instructors.exclude(free_hours='0' * len(pattern))
+                after = cursor.get('instructors')
+                
+                if radius_km is not None and latitude is not None:
+                    # Radius search: every instructor whose service area reaches the postcode, nearest first
+                    covers_outcode = InstructorCoverage.objects.filter(
+                        instructor_profile=OuterRef('pk'),
+                        outcode=postcode_outcode
+                    )
+                    page, instructor_summary, next_key = self._instructors_by_distance(
+                        instructors.annotate(covers_outcode=Exists(covers_outcode)),
+                        latitude, longitude, radius_km, after, page_size
+                    )
+                    for instructor, distance in page:
+                        results['instructors'].append(
+                            self._instructor_result(instructor, is_nearby=not instructor.covers_outcode, distance_km=distance)
                         )
-                    
-                    nearby_instructors = InstructorProfile.objects.filter(nearby_query).select_related('user')
-                    
-                    # Add a flag to indicate these are nearby, not exact matches
-                    for instructor in nearby_instructors:
-                        availability = InstructorAvailability.objects.filter(
-                            instructor_profile=instructor,
-                            is_available=True
-                        ).order_by('day_of_week', 'start_time')
-                        
-                        availability_summary = []
-                        for slot in availability:
-                            availability_summary.append({
-                                'day': slot.get_day_of_week_display(),
-                                'time': f"{slot.start_time} - {slot.end_time}"
-                            })
-                        
-                        results['instructors'].append({
-                            'id': instructor.id,
-                            'user_id': instructor.user.id,
-                            'full_name': instructor.user.full_name or instructor.user.username,
-                            'email': instructor.user.email,
-                            'mobile_number': instructor.mobile_number,
-                            'adi_number': instructor.adi_number,
-                            'car_model': instructor.car_model,
-                            'price_per_hour': str(instructor.price_per_hour),
-                            'postcodes': instructor.postcodes,
-                            'is_verified': instructor.is_verified,
-                            'availability': availability_summary,
-                            'availability_count': len(availability_summary),
-                            'is_nearby': True,
-                            'distance_note': f"Located in {region} region"
-                        })
                 else:
-                    # Process exact matches
-                    for instructor in instructors:
-                        # Get availability for this instructor
-                        availability = InstructorAvailability.objects.filter(
-                            instructor_profile=instructor,
-                            is_available=True
-                        ).order_by('day_of_week', 'start_time')
+                    # Postcode search (indexed match on the instructor's covered outcodes),
+                    # verified instructors first, then by price
+                    page, instructor_summary, next_key = self._instructors_by_relevance(
+                        instructors.filter(coverage_areas__outcode=postcode_outcode), after, page_size
+                    )
+                    for instructor in page:
+                        results['instructors'].append(self._instructor_result(instructor, is_nearby=False))
+                    
+                    # If no exact matches found, fall back to instructors whose service area reaches the postcode
+                    if not instructor_summary['total_instructors'] and latitude is not None:
+                        page, instructor_summary, next_key = self._instructors_by_distance(
+                            instructors, latitude, longitude,
+                            getattr(settings, 'SEARCH_NEARBY_RADIUS_KM', 25), after, page_size
+                        )
                         
-                        # Format availability for display
-                        availability_summary = []
-                        for slot in availability:
-                            availability_summary.append({
-                                'day': slot.get_day_of_week_display(),
-                                'time': f"{slot.start_time} - {slot.end_time}"
-                            })
+                        # Nearby matches come from surrounding outcodes, which don't invalidate this one
+                        cache_key = None
                         
-                        results['instructors'].append({
-                            'id': instructor.id,
-                            'user_id': instructor.user.id,
-                            'full_name': instructor.user.full_name or instructor.user.username,
-                            'email': instructor.user.email,
-                            'mobile_number': instructor.mobile_number,
-                            'adi_number': instructor.adi_number,
-                            'car_model': instructor.car_model,
-                            'price_per_hour': str(instructor.price_per_hour),
-                            'postcodes': instructor.postcodes,
-                            'is_verified': instructor.is_verified,
-                            'availability': availability_summary,
-                            'availability_count': len(availability_summary),
-                            'is_nearby': False
-                        })
+                        # Add a flag to indicate these are nearby, not exact matches
+                        for instructor, distance in page:
+                            results['instructors'].append(
+                                self._instructor_result(instructor, is_nearby=True, distance_km=distance)
+                            )
+                
+                summary.update(instructor_summary)
+                next_position['instructors'] = next_key
             
             # Search for academies
             if not user_type or user_type == 'academy':
@@ -284,9 +393,17 @@ class UserSearchView(APIView):
                     Q(address__icontains=postcode)
                 )
                 
-                academies = AcademyProfile.objects.filter(academy_query).select_related('user')
+                academies = AcademyProfile.objects.filter(academy_query).select_related('user').order_by('pk')
+                summary['total_academies'] = academies.count()
+                
+                after = cursor_key(cursor.get('academies'), int)
+                if after:
+                    academies = academies.filter(pk__gt=after[0])
+                academies = list(academies[:page_size + 1])
                 
-                for academy in academies:
+                next_position['academies'] = [academies[page_size - 1].pk] if len(academies) > page_size else None
+                
+                for academy in academies[:page_size]:
                     results['academies'].append({
                         'id': academy.id,
                         'user_id': academy.user.id,
@@ -299,28 +416,159 @@ class UserSearchView(APIView):
                         'description': academy.description
                     })
             
-            # Sort results by relevance (verified instructors first, then by price)
-            if results['instructors']:
-                results['instructors'].sort(key=lambda x: (not x['is_verified'], float(x['price_per_hour'])))
+            # Add summary statistics (for every match, not just this page)
+            results['summary'] = summary
             
-            # Add summary statistics
-            results['summary'] = {
-                'total_instructors': len(results['instructors']),
-                'total_academies': len(results['academies']),
-                'verified_instructors': len([i for i in results['instructors'] if i['is_verified']]),
-                'price_range': {
-                    'min': min([float(i['price_per_hour']) for i in results['instructors']]) if results['instructors'] else None,
-                    'max': max([float(i['price_per_hour']) for i in results['instructors']]) if results['instructors'] else None
-                }
+            has_more = any(key is not None for key in next_position.values())
+            results['pagination'] = {
+                'page_size': page_size,
+                'has_more': has_more,
+                'next_cursor': encode_cursor(next_position) if has_more else None
             }
             
+            if cache_key:
+                search_cache.set(cache_key, results)
+            
             return Response(results, status=status.HTTP_200_OK)
             
+        except InvalidCursor as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
         except Exception as e:
             return Response(
                 {'error': f'Search failed: {str(e)}'}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+    
+    def _instructors_by_relevance(self, instructors, after, page_size):
+        """
+        One page of instructors ordered by (verified first, price, id) in SQL
+        
+        Returns:
+            tuple: (instructors, summary, next sort key or None)
+        """
+        stats = instructors.aggregate(
+            total=Count('pk'),
+            verified=Count('pk', filter=Q(is_verified=True)),
+            min_price=Min('price_per_hour'),
+            max_price=Max('price_per_hour')
+        )
+        summary = {
+            'total_instructors': stats['total'],
+            'verified_instructors': stats['verified'],
+            'price_range': {
+                'min': float(stats['min_price']) if stats['min_price'] is not None else None,
+                'max': float(stats['max_price']) if stats['max_price'] is not None else None
+            }
+        }
+        if not stats['total']:
+            return [], summary, None
+        
+        after = cursor_key(after, bool, Decimal, int)
+        if after:
+            is_verified, price, pk = after
+            instructors = instructors.filter(
+                Q(is_verified__lt=is_verified) |
+                Q(is_verified=is_verified, price_per_hour__gt=price) |
+                Q(is_verified=is_verified, price_per_hour=price, pk__gt=pk)
+            )
+        
+        page = list(instructors.order_by('-is_verified', 'price_per_hour', 'pk')[:page_size + 1])
+        next_key = None
+        if len(page) > page_size:
+            last = page[page_size - 1]
+            next_key = [last.is_verified, str(last.price_per_hour), last.pk]
+        
+        return page[:page_size], summary, next_key
+    
+    def _instructors_by_distance(self, instructors, latitude, longitude, radius_km, after, page_size):
+        """
+        One page of instructors within radius_km, ordered by (distance, id)
+        
+        Only ids, service areas and the summary fields are loaded for every
+        candidate; full rows are fetched for the page alone.
+        
+        Returns:
+            tuple: ([(instructor, distance_km)], summary, next sort key or None)
+        """
+        matches = instructor_distances(instructors, latitude, longitude, radius_km, 'is_verified', 'price_per_hour')
+        prices = [float(row['price_per_hour']) for _, row in matches]
+        summary = {
+            'total_instructors': len(matches),
+            'verified_instructors': sum(1 for _, row in matches if row['is_verified']),
+            'price_range': {
+                'min': min(prices) if prices else None,
+                'max': max(prices) if prices else None
+            }
+        }
+        
+        after = cursor_key(after, float, int)
+        if after:
+            matches = [match for match in matches if (match[0], match[1]['pk']) > after]
+        
+        page = matches[:page_size]
+        next_key = [page[-1][0], page[-1][1]['pk']] if len(matches) > page_size else None
+        
+        profiles = instructors.in_bulk([row['pk'] for _, row in page]) if page else {}
+        return [(profiles[row['pk']], distance) for distance, row in page], summary, next_key
+    
+    def _instructor_result(self, instructor, is_nearby, distance_km=None):
+        """
+        Format an instructor search result, with availability and optional distance
+        
+        Expects the instructor's open slots prefetched into `available_slots`.
+        """
+        # Format availability for display
+        availability_summary = []
+        for slot in instructor.available_slots:
+            availability_summary.append({
+                'day': slot.get_day_of_week_display(),
+                'time': f"{slot.start_time} - {slot.end_time}"
+            })
+        
+        result = {
+            'id': instructor.id,
+            'user_id': instructor.user.id,
+            'full_name': instructor.user.full_name or instructor.user.username,
+            'email': instructor.user.email,
+            'mobile_number': instructor.mobile_number,
+            'adi_number': instructor.adi_number,
+            'car_model': instructor.car_model,
+            'price_per_hour': str(instructor.price_per_hour),
+            'postcodes': instructor.postcodes,
+            'is_verified': instructor.is_verified,
+            'availability': availability_summary,
+            'availability_count': len(availability_summary),
+            'is_nearby': is_nearby
+        }
+        
+        if distance_km is not None:
+            result['distance_km'] = round(distance_km, 2)
+            result['distance_note'] = f"{distance_km:.1f} km away"
+        
+        return result
+
+
+class SearchCacheStatsView(APIView):
+    """
+    Hit/miss and invalidation counters for the search result cache
+    """
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request):
+        """Get search cache statistics"""
+        return Response(search_cache.stats(), status=status.HTTP_200_OK)
+
+
+class OutboundHTTPStatsView(APIView):
+    """
+    Per-host request, retry, error and latency metrics for outbound integrations
+    """
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request):
+        """Get outbound HTTP statistics"""
+        return Response(http_client.stats(), status=status.HTTP_200_OK)
 
 
 class InstructorProfileView(APIView):
@@ -367,6 +615,12 @@ class InstructorAvailabilityView(APIView):
     def post(self, request):
         """
         Replace all availability slots for the currently logged-in instructor
+        
+        Every slot is validated before anything is written. The existing slots
+        are then diffed against the new ones and only the differences are
+        inserted, updated or deleted, in one transaction, so a bad slot never
+        leaves the instructor with partial availability. The bitmap and the
+        search cache are refreshed once, for this instructor only.
         """
         try:
             # Get the instructor profile for the currently logged-in user
@@ -381,29 +635,36 @@ class InstructorAvailabilityView(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            # Delete existing availability slots for this instructor
-            InstructorAvailability.objects.filter(instructor_profile=instructor_profile).delete()
+            # Validate every slot before touching the existing ones
+            serializer = InstructorAvailabilitySerializer(data=availability_data, many=True)
+            if not serializer.is_valid():
+                return Response(
+                    {'error': f'Invalid slot data: {serializer.errors}'}, 
+                    status=status.HTTP_400_BAD_REQUEST
+                )
             
-            # Create new availability slots
-            created_slots = []
-            for slot_data in availability_data:
-                slot_data['instructor_profile'] = instructor_profile.id
-                serializer = InstructorAvailabilitySerializer(data=slot_data)
-                
-                if serializer.is_valid():
-                    slot = serializer.save()
-                    created_slots.append(serializer.data)
-                else:
-                    # If any slot is invalid, rollback by deleting created slots
-                    InstructorAvailability.objects.filter(instructor_profile=instructor_profile).delete()
-                    return Response(
-                        {'error': f'Invalid slot data: {serializer.errors}'}, 
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
+            starts = [(slot['day_of_week'], slot['start_time']) for slot in serializer.validated_data]
+            if len(set(starts)) != len(starts):
+                return Response(
+                    {'error': 'Invalid slot data: two slots start at the same time on the same day'}, 
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            with transaction.atomic(), deferred_availability_sync() as changed:
+                created, updated, deleted = instructor_profile.replace_availability(serializer.validated_data)
+                if created or updated or deleted:
+                    changed.add(instructor_profile.pk)
+            
+            availability_slots = InstructorAvailability.objects.filter(
+                instructor_profile=instructor_profile
+            ).select_related('instructor_profile__user').order_by('day_of_week', 'start_time')
             
             return Response({
-                'message': f'Successfully updated availability. Created {len(created_slots)} slots.',
-                'availability_slots': created_slots
+                'message': (
+                    f'Successfully updated availability. Created {created} slots, '
+                    f'updated {updated}, removed {deleted}.'
+                ),
+                'availability_slots': InstructorAvailabilitySerializer(availability_slots, many=True).data
             }, status=status.HTTP_200_OK)
             
         except InstructorProfile.DoesNotExist:
@@ -418,6 +679,82 @@ class InstructorAvailabilityView(APIView):
             )
 
 
+class AvailabilityExceptionView(APIView):
+    """
+    List and add date-specific availability exceptions (holidays, one-off extra
+    slots) for the currently logged-in instructor, without touching the weekly template
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        """
+        List exceptions, optionally between ?start_date= and ?end_date= (YYYY-MM-DD)
+        """
+        try:
+            instructor_profile = InstructorProfile.objects.get(user=request.user)
+        except InstructorProfile.DoesNotExist:
+            return Response(
+                {'error': 'Instructor profile not found for this user'}, 
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        exceptions = AvailabilityException.objects.filter(instructor_profile=instructor_profile)
+        try:
+            if request.query_params.get('start_date'):
+                exceptions = exceptions.filter(
+                    date__gte=datetime.strptime(request.query_params['start_date'], '%Y-%m-%d').date()
+                )
+            if request.query_params.get('end_date'):
+                exceptions = exceptions.filter(
+                    date__lte=datetime.strptime(request.query_params['end_date'], '%Y-%m-%d').date()
+                )
+        except ValueError:
+            return Response(
+                {'error': 'Dates must be in YYYY-MM-DD format'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        serializer = AvailabilityExceptionSerializer(exceptions.order_by('date', 'start_time'), many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+    
+    def post(self, request):
+        """
+        Add an exception
+        """
+        try:
+            instructor_profile = InstructorProfile.objects.get(user=request.user)
+        except InstructorProfile.DoesNotExist:
+            return Response(
+                {'error': 'Instructor profile not found for this user'}, 
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        serializer = AvailabilityExceptionSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        serializer.save(instructor_profile=instructor_profile)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class AvailabilityExceptionDetailView(APIView):
+    """
+    Remove one of the logged-in instructor's availability exceptions
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def delete(self, request, exception_id):
+        deleted, _ = AvailabilityException.objects.filter(
+            id=exception_id, instructor_profile__user=request.user
+        ).delete()
+        if not deleted:
+            return Response(
+                {'error': 'Availability exception not found'}, 
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
 class InstructorListView(APIView):
     """
     Simple view to list all instructors for testing purposes
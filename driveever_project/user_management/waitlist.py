@@ -0,0 +1,152 @@
+"""
+Waitlist for DriveEver bookings
+Offers slots freed by cancellations to waiting learners as slot holds, so
+learners don't have to keep polling availability to catch a cancellation
+"""
+
+from datetime import date, time
+from typing import Optional
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from .availability_bitmap import decode_bitmap, interval_mask, is_free
+from .booking_service import BookingConflict, active_holds, blocked_bitmap, day_availability, hold_slot
+from .models import Booking, InstructorProfile, WaitlistEntry
+from .slot_engine import to_minutes
+
+# Learners on the waitlist get longer than usual to confirm an offered slot
+OFFER_MINUTES = getattr(settings, 'WAITLIST_OFFER_MINUTES', 30)
+
+
+def matching_entries(instructor_id: int, lesson_date: date, start_time: time, end_time: time):
+    """
+    Waiting learners whose date window and preferred times fit a slot, first come first served
+    """
+    return WaitlistEntry.objects.filter(
+        instructor_id=instructor_id,
+        status='waiting',
+        earliest_date__lte=lesson_date,
+        latest_date__gte=lesson_date
+    ).filter(
+        Q(preferred_start_time__isnull=True) | Q(preferred_start_time__lte=start_time),
+        Q(preferred_end_time__isnull=True) | Q(preferred_end_time__gte=end_time)
+    ).order_by('created_at')
+
+
+def offer_slot(
+    instructor_id: int,
+    lesson_date: date,
+    start_time: time,
+    end_time: time,
+    exclude_learner_id: Optional[int] = None
+) -> Optional[WaitlistEntry]:
+    """
+    Offer a freed slot to the first matching learner on the waitlist
+
+    The slot is held for that learner for OFFER_MINUTES. Learners already
+    holding a slot with the instructor (e.g. mid-checkout) are passed over
+    rather than having their hold replaced, and if the hold can't be made
+    for a learner the next one in line is tried. Nothing is offered if the
+    slot is in the past, no longer inside the instructor's availability, or
+    already held or booked again.
+
+    Args:
+        exclude_learner_id (int): A learner not to offer the slot to, e.g. the one who cancelled it
+
+    Returns:
+        Optional[WaitlistEntry]: The entry the slot was offered to
+    """
+    if lesson_date <= timezone.now().date():
+        return None
+
+    entries = matching_entries(instructor_id, lesson_date, start_time, end_time).exclude(
+        Exists(active_holds().filter(instructor_id=instructor_id, learner_id=OuterRef('learner_id')))
+    )
+    if exclude_learner_id is not None:
+        entries = entries.exclude(learner_id=exclude_learner_id)
+    if not entries.exists():
+        return None
+
+    profile = InstructorProfile.objects.filter(user_id=instructor_id).values_list('pk', 'availability_bitmap').first()
+    if profile is None:
+        return None
+    available = day_availability(profile[0], decode_bitmap(profile[1]), lesson_date)
+    if not is_free(available, 0, to_minutes(start_time), to_minutes(end_time)):
+        return None
+
+    needed = interval_mask(to_minutes(start_time), to_minutes(end_time))
+    for entry in entries:
+        try:
+            hold = hold_slot(
+                instructor_id, entry.learner_id, lesson_date, start_time, end_time, minutes=OFFER_MINUTES, replace=False
+            )
+        except BookingConflict:
+            # The slot was taken, or the learner started holding another slot since the entries were read
+            if needed & blocked_bitmap(instructor_id, lesson_date):
+                return None
+            continue
+        break
+    else:
+        return None
+
+    entry.status = 'offered'
+    entry.hold = hold
+    entry.offered_date = lesson_date
+    entry.offered_start_time = start_time
+    entry.offered_end_time = end_time
+    entry.offered_at = timezone.now()
+    entry.save()
+    return entry
+
+
+def offer_cancelled_booking(booking: Booking) -> Optional[WaitlistEntry]:
+    """Offer a cancelled booking's slot to the waitlist"""
+    return offer_slot(
+        booking.instructor_id,
+        booking.lesson_date,
+        booking.start_time,
+        booking.end_time,
+        exclude_learner_id=booking.learner_id
+    )
+
+
+def offer_taken(booking: Booking) -> int:
+    """Mark the waitlist offer a booking was confirmed from as booked"""
+    return WaitlistEntry.objects.filter(
+        learner_id=booking.learner_id,
+        instructor_id=booking.instructor_id,
+        status='offered',
+        offered_date=booking.lesson_date,
+        offered_start_time=booking.start_time
+    ).update(status='booked', hold=None, updated_at=timezone.now())
+
+
+def expire_offers() -> int:
+    """
+    Expire offers that weren't taken in time and pass their slots on
+
+    Offers whose hold has expired or been released are marked expired and
+    the slot is offered to the next matching learner. Entries whose date
+    window has passed are expired too.
+
+    Returns:
+        int: The number of offers passed on
+    """
+    now = timezone.now()
+    lapsed = list(WaitlistEntry.objects.filter(status='offered').filter(
+        Q(hold__isnull=True) | Q(hold__expires_at__lte=now)
+    ))
+    WaitlistEntry.objects.filter(pk__in=[entry.pk for entry in lapsed]).update(status='expired', updated_at=now)
+    WaitlistEntry.objects.filter(status='waiting', latest_date__lt=now.date()).update(status='expired', updated_at=now)
+
+    for entry in lapsed:
+        offer_slot(
+            entry.instructor_id,
+            entry.offered_date,
+            entry.offered_start_time,
+            entry.offered_end_time,
+            exclude_learner_id=entry.learner_id
+        )
+    return len(lapsed)